@@ -0,0 +1,84 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from vhlib.CDM import CellNameIndex, add_testdir_info, cellname2nameref
+from vhlib.md import associate
+
+
+class _Dirstruct:
+
+    def __init__(self, pathname, tests):
+        self.pathname = pathname
+        self.tests = tests
+        self.calls = []
+
+    def getpathname(self):
+        return self.pathname
+
+    def gettests(self, name, ref):
+        self.calls.append((name, ref))
+        return list(self.tests.get((name, ref), []))
+
+
+def _naive_add_testdir_info(ds, cells, cellnames, assoc):
+    # one gettests call and one associate call per cell and match
+    for i in range(len(cells)):
+        nameref, _, _ = cellname2nameref(cellnames[i])
+        t = ds.gettests(nameref['name'], nameref['ref'])
+        for a in assoc:
+            if a['data'] in t:
+                cells[i] = associate(cells[i], a)
+    return cells
+
+
+class TestAddTestdirInfo(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        with open(os.path.join(self.dirname, 'testdirinfo.txt'), 'w') as f:
+            f.write('testdir\ttypes\nt00001\tDir\nt00002\tSF,Contrast\nt00003\tTF\nt00004\tDir\n')
+        rng = np.random.default_rng(0)
+        testdirs = [f't{k:05d}' for k in range(1, 6)]
+        self.tests = {(name, ref): [str(d) for d in rng.choice(testdirs, int(rng.integers(0, 4)), replace=False)]
+                      for name in ('ctx', 'extra') for ref in range(1, 5)}
+        names = rng.choice(['ctx', 'extra'], 200)
+        refs = rng.integers(1, 5, 200)
+        self.cellnames = [f"cell_{a}_{r:03d}_{k:03d}_2012_03_01" for k, (a, r) in enumerate(zip(names, refs))]
+        self.cells = [{'associates': [{'type': 'Spike width', 'owner': '', 'data': 0.3, 'desc': ''}]}
+                      for _ in self.cellnames]
+
+    def test_matches_per_cell_loop(self):
+        ds = _Dirstruct(self.dirname, self.tests)
+        assoc, _ = add_testdir_info(ds)
+        self.assertEqual([a['type'] for a in assoc], ['Dir test', 'SF test', 'Contrast test', 'TF test', 'Dir test'])
+        expected = _naive_add_testdir_info(ds, copy.deepcopy(self.cells), self.cellnames, assoc)
+        for cellnames in (self.cellnames, CellNameIndex(self.cellnames)):
+            with self.subTest(cellnames=type(cellnames).__name__):
+                ds.calls = []
+                _, cells = add_testdir_info(ds, copy.deepcopy(self.cells), cellnames)
+                self.assertEqual(cells, expected)
+                # gettests is called once per name/ref pair
+                self.assertEqual(sorted(ds.calls), sorted(set(ds.calls)))
+                self.assertEqual(len(ds.calls), len({c.rsplit('_', 4)[0] for c in self.cellnames}))
+
+    def test_without_cellnames(self):
+        assoc, cells = add_testdir_info(self.dirname, copy.deepcopy(self.cells[:3]))
+        for cell, expected in zip(cells, copy.deepcopy(self.cells[:3])):
+            for a in assoc:
+                expected = associate(expected, a)
+            self.assertEqual(cell, expected)
+
+    def test_missing_gettests(self):
+        with self.assertRaises(NotImplementedError):
+            add_testdir_info(self.dirname, copy.deepcopy(self.cells), self.cellnames)
+        self.assertEqual(add_testdir_info(self.dirname, [], [])[1], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _naive_align(do, stimids, frametimes, goodframes, skiplineafteroverflow):
+    # the entry-by-entry walk of the MATLAB repairoverflow_stimtimes_txt
+    entries, short, skipped = [], [], []
+    i, k = 0, 0
+    while i < len(do):
+        record = len(frametimes[k]) >= goodframes
+        if record:
+            entries.append(k)
+        else:
+            short.append(k)
+        k += 1
+        if skiplineafteroverflow and record and do[i] >= 255:
+            if k < len(stimids):
+                skipped.append(k)
+            k += 1
+        if record:
+            i += 1
+    return entries, short, skipped
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestAlignDisplayOrder(unittest.TestCase):
+
+    def test_matches_naive_walk(self):
+        from vhlib.StimDecode.repairoverflow_stimtimes_txt import align_display_order
+        rng = np.random.default_rng(0)
+        for trial in range(200):
+            n_display = int(rng.integers(1, 40))
+            do = rng.integers(200, 300, n_display)
+            skip = int(rng.integers(0, 2))
+            # enough entries for the walk, some short and some after overflows
+            n_entries = 3 * n_display + 5
+            framecounts = np.where(rng.random(n_entries) < 0.2, rng.integers(0, 10, n_entries), 10)
+            frametimes = [np.arange(c) * 0.01 + j for j, c in enumerate(framecounts)]
+            stimids = rng.integers(0, 256, n_entries)
+            stimtimes = np.arange(n_entries, dtype=float)
+            try:
+                entries, short, skipped = _naive_align(do, stimids, frametimes, 10, skip)
+            except IndexError:
+                continue
+            with self.subTest(trial=trial):
+                report = align_display_order(do, stimids, stimtimes, frametimes, 10, skip)
+                np.testing.assert_array_equal(report['entry_for_display'], entries)
+                np.testing.assert_array_equal(report['dropped_short'], short)
+                np.testing.assert_array_equal(report['dropped_overflow'], skipped)
+                np.testing.assert_array_equal(report['recorded_stimids'], stimids[entries])
+                np.testing.assert_array_equal(np.flatnonzero(report['kept']), entries)
+                last = max(entries + skipped)
+                np.testing.assert_array_equal(report['unused'], np.arange(last + 1, n_entries))
+
+    def test_too_few_entries(self):
+        from vhlib.StimDecode.repairoverflow_stimtimes_txt import align_display_order
+        frametimes = [np.zeros(10), np.zeros(3)]
+        with self.assertRaises(ValueError):
+            align_display_order([1, 2], [1, 2], [0.0, 1.0], frametimes)
+
+
+if __name__ == '__main__':
+    unittest.main()
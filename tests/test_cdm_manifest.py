@@ -0,0 +1,242 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from vhlib.CDM.cdm_manifest import CDM_STAGE_VERSIONS, EXPERIMENT_FILE, plan_cdm_stages
+from vhlib.CDM.cdm_pipeline import DEFAULT_STAGES
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _stages(names=DEFAULT_STAGES):
+    return [(name, CDM_STAGE_VERSIONS[name]) for name in names]
+
+
+def _entry(stages, inputs):
+    return {'inputs': inputs, 'stages': dict(stages)}
+
+
+class TestPlanCdmStages(unittest.TestCase):
+
+    def setUp(self):
+        self.inputs = {
+            EXPERIMENT_FILE: [10, 1, 'e'],
+            'unitquality.txt': [10, 1, 'u'],
+            'testdirinfo.txt': [10, 1, 'd'],
+            'trainingtype.txt': [10, 1, 't'],
+            'associate_variables.txt': [10, 1, 'a'],
+            't00001/filetime.txt': [10, 1, 'f'],
+        }
+
+    def _changed(self, filename, content='x'):
+        fingerprints = {f: list(v) for f, v in self.inputs.items()}
+        fingerprints[filename] = [11, 2, content]
+        return fingerprints
+
+    def test_no_entry_runs_all(self):
+        self.assertEqual(plan_cdm_stages(_stages(), self.inputs, None), list(DEFAULT_STAGES))
+
+    def test_unchanged_runs_nothing(self):
+        stages = _stages()
+        self.assertEqual(plan_cdm_stages(stages, self.inputs, _entry(stages, self.inputs)), [])
+
+    def test_touched_file_runs_nothing(self):
+        stages = _stages()
+        fingerprints = self._changed('testdirinfo.txt', content='d')
+        self.assertEqual(plan_cdm_stages(stages, fingerprints, _entry(stages, self.inputs)), [])
+
+    def test_default_stages_run_all_after_any_change(self):
+        # filter_by_quality runs on every rebuild, and the stages after it use its output
+        stages = _stages()
+        entry = _entry(stages, self.inputs)
+        for filename in self.inputs:
+            with self.subTest(filename=filename):
+                self.assertEqual(plan_cdm_stages(stages, self._changed(filename), entry), list(DEFAULT_STAGES))
+
+    def test_runs_from_first_affected_stage(self):
+        names = ('load', 'add_testdir_info', 'read_trainingtype', 'add_associate_variables',
+                 'extractstimdirectorytimes', 'save')
+        stages = _stages(names)
+        entry = _entry(stages, self.inputs)
+        expected = {
+            'trainingtype.txt': ['load', 'read_trainingtype', 'add_associate_variables',
+                                 'extractstimdirectorytimes', 'save'],
+            'associate_variables.txt': ['load', 'add_associate_variables', 'extractstimdirectorytimes', 'save'],
+            't00001/filetime.txt': ['load', 'extractstimdirectorytimes', 'save'],
+            'testdirinfo.txt': list(names),
+            EXPERIMENT_FILE: list(names),
+        }
+        for filename, torun in expected.items():
+            with self.subTest(filename=filename):
+                self.assertEqual(plan_cdm_stages(stages, self._changed(filename), entry), torun)
+
+    def test_new_stage_version(self):
+        names = ('load', 'add_testdir_info', 'read_trainingtype', 'save')
+        stages = _stages(names)
+        entry = _entry(stages, self.inputs)
+        entry['stages']['read_trainingtype'] = 0
+        self.assertEqual(plan_cdm_stages(stages, self.inputs, entry), ['load', 'read_trainingtype', 'save'])
+        entry = _entry(stages, self.inputs)
+        entry['stages']['save'] = 0
+        self.assertEqual(plan_cdm_stages(stages, self.inputs, entry), ['load', 'save'])
+
+    def test_required_stage_runs(self):
+        names = ('load', 'read_unitquality', 'add_testdir_info', 'filter_by_quality', 'save')
+        stages = _stages(names)
+        entry = _entry(stages, self.inputs)
+        self.assertEqual(plan_cdm_stages(stages, self._changed('testdirinfo.txt'), entry), list(names))
+
+    def test_without_load_runs_all(self):
+        # the cells of the earlier run cannot be loaded, so no stage can be skipped
+        names = ('add_testdir_info', 'read_trainingtype', 'save')
+        stages = _stages(names)
+        entry = _entry(stages, self.inputs)
+        self.assertEqual(plan_cdm_stages(stages, self._changed('trainingtype.txt'), entry), list(names))
+        self.assertEqual(plan_cdm_stages(stages, self.inputs, entry), [])
+
+
+class _Dirstruct:
+    """
+    A minimal dirstruct whose experiment file is a pickle of cells and cell names
+    """
+
+    testdirs = ['t00001', 't00002']
+
+    def __init__(self, pathname):
+        self.pathname = pathname
+
+    def getpathname(self):
+        return self.pathname
+
+    def getexperimentfile(self):
+        return os.path.join(self.pathname, 'experiment.pkl'), None
+
+    def gettests(self, name, ref):
+        return list(self.testdirs)
+
+    def saveexpvar(self, cells, cellnames, preserve):
+        # like the dirstruct method, cells that are not saved keep their earlier value
+        exp_file, _ = self.getexperimentfile()
+        saved = _read_experiment(exp_file)
+        saved.update(zip(cellnames, cells))
+        with open(exp_file, 'wb') as f:
+            pickle.dump(saved, f)
+
+
+def _read_experiment(exp_file):
+    with open(exp_file, 'rb') as f:
+        return pickle.load(f)
+
+
+def _open_experiment(experiment):
+    from vhlib.CDM.experiment_context import ExperimentContext
+    from vhlib.StimDecode.experiment_inventory import ExperimentInventory
+    return ExperimentContext(_Dirstruct(experiment), inventory=ExperimentInventory(experiment))
+
+
+def _stage_load(state):
+    exp_file, _ = state['ds'].getexperimentfile()
+    saved = _read_experiment(exp_file)
+    state['cellnames'] = sorted(saved)
+    state['cells'] = [saved[name] for name in state['cellnames']]
+
+
+def _stage_save(state):
+    state['ds'].saveexpvar(state['cells'], list(state['cellnames']), 0)
+
+
+def _write(dirname, filename, text):
+    with open(os.path.join(dirname, filename), 'w') as f:
+        f.write(text)
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestIncrementalRebuild(unittest.TestCase):
+    """
+    An incremental rebuild must give the same cells as running all stages
+    """
+
+    changes = {
+        'testdirinfo': ('testdirinfo.txt', 'testdir\ttypes\nt00001\tDir\nt00002\tContrast\n'),
+        'unitquality': ('unitquality.txt', 'channel\tunit\tqualitycode\tgoodtestdirs\tcomment\n'
+                                           '1\ta,b\tg\tt00001\t\n2\ta\te\tt00001,t00002\t\n'),
+        'trainingtype': ('trainingtype.txt', 'flash\n'),
+        'associate_variables': ('associate_variables.txt', 'type\towner\tdata\tdesc\nAge\t\tP30\tage\n'),
+        'filetime': (os.path.join('t00002', 'filetime.txt'), '40000\n'),
+    }
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        patches = [
+            mock.patch('vhlib.CDM.cdm_pipeline._open_experiment', _open_experiment),
+            mock.patch.dict('vhlib.CDM.cdm_pipeline.CDM_STAGES', {'load': _stage_load, 'save': _stage_save}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _make_experiment(self, name, datestr):
+        d = os.path.join(self.root, name, datestr)
+        os.makedirs(d)
+        cellnames = [f"cell_extra_{ref:03d}_{index:03d}_{datestr.replace('-', '_')}"
+                     for ref in (1, 2) for index in (401, 402)]
+        with open(os.path.join(d, 'experiment.pkl'), 'wb') as f:
+            pickle.dump({n: {'associates': []} for n in cellnames}, f)
+        _write(d, 'testdirinfo.txt', 'testdir\ttypes\nt00001\tDir\nt00002\tSF\n')
+        _write(d, 'unitquality.txt', 'channel\tunit\tqualitycode\tgoodtestdirs\tcomment\n'
+                                     '1\ta,b\tg\tt00001\t\n2\ta\te\tt00001,t00002\t\n2\tb\tmu\tt00002\t\n')
+        _write(d, 'trainingtype.txt', 'bi\n')
+        _write(d, 'associate_variables.txt', 'type\towner\tdata\tdesc\nAge\t\tP28\tage\n')
+        for t, filetime in (('t00001', '36000\n'), ('t00002', '37000\n')):
+            os.makedirs(os.path.join(d, t))
+            for f in ('stims.mat', 'spike2data.smr'):
+                _write(os.path.join(d, t), f, '')
+            _write(os.path.join(d, t), 'filetime.txt', filetime)
+        return d
+
+    def _run(self, experiment, manifest=None):
+        from vhlib.CDM import run_cdm_pipeline
+        summary = run_cdm_pipeline([experiment], processes=1, verbose=False, manifest=manifest)
+        self.assertEqual(summary['failed'], [], summary['results'][0]['traceback'])
+        return summary['results'][0]
+
+    def test_incremental_equals_full_rebuild(self):
+        manifest = os.path.join(self.root, 'manifest.json')
+        for change, (filename, text) in self.changes.items():
+            with self.subTest(change=change):
+                incremental = self._make_experiment('incremental_' + change, '2012-03-01')
+                full = self._make_experiment('full_' + change, '2012-03-01')
+                self._run(incremental, manifest)
+                self._run(full)
+                self.assertTrue(self._run(incremental, manifest)['skipped'])
+
+                _write(incremental, filename, text)
+                _write(full, filename, text)
+                result = self._run(incremental, manifest)
+                self.assertFalse(result['skipped'])
+                self._run(full)
+
+                self.assertEqual(_read_experiment(os.path.join(incremental, 'experiment.pkl')),
+                                 _read_experiment(os.path.join(full, 'experiment.pkl')))
+
+    def test_added_test_type_gets_time(self):
+        manifest = os.path.join(self.root, 'manifest.json')
+        d = self._make_experiment('contrast', '2012-03-01')
+        self._run(d, manifest)
+        _write(d, *self.changes['testdirinfo'])
+        self._run(d, manifest)
+        cells = _read_experiment(os.path.join(d, 'experiment.pkl'))
+        types = [a['type'] for a in cells['cell_extra_002_401_2012_03_01']['associates']]
+        self.assertIn('Contrast test', types)
+        self.assertIn('Contrast time', types)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _stage_cells(state, n=1):
+    state['cells'] = [{'associates': []} for _ in range(n)]
+    state['cellnames'] = [f'cell_extra_001_{400 + i:03d}_2012_03_01' for i in range(n)]
+
+
+def _stage_fail_bad(state):
+    if os.path.basename(state['experiment']).startswith('bad'):
+        raise ValueError("bad experiment")
+
+
+def _stage_count(state):
+    state['counted'] = len(state['cells'])
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestRunCdmPipeline(unittest.TestCase):
+
+    stages = [('cells', _stage_cells), ('check', _stage_fail_bad, 2), ('count', _stage_count)]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.experiments = []
+        for name in ('2012-03-01', 'bad-2012-03-02', '2012-03-03'):
+            os.mkdir(os.path.join(self.root, name))
+            self.experiments.append(os.path.join(self.root, name))
+
+    def test_errors_are_isolated(self):
+        from vhlib.CDM import run_cdm_pipeline
+        for processes in (1, 2):
+            with self.subTest(processes=processes):
+                summary = run_cdm_pipeline(self.experiments, self.stages, processes=processes,
+                                           options={'cells': {'n': 3}}, verbose=False)
+                self.assertEqual([r['experiment'] for r in summary['results']], self.experiments)
+                self.assertEqual(summary['succeeded'], [self.experiments[0], self.experiments[2]])
+                self.assertEqual(summary['failed'], [self.experiments[1]])
+                self.assertEqual(summary['skipped'], [])
+                bad = summary['results'][1]
+                self.assertEqual(bad['failed_stage'], 'check')
+                self.assertEqual(bad['error'], 'ValueError: bad experiment')
+                self.assertIn('bad experiment', bad['traceback'])
+                self.assertEqual(bad['stages_run'], ['cells'])
+                for r in (summary['results'][0], summary['results'][2]):
+                    self.assertTrue(r['ok'])
+                    self.assertEqual(r['ncells'], 3)
+                    self.assertEqual(r['stages_run'], ['cells', 'check', 'count'])
+                    self.assertIsNone(r['manifest_entry'])
+                self.assertEqual(sorted(summary['stage_time']), ['cells', 'check', 'count'])
+
+    def test_unknown_stage(self):
+        from vhlib.CDM import run_cdm_experiment
+        result = run_cdm_experiment(self.experiments[0], ['cells'])
+        self.assertFalse(result['ok'])
+        self.assertIsNone(result['failed_stage'])
+        self.assertIn('Unknown stage cells', result['error'])
+
+    def test_manifest_skips_unchanged(self):
+        from vhlib.CDM import run_cdm_pipeline
+        manifest = os.path.join(self.root, 'manifest.json')
+        experiments = [self.experiments[0], self.experiments[2]]
+        first = run_cdm_pipeline(experiments, self.stages, processes=1, verbose=False, manifest=manifest)
+        self.assertEqual(first['succeeded'], experiments)
+        again = run_cdm_pipeline(experiments, self.stages, processes=1, verbose=False, manifest=manifest)
+        self.assertEqual(again['skipped'], experiments)
+        self.assertEqual(again['stage_time'], {})
+        # a new stage version reruns the experiments
+        stages = self.stages[:2] + [('count', _stage_count, 2)]
+        rerun = run_cdm_pipeline(experiments, stages, processes=1, verbose=False, manifest=manifest)
+        self.assertEqual(rerun['succeeded'], experiments)
+
+
+if __name__ == '__main__':
+    unittest.main()
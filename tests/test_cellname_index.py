@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from vhlib.CDM import CellNameIndex, filter_by_index, filter_by_reference
+
+
+def _random_cellnames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    names = rng.choice(['ctx', 'extra', 'lgn'], n)
+    refs = rng.integers(1, 6, n)
+    indexes = rng.integers(1, 500, n)
+    days = rng.integers(1, 29, n)
+    return [f"cell_{a}_{r:03d}_{i:03d}_2012_03_{d:02d}" for a, r, i, d in zip(names, refs, indexes, days)]
+
+
+class TestCellNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cellnames = _random_cellnames(500)
+        self.cells = [{'associates': [], 'k': k} for k in range(len(self.cellnames))]
+        self.cni = CellNameIndex(self.cellnames)
+
+    def test_fields(self):
+        for i, c in enumerate(self.cellnames):
+            parts = c.split('_')
+            self.assertEqual(self.cni.names()[i], parts[1])
+            self.assertEqual(self.cni.ref[i], int(parts[2]))
+            self.assertEqual(self.cni.cellindex[i], int(parts[3]))
+            self.assertEqual(str(self.cni.date[i]), '-'.join(parts[4:7]))
+
+    def test_filters_match_name_lists(self):
+        for f, lo, hi in ((filter_by_index, 100, 300), (filter_by_reference, 2, 3)):
+            with self.subTest(filter=f.__name__):
+                cells, names, I = f(self.cells, self.cellnames, lo, hi)
+                cells2, names2, I2 = f(self.cells, self.cni, lo, hi)
+                self.assertEqual(I, I2)
+                self.assertEqual(cells, cells2)
+                self.assertEqual(names, list(names2))
+
+    def test_chained_filters(self):
+        cells, names, _ = filter_by_index(self.cells, self.cellnames, 100, 300)
+        cells, names, _ = filter_by_reference(cells, names, 2, 3)
+        cells2, names2, _ = filter_by_index(self.cells, self.cni, 100, 300)
+        cells2, names2, _ = filter_by_reference(cells2, names2, 2, 3)
+        self.assertEqual(cells, cells2)
+        self.assertEqual(names, list(names2))
+
+    def test_date_range(self):
+        mask = self.cni.date_range('2012_03_05', '2012-03-10')
+        expected = [5 <= int(c.split('_')[6]) <= 10 for c in self.cellnames]
+        np.testing.assert_array_equal(mask, expected)
+
+    def test_lenient_dates(self):
+        names = ['cell_ctx_0003_002_2003_5_27', 'cell_ctx_0003_001_2003_05_27', 'cell_ctx_0004_001_2003_xx_27']
+        cni = CellNameIndex(names)
+        self.assertEqual(str(cni.date[0]), '2003-05-27')
+        self.assertTrue(np.isnat(cni.date[2]))
+        np.testing.assert_array_equal(cni.index_range(1, 1), [False, True, True])
+        np.testing.assert_array_equal(cni.date_range('2003_5_1'), [True, True, False])
+        cells = [0, 1, 2]
+        self.assertEqual(filter_by_index(cells, cni, 2, 2)[2], filter_by_index(cells, names, 2, 2)[2])
+
+    def test_invalid_names(self):
+        with self.assertRaises(ValueError):
+            CellNameIndex(['cell_ctx_0003_2003_05_27'])
+        with self.assertRaises(ValueError):
+            CellNameIndex(['cell_ctx_x_001_2003_05_27'])
+
+    def test_positions_and_subset(self):
+        self.assertEqual(self.cni.index(self.cellnames[7]), self.cellnames.index(self.cellnames[7]))
+        np.testing.assert_array_equal(self.cni.positions([self.cellnames[3], 'cell_x_001_001_2000_01_01']),
+                                      [self.cellnames.index(self.cellnames[3]), -1])
+        sub = self.cni.subset([4, 2])
+        self.assertEqual(list(sub), [self.cellnames[4], self.cellnames[2]])
+        np.testing.assert_array_equal(sub.ref, self.cni.ref[[4, 2]])
+
+    def test_make_cellnames(self):
+        self.assertEqual(CellNameIndex.make_cellnames('ctx', [3, 4], 1, '2003-05-27'),
+                         ['cell_ctx_003_001_2003_05_27', 'cell_ctx_004_001_2003_05_27'])
+
+
+if __name__ == '__main__':
+    unittest.main()
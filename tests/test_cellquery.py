@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from vhlib.CDM import CellNameIndex, CellQuery, filter_by_index, filter_by_reference, filter_by_quality
+
+
+def _random_cellnames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    names = rng.choice(['ctx', 'extra', 'lgn'], n)
+    refs = rng.integers(1, 6, n)
+    indexes = rng.integers(1, 500, n)
+    days = rng.integers(1, 29, n)
+    return [f"cell_{a}_{r:03d}_{i:03d}_2012_03_{d:02d}" for a, r, i, d in zip(names, refs, indexes, days)]
+
+
+class TestCellQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.cellnames = _random_cellnames(300, seed=1)
+        self.cells = [{'associates': []} for _ in self.cellnames]
+        for k in range(0, len(self.cells), 3):
+            self.cells[k]['associates'].append({'type': 'Dir test', 'owner': '', 'data': 't00001', 'desc': ''})
+
+    def test_matches_filter_chain(self):
+        cells, names, _ = filter_by_index(self.cells, self.cellnames, 50, 400)
+        cells, names, _ = filter_by_reference(cells, names, 1, 3)
+        for cellnames in (self.cellnames, CellNameIndex(self.cellnames)):
+            with self.subTest(cellnames=type(cellnames).__name__):
+                q = CellQuery(self.cells, cellnames).index_range(50, 400).ref_range(1, 3)
+                cells2, names2, I = q.run()
+                self.assertEqual(cells2, cells)
+                self.assertEqual(list(names2), names)
+                self.assertEqual(q.count(), len(cells))
+
+    def test_lenient_dates(self):
+        names = ['cell_ctx_0003_002_2003_5_27', 'cell_ctx_0003_001_2003_05_27']
+        self.assertEqual(CellQuery([0, 1], names).index_range(2, 5).run()[2], [0])
+
+    def test_has_associate(self):
+        I = CellQuery(self.cells, self.cellnames).has_associate('Dir test').run()[2]
+        self.assertEqual(I, list(range(0, len(self.cells), 3)))
+
+    def test_quality(self):
+        ds = '/data/2012-03-01'
+        cellnames = [f"cell_extra_001_{i:03d}_2012_03_01" for i in (401, 402, 403)]
+        cells = [{'associates': []} for _ in cellnames]
+        cellinfo = [{'name': 'extra', 'ref': 1, 'index': 403, 'quality': 'Good', 'goodtestdirs': []},
+                    {'name': 'extra', 'ref': 1, 'index': 401, 'quality': 'Multi-unit', 'goodtestdirs': []}]
+        self.assertEqual(CellQuery(cells, cellnames).quality(ds, cellinfo).run()[2],
+                         filter_by_quality(ds, list(cells), cellnames, cellinfo)[2])
+        self.assertEqual(CellQuery(cells, cellnames).quality(ds, cellinfo, ['Good']).run()[2], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
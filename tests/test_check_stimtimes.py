@@ -0,0 +1,133 @@
+import importlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+
+def _naive_check(stimids, stimtimes, frametimes, displayorder, goodframes):
+    n = len(stimtimes)
+    report = {c: [] for c in ('nonmonotonic_onsets', 'nonmonotonic_frames', 'frames_before_onset',
+                              'framecount_mismatch', 'stimid_mismatch', 'overlapping')}
+    for i in range(n):
+        f = list(frametimes[i])
+        if i > 0 and stimtimes[i] <= stimtimes[i - 1]:
+            report['nonmonotonic_onsets'].append(i)
+        if any(b <= a for a, b in zip(f[:-1], f[1:])):
+            report['nonmonotonic_frames'].append(i)
+        if any(t < stimtimes[i] for t in f):
+            report['frames_before_onset'].append(i)
+        if len(f) != goodframes:
+            report['framecount_mismatch'].append(i)
+        if i < len(displayorder) and int(displayorder[i]) % 256 != int(stimids[i]) % 256:
+            report['stimid_mismatch'].append(i)
+        if i + 1 < n and f and f[-1] >= stimtimes[i + 1]:
+            report['overlapping'].append(i)
+    return report
+
+
+class TestCheckStimtimes(unittest.TestCase):
+
+    def _random_case(self, rng, n):
+        stimtimes = np.cumsum(rng.uniform(0.5, 2, n))
+        frametimes = [t + 0.01 + np.arange(10) * 0.05 for t in stimtimes]
+        stimids = rng.integers(1, 400, n)
+        displayorder = stimids.copy()
+        for _ in range(int(rng.integers(0, 4))):
+            i = int(rng.integers(0, n))
+            kind = int(rng.integers(0, 6))
+            if kind == 0:
+                stimtimes[i] = stimtimes[max(i - 1, 0)]
+            elif kind == 1:
+                frametimes[i] = frametimes[i][::-1]
+            elif kind == 2:
+                frametimes[i] = frametimes[i] - 0.5
+            elif kind == 3:
+                frametimes[i] = frametimes[i][:int(rng.integers(0, 10))]
+            elif kind == 4:
+                displayorder[i] += int(rng.choice([1, 256]))
+            else:
+                frametimes[i] = frametimes[i] + 3
+        return stimids, stimtimes, frametimes, displayorder
+
+    def test_matches_naive_loop(self):
+        from vhlib.StimDecode import check_stimtimes
+        rng = np.random.default_rng(0)
+        for trial in range(100):
+            stimids, stimtimes, frametimes, displayorder = self._random_case(rng, int(rng.integers(1, 30)))
+            with self.subTest(trial=trial):
+                report = check_stimtimes(stimids, stimtimes, frametimes, displayorder, goodframes=10)
+                naive = _naive_check(stimids, stimtimes, frametimes, displayorder, 10)
+                for check, expected in naive.items():
+                    np.testing.assert_array_equal(report[check], expected, err_msg=check)
+                    self.assertEqual(report['counts'][check], len(expected))
+                self.assertEqual(report['ok'], not any(naive.values()))
+                self.assertEqual(report['n'], len(stimtimes))
+
+    def test_displayorder_length(self):
+        from vhlib.StimDecode import check_stimtimes
+        frametimes = [np.array([0.1]), np.array([1.1])]
+        report = check_stimtimes([1, 2], [0.0, 1.0], frametimes, displayorder=[1, 2, 3])
+        self.assertEqual(len(report['messages']), 1)
+        self.assertFalse(report['ok'])
+        report = check_stimtimes([1, 2], [0.0, 1.0], frametimes, goodframes=1)
+        self.assertTrue(report['ok'])
+        with self.assertRaises(ValueError):
+            check_stimtimes([1], [0.0, 1.0], frametimes)
+
+    def test_default_goodframes(self):
+        from vhlib.StimDecode import check_stimtimes
+        stimtimes = np.arange(5.0)
+        frametimes = [t + np.arange(k) * 0.1 for t, k in zip(stimtimes, (3, 3, 2, 3, 0))]
+        report = check_stimtimes(np.ones(5), stimtimes, frametimes)
+        np.testing.assert_array_equal(report['framecount_mismatch'], [2, 4])
+
+    def test_dirs(self):
+        from vhlib.StimDecode import write_stimtimes_txt, check_stimtimes, check_stimtimes_dirs
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        rng = np.random.default_rng(1)
+        dirnames, cases = [], {}
+        for k in range(3):
+            d = os.path.join(root, f't{k + 1:05d}')
+            os.mkdir(d)
+            stimids, stimtimes, frametimes, _ = self._random_case(rng, 15)
+            write_stimtimes_txt(d, stimids, stimtimes, frametimes, binary=True)
+            dirnames.append(d)
+            cases[d] = (stimids, stimtimes, frametimes)
+        missing = os.path.join(root, 't00009')
+        for processes in (1, 2):
+            with self.subTest(processes=processes):
+                reports = check_stimtimes_dirs(dirnames + [missing], processes=processes)
+                self.assertEqual(list(reports), dirnames + [missing])
+                for d in dirnames:
+                    expected = check_stimtimes(*cases[d])
+                    self.assertEqual(reports[d]['counts'], expected['counts'])
+                self.assertFalse(reports[missing]['ok'])
+                self.assertIn('error', reports[missing])
+
+        # any error is reported for its own directory only
+        module = importlib.import_module('vhlib.StimDecode.read_stimtimes_txt')
+        read = module.read_stimtimes_txt
+
+        def read_or_fail(dirname, filename):
+            if dirname == dirnames[1]:
+                raise KeyError('malformed')
+            return read(dirname, filename)
+
+        with mock.patch.object(module, 'read_stimtimes_txt', read_or_fail):
+            for processes in (1, 2):
+                with self.subTest(processes=processes, error='KeyError'):
+                    reports = check_stimtimes_dirs(dirnames, processes=processes)
+                    self.assertFalse(reports[dirnames[1]]['ok'])
+                    self.assertEqual(reports[dirnames[1]]['error'], "KeyError: 'malformed'")
+                    self.assertIn('read_or_fail', reports[dirnames[1]]['traceback'])
+                    self.assertIn('counts', reports[dirnames[0]])
+                    self.assertIn('counts', reports[dirnames[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
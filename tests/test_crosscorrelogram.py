@@ -0,0 +1,103 @@
+import bisect
+import unittest
+
+import numpy as np
+
+from vhlib.md.general import crosscorrelogram, crosscorrelogram_all
+
+
+def _naive_bins(window, binsize):
+    # steps of binsize from -window, with the final bin ending at +window
+    bins = [-window]
+    while bins[-1] + binsize < window - 1e-12:
+        bins.append(bins[-1] + binsize)
+    return bins + [window]
+
+
+def _naive_ccg(t1, t2, window, binsize, exclude_zero=False, same_train=False):
+    bins = _naive_bins(window, binsize)
+    counts = np.zeros(len(bins) - 1, dtype=np.int64)
+    for i, a in enumerate(t1):
+        for j, b in enumerate(t2):
+            if same_train and i == j:
+                continue
+            lag = b - a
+            if exclude_zero and lag == 0:
+                continue
+            # the bin k with bins[k] <= lag < bins[k+1]
+            k = bisect.bisect_right(bins, lag) - 1
+            if 0 <= k < len(counts):
+                counts[k] += 1
+    return counts
+
+
+class TestCrossCorrelogram(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.trains = [np.sort(rng.uniform(0, 20, n)) for n in (300, 250, 1)]
+        self.trains.append(np.zeros(0))
+
+    def test_matches_naive_loop(self):
+        for window, binsize in ((0.1, 0.005), (0.05, 0.001), (0.3, 0.07), (0.3, 0.11)):
+            with self.subTest(window=window, binsize=binsize):
+                counts, bins = crosscorrelogram(self.trains[0], self.trains[1], window, binsize)
+                np.testing.assert_allclose(bins, _naive_bins(window, binsize), rtol=0, atol=1e-12)
+                self.assertEqual(bins[0], -window)
+                self.assertEqual(bins[-1], window)
+                np.testing.assert_array_equal(counts, _naive_ccg(self.trains[0], self.trains[1], window, binsize))
+
+    def test_window_not_multiple_of_binsize(self):
+        # lags up to the window are counted, in a shortened final bin
+        counts, bins = crosscorrelogram([0.0], [0.27, 0.299, -0.3], 0.3, 0.11)
+        np.testing.assert_allclose(bins, [-0.3, -0.19, -0.08, 0.03, 0.14, 0.25, 0.3])
+        np.testing.assert_array_equal(counts, [1, 0, 0, 0, 0, 2])
+        counts, bins = crosscorrelogram([0.0], [0.31], 0.3, 0.07)
+        self.assertEqual(bins[-1], 0.3)
+        self.assertEqual(counts.sum(), 0)
+
+    def test_unsorted_input(self):
+        rng = np.random.default_rng(1)
+        t1, t2 = rng.permutation(self.trains[0]), rng.permutation(self.trains[1])
+        counts, _ = crosscorrelogram(t1, t2, 0.1, 0.005)
+        np.testing.assert_array_equal(counts, _naive_ccg(self.trains[0], self.trains[1], 0.1, 0.005))
+
+    def test_exclude_zero(self):
+        t = np.array([0.0, 0.013, 0.013, 0.5])
+        counts, _ = crosscorrelogram(t, t, 0.05, 0.02)
+        np.testing.assert_array_equal(counts, _naive_ccg(t, t, 0.05, 0.02))
+        self.assertEqual(counts[2], 6)
+        counts, _ = crosscorrelogram(t, t, 0.05, 0.02, exclude_zero=True)
+        np.testing.assert_array_equal(counts, _naive_ccg(t, t, 0.05, 0.02, exclude_zero=True))
+        self.assertEqual(counts[2], 0)
+
+    def test_all_pairs(self):
+        ccgs, bins, pairs = crosscorrelogram_all(self.trains, 0.1, 0.005)
+        self.assertEqual(pairs, [(i, j) for i in range(4) for j in range(i, 4)])
+        for p, (i, j) in enumerate(pairs):
+            with self.subTest(pair=(i, j)):
+                # autocorrelograms drop only each spike's pairing with itself
+                np.testing.assert_array_equal(ccgs[p], _naive_ccg(self.trains[i], self.trains[j], 0.1, 0.005,
+                                                                   same_train=(i == j)))
+        ccgs, _, pairs = crosscorrelogram_all(self.trains, 0.1, 0.005, pairs=[(1, 0)])
+        np.testing.assert_array_equal(ccgs[0], _naive_ccg(self.trains[1], self.trains[0], 0.1, 0.005))
+
+    def test_chunks(self):
+        from vhlib.md.general.crosscorrelogram import _ccg_counts
+        t1, t2 = self.trains[0], self.trains[1]
+        np.testing.assert_array_equal(_ccg_counts(t1, t2, 0.1, 0.005, 40, False, False, chunksize=7),
+                                      _naive_ccg(t1, t2, 0.1, 0.005))
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            crosscorrelogram(self.trains[0], self.trains[1], 0.1, 0)
+        with self.assertRaises(ValueError):
+            crosscorrelogram(self.trains[0], self.trains[1], -0.1, 0.01)
+        # a bin wider than the window is shortened to the window
+        counts, bins = crosscorrelogram([0.0], [0.005, 0.02], 0.01, 0.1)
+        np.testing.assert_array_equal(bins, [-0.01, 0.01])
+        np.testing.assert_array_equal(counts, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
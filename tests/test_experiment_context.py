@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vhlib.CDM import ExperimentContext
+from vhlib.CDM.experiment_context import context_load
+
+
+class _Dirstruct:
+
+    def __init__(self, pathname):
+        self.pathname = pathname
+
+    def getpathname(self):
+        return self.pathname
+
+    def gettests(self, name, ref):
+        return ['t00001']
+
+
+class TestExperimentContext(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        self.calls = []
+        self._write('testdirinfo.txt', 'testdir\ttypes\nt00001\tDir\nt00002\tSF,Contrast\n')
+
+    def _write(self, name, text, mtime=None):
+        path = os.path.join(self.dirname, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def _parser(self, path):
+        self.calls.append(path)
+        with open(path) as f:
+            return f.read()
+
+    def test_parses_once(self):
+        ctx = ExperimentContext(self.dirname)
+        self.assertEqual(ctx.load('testdirinfo.txt', self._parser), ctx.load('testdirinfo.txt', self._parser))
+        path = os.path.join(self.dirname, 'testdirinfo.txt')
+        self.assertEqual(self.calls, [path])
+        # a full path names the same file
+        ctx.load(path, self._parser)
+        self.assertEqual(len(self.calls), 1)
+        # each parser has its own entry
+        ctx.load('testdirinfo.txt', len)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_reparses_changed_file(self):
+        ctx = ExperimentContext(self.dirname)
+        self._write('a.txt', 'one', mtime=10 ** 18)
+        self.assertEqual(ctx.load('a.txt', self._parser), 'one')
+        # same size, new modification time
+        self._write('a.txt', 'two', mtime=10 ** 18 + 1)
+        self.assertEqual(ctx.load('a.txt', self._parser), 'two')
+        # same modification time, new size
+        self._write('a.txt', 'three', mtime=10 ** 18 + 1)
+        self.assertEqual(ctx.load('a.txt', self._parser), 'three')
+        self.assertEqual(len(self.calls), 3)
+        os.remove(os.path.join(self.dirname, 'a.txt'))
+        with self.assertRaises(FileNotFoundError):
+            ctx.load('a.txt', self._parser)
+
+    def test_invalidate(self):
+        ctx = ExperimentContext(self.dirname)
+        self._write('a.txt', 'a')
+        ctx.load('a.txt', self._parser)
+        ctx.load('testdirinfo.txt', self._parser)
+        ctx.invalidate('a.txt')
+        ctx.load('a.txt', self._parser)
+        ctx.load('testdirinfo.txt', self._parser)
+        self.assertEqual(len(self.calls), 3)
+        ctx.invalidate()
+        ctx.load('testdirinfo.txt', self._parser)
+        self.assertEqual(len(self.calls), 4)
+
+    def test_testdirs(self):
+        from vhlib.CDM.add_testdir_info import read_testdir_associates
+        ctx = ExperimentContext(_Dirstruct(self.dirname))
+        self.assertEqual(ctx.testdir('Dir'), 't00001')
+        self.assertEqual(ctx.testdir('Contrast'), 't00002')
+        self.assertIsNone(ctx.testdir('TF'))
+        self.assertEqual(ctx.testdir_associates(),
+                         read_testdir_associates(os.path.join(self.dirname, 'testdirinfo.txt')))
+        self._write('testdirinfo.txt', 'testdir\ttypes\nt00003\tDir\n')
+        self.assertEqual(ctx.testdir('Dir'), 't00003')
+        self.assertIsNone(ctx.testdir('Contrast'))
+
+    def test_wrapping(self):
+        ds = _Dirstruct(self.dirname)
+        ctx = ExperimentContext(ds, inventory='inv')
+        self.assertEqual(ctx.getpathname(), self.dirname)
+        self.assertEqual(ctx.gettests('extra', 1), ['t00001'])
+        again = ExperimentContext(ctx)
+        self.assertIs(again.ds, ds)
+        self.assertEqual(again.inventory, 'inv')
+        with self.assertRaises(AttributeError):
+            ExperimentContext(self.dirname).gettests
+        with self.assertRaises(ValueError):
+            ExperimentContext(3)
+        self.assertEqual(context_load(ds, os.path.join(self.dirname, 'testdirinfo.txt'), self._parser),
+                         context_load(ds, os.path.join(self.dirname, 'testdirinfo.txt'), self._parser))
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
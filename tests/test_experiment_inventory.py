@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestExperimentInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in ('testdirinfo.txt', 'notes.doc'):
+            self._touch(name)
+        for t in ('t00001', 't00002'):
+            os.makedirs(os.path.join(self.root, t))
+            for name in ('stims.mat', 'filetime.txt', 'stimtimes.txt', 'other.dat'):
+                self._touch(os.path.join(t, name))
+        os.makedirs(os.path.join(self.root, 't00001', 'nested'))
+        self._touch(os.path.join('t00001', 'nested', 'stims.mat'))
+
+    def _touch(self, name):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write('x' * len(name))
+
+    def test_matches_file_system(self):
+        from vhlib.StimDecode import ExperimentInventory
+        from vhlib.StimDecode.experiment_inventory import inventory_isfile, inventory_stat
+        inv = ExperimentInventory(self.root)
+        self.assertEqual(inv.testdirs(), ['t00001', 't00002'])
+        for name in ('testdirinfo.txt', 'notes.doc', 'unitquality.txt', 't00001/stims.mat',
+                     't00002/spike2data.smr', 't00002/other.dat', 't00001/nested/stims.mat', 't00003/stims.mat'):
+            path = os.path.join(self.root, *name.split('/'))
+            with self.subTest(name=name):
+                self.assertEqual(inv.isfile(path), os.path.isfile(path))
+                self.assertEqual(inventory_isfile(inv, path), inventory_isfile(None, path))
+                self.assertEqual(inv.stat(path), inventory_stat(None, path))
+        self.assertEqual(sorted(inv.files(os.path.join(self.root, 't00001'))),
+                         ['filetime.txt', 'stims.mat', 'stimtimes.txt'])
+
+    def test_snapshot_and_refresh(self):
+        from vhlib.StimDecode import ExperimentInventory
+        inv = ExperimentInventory(self.root)
+        path = os.path.join(self.root, 't00001', 'spike2data.smr')
+        self._touch(os.path.join('t00001', 'spike2data.smr'))
+        self.assertFalse(inv.isfile(path))
+        self.assertTrue(inv.refresh().isfile(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _write(dirname, filename, text):
+    with open(os.path.join(dirname, filename), 'w') as f:
+        f.write(text)
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestExperimentTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def _testdir(self, name, filetime, lines):
+        d = os.path.join(self.root, name)
+        os.makedirs(d)
+        for f in ('stims.mat', 'spike2data.smr'):
+            _write(d, f, '')
+        _write(d, 'filetime.txt', f"{filetime}\n")
+        _write(d, 'stimtimes.txt', ''.join(line + '\n' for line in lines))
+
+    def _timeline(self):
+        from vhlib.StimDecode import ExperimentTimeline
+        return ExperimentTimeline(self.root, WarnOnEarlyMorning=False)
+
+    def test_last_stimulus_without_frames(self):
+        # stimuli last 2 s, with a 1 s gap; the last stimulus has no frames
+        self._testdir('t00001', 36000, ['1 0.0 0.0 0.5 1.0 1.5', '2 3.0 3.0 3.5 4.0 4.5', '3 6.0'])
+        tl = self._timeline()
+        np.testing.assert_allclose(tl.offset, [36002, 36005, 36008])
+        self.assertEqual(tl.stimulus_at(36007.0), 2)
+        self.assertEqual(list(tl.presentations_in(36007.0, 36007.5)), [2])
+
+    def test_single_stimulus_without_frames(self):
+        self._testdir('t00001', 36000, ['1 0.0'])
+        self._testdir('t00002', 36100, ['2 0.0 0.0 0.5', '3 1.0 1.0 1.5'])
+        tl = self._timeline()
+        np.testing.assert_allclose(tl.onset, [36000, 36100, 36101])
+        self.assertEqual(tl.offset[0], 36100)
+        self.assertEqual(tl.stimulus_at(36050.0), 0)
+
+    def test_stimulus_at_matches_naive_loop(self):
+        rng = np.random.default_rng(0)
+        for k, t0 in enumerate((36000, 37000, 36500)):
+            lines = []
+            for j, on in enumerate(np.arange(0, 200, 4.0)):
+                frames = on + np.arange(0, 2, 0.5) if rng.random() < 0.8 else []
+                lines.append(' '.join([str(j % 5 + 1), f"{on:.5f}"] + [f"{f:.5f}" for f in frames]))
+            self._testdir(f"t{k + 1:05d}", t0, lines)
+        tl = self._timeline()
+        self.assertTrue(np.all(np.diff(tl.onset) >= 0))
+        self.assertTrue(np.all(tl.offset > tl.onset))
+        for t in rng.uniform(35990, 37300, 300):
+            on = [i for i in range(len(tl)) if tl.onset[i] <= t < tl.offset[i]]
+            expected = on[-1] if on else -1
+            self.assertEqual(tl.stimulus_at(t), expected)
+            overlap = [i for i in range(len(tl)) if tl.onset[i] < t + 5 and tl.offset[i] > t]
+            self.assertEqual(list(tl.presentations_in(t, t + 5)), overlap)
+
+
+if __name__ == '__main__':
+    unittest.main()
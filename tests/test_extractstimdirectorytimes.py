@@ -0,0 +1,67 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestExtractStimDirectoryTimes(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        rng = np.random.default_rng(0)
+        self.testdirs = [f't{k:05d}' for k in range(1, 9)]
+        for k, t in enumerate(self.testdirs):
+            os.mkdir(os.path.join(self.dirname, t))
+            for name, text in (('stims.mat', ''), ('spike2data.smr', ''), ('filetime.txt', f'{36000 + 600 * k}\n')):
+                with open(os.path.join(self.dirname, t, name), 'w') as f:
+                    f.write(text)
+        self.cells = []
+        for _ in range(60):
+            associates = [{'type': 'Spike width', 'owner': '', 'data': 0.3, 'desc': ''}]
+            for typ in rng.choice(['Dir', 'SF', 'Contrast', 'TF'], int(rng.integers(0, 4)), replace=False):
+                associates.append({'type': f'{typ} test', 'owner': '', 'data': str(rng.choice(self.testdirs)),
+                                   'desc': ''})
+            self.cells.append({'associates': associates})
+
+    def test_matches_per_cell(self):
+        from vhlib.CDM import extractstimdirectorytimes, extractstimdirectorytimes_all
+        import vhlib.StimDecode
+        expected = [extractstimdirectorytimes(self.dirname, copy.deepcopy(c), Cache=False) for c in self.cells]
+        for threads in (1, 4):
+            with self.subTest(threads=threads):
+                with mock.patch('vhlib.StimDecode.getstimdirectorytime',
+                                wraps=vhlib.StimDecode.getstimdirectorytime) as read:
+                    cells, assoc_lists = extractstimdirectorytimes_all(self.dirname, copy.deepcopy(self.cells),
+                                                                       Cache=False, Threads=threads)
+                self.assertEqual(cells, [e[0] for e in expected])
+                self.assertEqual(assoc_lists, [e[1] for e in expected])
+                # each test directory is read once
+                dirs = [os.path.basename(c.args[0]) for c in read.call_args_list]
+                self.assertEqual(sorted(dirs), sorted({a['data'] for c in self.cells for a in c['associates']
+                                                       if a['type'].endswith(' test')}))
+        self.assertEqual(cells[0]['associates'][0]['type'], 'Spike width')
+
+    def test_empty_test_data(self):
+        from vhlib.CDM import extractstimdirectorytimes_all
+        cells = [{'associates': [{'type': 'Dir test', 'owner': '', 'data': '', 'desc': ''}]}]
+        with self.assertRaises(ValueError):
+            extractstimdirectorytimes_all(self.dirname, copy.deepcopy(cells), Cache=False)
+        out, assoc_lists = extractstimdirectorytimes_all(self.dirname, copy.deepcopy(cells), Cache=False,
+                                                         ErrorIfEmptyTestData=False)
+        self.assertEqual(assoc_lists, [[]])
+        self.assertEqual(out, cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
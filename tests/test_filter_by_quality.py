@@ -0,0 +1,69 @@
+import copy
+import unittest
+
+import numpy as np
+
+from vhlib.CDM import CellNameIndex, filter_by_quality, nameref2cellname
+from vhlib.md import associate, disassociate, findassociate
+
+
+def _naive_filter_by_quality(ds, cells, cellnames, cellinfo):
+    # the row-by-row version with a list search for every row
+    I = []
+    for info in cellinfo:
+        j = cellnames.index(nameref2cellname(ds, info['name'], info['ref'], info['index']))
+        I.append(j)
+        A, _ = findassociate(cells[j], '', '', '')
+        inds_to_ax = [idx for idx, a in enumerate(A)
+                      if a.get('type', '').endswith(' test') and a.get('data') not in info.get('goodtestdirs', [])]
+        if inds_to_ax:
+            cells[j] = disassociate(cells[j], inds_to_ax)
+        cells[j] = associate(cells[j], 'Plexon Quality', '', info.get('quality', ''),
+                             'Quality label as determined by the user of the Offline Spike Sorter by Plexon')
+    I = sorted(I)
+    return [cells[i] for i in I], [cellnames[i] for i in I], I
+
+
+class TestFilterByQuality(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.ds = '/data/2012-03-01'
+        keys = sorted({(str(a), int(r), int(i)) for a, r, i in zip(rng.choice(['ctx', 'extra'], 300),
+                                                                     rng.integers(1, 6, 300),
+                                                                     rng.integers(1, 500, 300))})
+        self.cellnames = [nameref2cellname(self.ds, a, r, i) for a, r, i in keys]
+        testdirs = [f't{k:05d}' for k in range(1, 8)]
+        self.cells = []
+        for _ in self.cellnames:
+            cell = {'associates': []}
+            for d in rng.choice(testdirs, int(rng.integers(0, 4)), replace=False):
+                cell = associate(cell, str(rng.choice(['Dir test', 'Contrast test'])), '', str(d), '')
+            cell = associate(cell, 'Spike width', '', 0.3, '')
+            self.cells.append(cell)
+        rows = rng.choice(len(keys), 120, replace=False)
+        self.cellinfo = [{'name': keys[k][0], 'ref': keys[k][1], 'index': keys[k][2],
+                          'quality': str(rng.choice(['Excellent', 'Good', 'Multi-unit'])),
+                          'goodtestdirs': [str(d) for d in rng.choice(testdirs, 3, replace=False)]}
+                         for k in rows]
+
+    def test_matches_row_loop(self):
+        expected = _naive_filter_by_quality(self.ds, copy.deepcopy(self.cells), self.cellnames, self.cellinfo)
+        for cellnames in (self.cellnames, CellNameIndex(self.cellnames)):
+            with self.subTest(cellnames=type(cellnames).__name__):
+                cells, names, I = filter_by_quality(self.ds, copy.deepcopy(self.cells), cellnames, self.cellinfo)
+                self.assertEqual(I, expected[2])
+                self.assertEqual(list(names), expected[1])
+                self.assertEqual(cells, expected[0])
+
+    def test_missing_cell(self):
+        cellinfo = self.cellinfo + [{'name': 'lgn', 'ref': 1, 'index': 1, 'quality': 'Good', 'goodtestdirs': []}]
+        with self.assertRaises(ValueError):
+            filter_by_quality(self.ds, copy.deepcopy(self.cells), self.cellnames, cellinfo)
+
+    def test_empty(self):
+        self.assertEqual(filter_by_quality(self.ds, self.cells, self.cellnames, []), ([], [], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from scipy.io import savemat
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestLoadMatVariables(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+
+    def test_only_requested_variables(self):
+        from vhlib.StimDecode import load_mat_variables
+        path = os.path.join(self.dirname, 'stimtimes_plexon.mat')
+        savemat(path, {'FrameTrigger': np.arange(5.0), 'Strobed': np.ones((3, 2)), 'Spikes': np.zeros(1000)})
+        out = load_mat_variables(path, ['FrameTrigger', 'Strobed', 'StimulusTrigger'])
+        self.assertEqual(sorted(out), ['FrameTrigger', 'Strobed'])
+        np.testing.assert_array_equal(out['FrameTrigger'].ravel(), np.arange(5.0))
+        np.testing.assert_array_equal(out['Strobed'], np.ones((3, 2)))
+
+    def test_not_a_mat_file(self):
+        from vhlib.StimDecode import load_mat_variables
+        path = os.path.join(self.dirname, 'bad.mat')
+        with open(path, 'w') as f:
+            f.write('not a MAT file')
+        with self.assertRaises(IOError):
+            load_mat_variables(path, ['x'])
+
+
+if __name__ == '__main__':
+    unittest.main()
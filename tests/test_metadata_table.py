@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from vhlib.CDM import read_metadata_table
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _naive_rows(filename):
+    # the list of string dictionaries that loadStructArray returns
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    fields = lines[0].split('\t')
+    rows = []
+    for line in lines[1:]:
+        if line:
+            values = line.split('\t')
+            rows.append(dict(zip(fields, values + [''] * (len(fields) - len(values)))))
+    return rows
+
+
+class TestReadMetadataTable(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='2012-03-01_')
+        self.addCleanup(shutil.rmtree, self.dirname)
+
+    def _write(self, filename, text):
+        path = os.path.join(self.dirname, filename)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_associate_variables_are_strings(self):
+        path = self._write('associate_variables.txt', 'type\towner\tdata\tdesc\n'
+                                                      'Age\t\t1.8\tage\nID\t\t007\tanimal\nN\t\t1_000\tcount\n')
+        rows = read_metadata_table(path).rows()
+        self.assertEqual(rows, _naive_rows(path))
+        self.assertEqual([r['data'] for r in rows], ['1.8', '007', '1_000'])
+
+    def test_unitquality_schema(self):
+        path = self._write('unitquality.txt', 'channel\tunit\tqualitycode\tgoodtestdirs\tcomment\n'
+                                              '1\ta, b\tg\tt00001,t00002\tok\n'
+                                              'x\tc\tMU\t\t\n'
+                                              '3\td\tunknown\tt00003\n')
+        t = read_metadata_table(path)
+        self.assertEqual(len(t), 3)
+        np.testing.assert_array_equal(t['channel'], [1, np.nan, 3])
+        self.assertEqual(list(t['unit']), [['a', 'b'], ['c'], ['d']])
+        self.assertEqual(list(t['qualitycode']), ['Good', 'Multi-unit', 'unknown'])
+        self.assertEqual(list(t['goodtestdirs']), [['t00001', 't00002'], [], ['t00003']])
+        self.assertEqual(list(t['comment']), ['ok', '', ''])
+        self.assertEqual(list(t.column('missing', 'z')), ['z', 'z', 'z'])
+
+    def test_auto_and_int(self):
+        path = self._write('values.txt', 'v\tn\n1.8\t3\n007\t-2\n1_000\t0\nnan\t10\n.5e1\t7\n')
+        t = read_metadata_table(path, {'v': 'auto', 'n': 'int'})
+        self.assertEqual(list(t['v']), [1.8, '007', '1_000', 'nan', 5.0])
+        np.testing.assert_array_equal(t['n'], [3, -2, 0, 10, 7])
+        path = self._write('bad.txt', 'n\n1_000\n')
+        with self.assertRaises(ValueError):
+            read_metadata_table(path, {'n': 'int'})
+
+    def test_empty_file(self):
+        path = self._write('empty.txt', '')
+        self.assertEqual(len(read_metadata_table(path)), 0)
+        path = self._write('header.txt', 'testdir\ttypes\n')
+        t = read_metadata_table(path)
+        self.assertEqual(len(t), 0)
+        self.assertEqual(t.rows(), [])
+
+    @unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+    def test_readers(self):
+        from vhlib.CDM import read_unitquality, add_testdir_info, add_associate_variables
+        self._write('unitquality.txt', 'channel\tunit\tqualitycode\tgoodtestdirs\tcomment\n'
+                                       '2\ta,B,5\te\tt00001\tnice\n')
+        self._write('unitquality_channelshift.txt', '10\n')
+        cellinfo = read_unitquality(self.dirname)
+        self.assertEqual([(c['ref'], c['index']) for c in cellinfo], [(12.0, 401), (12.0, 402), (12.0, 5)])
+        self.assertEqual(cellinfo[0]['quality'], 'Excellent')
+        self.assertEqual(cellinfo[0]['goodtestdirs'], ['t00001'])
+
+        self._write('testdirinfo.txt', 'testdir\ttypes\nt00001\tDir, SF\nt00002\t\n')
+        assoc, _ = add_testdir_info(self.dirname)
+        self.assertEqual([(a['type'], a['data']) for a in assoc], [('Dir test', 't00001'), ('SF test', 't00001')])
+
+        self._write('associate_variables.txt', 'type\towner\tdata\tdesc\nAge\tme\t007\tage\n')
+        cells = add_associate_variables(self.dirname, [{'associates': []}])
+        self.assertEqual(cells[0]['associates'], [{'type': 'Age', 'owner': 'me', 'data': '007', 'desc': 'age'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
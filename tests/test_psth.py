@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from vhlib.md.general import psth
+
+
+def _naive_psth(spiketimes, onsets, window, binsize, stimids):
+    pre, post = window
+    edges = [pre]
+    while post - edges[-1] > 1e-9:
+        edges.append(min(pre + len(edges) * binsize, post))
+    edges = np.array(edges)
+    ustimids = np.unique(stimids)
+    counts = np.zeros((len(ustimids), len(edges) - 1), dtype=np.int64)
+    for onset, s in zip(onsets, stimids):
+        g = np.flatnonzero(ustimids == s)[0]
+        for t in spiketimes:
+            rel = t - onset
+            for k in range(len(edges) - 1):
+                if edges[k] <= rel < edges[k + 1]:
+                    counts[g, k] += 1
+    return edges, counts
+
+
+class TestPsth(unittest.TestCase):
+
+    def test_matches_naive_loop(self):
+        rng = np.random.default_rng(0)
+        spiketimes = np.sort(rng.uniform(0, 100, 3000))
+        onsets = np.sort(rng.uniform(1, 99, 40))
+        stimids = rng.integers(1, 4, len(onsets))
+        for window, binsize in (((-0.2, 0.5), 0.05), ((0, 0.25), 0.1), ((-0.1, 0.33), 0.02)):
+            with self.subTest(window=window, binsize=binsize):
+                out = psth(spiketimes, onsets, window, binsize, stimids)
+                edges, counts = _naive_psth(spiketimes, onsets, window, binsize, stimids)
+                np.testing.assert_allclose(out['bins'], edges, atol=1e-12)
+                np.testing.assert_array_equal(out['counts'], counts)
+                ntrials = np.array([np.sum(stimids == s) for s in out['stimids']])
+                np.testing.assert_array_equal(out['ntrials'], ntrials)
+                np.testing.assert_allclose(out['rate'], counts / (ntrials[:, None] * np.diff(edges)))
+
+    def test_partial_last_bin(self):
+        out = psth([0.21, 0.22, 0.24], [0], (0, 0.25), 0.1)
+        np.testing.assert_allclose(out['bins'], [0, 0.1, 0.2, 0.25])
+        np.testing.assert_array_equal(out['counts'], [[0, 0, 3]])
+        np.testing.assert_allclose(out['rate'], [[0, 0, 60]])
+        np.testing.assert_allclose(out['centers'], [0.05, 0.15, 0.225])
+
+    def test_window_multiple_of_binsize(self):
+        out = psth([0.55, 0.59], [0], (-0.1, 0.6), 0.1)
+        self.assertEqual(len(out['bins']), 8)
+        np.testing.assert_array_equal(out['counts'], [[0, 0, 0, 0, 0, 0, 2]])
+
+    def test_raster(self):
+        out = psth([0.5, 1.05, 1.2, 3.0], [1.0, 2.9], (-0.1, 0.3), 0.1)
+        np.testing.assert_array_equal(out['trialcounts'], [2, 1])
+        np.testing.assert_allclose(out['raster']['times'], [0.05, 0.2, 0.1])
+        np.testing.assert_array_equal(out['raster']['trial'], [0, 0, 1])
+        np.testing.assert_array_equal(out['raster']['offsets'], [0, 2, 3])
+
+    def test_bad_window(self):
+        with self.assertRaises(ValueError):
+            psth([0.1], [0], (0.5, 0.1), 0.1)
+        with self.assertRaises(ValueError):
+            psth([0.1], [0], (0, 0.5), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
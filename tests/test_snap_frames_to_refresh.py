@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _naive_snap(frames, refreshtimes):
+    snapped, index = [], []
+    for t in frames:
+        before = [j for j, r in enumerate(refreshtimes) if r <= t]
+        index.append(before[-1] if before else -1)
+        snapped.append(refreshtimes[before[-1]] if before else t)
+    return np.array(snapped), np.array(index)
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestSnapFramesToRefresh(unittest.TestCase):
+
+    def setUp(self):
+        from vhlib.StimDecode import snap_frames_to_refresh
+        self.snap = snap_frames_to_refresh
+        self.refresh = 1.0 + np.arange(600) / 120.0
+
+    def test_matches_naive_loop(self):
+        rng = np.random.default_rng(0)
+        frames = np.sort(np.concatenate([[0.5, 0.9], 1.0 + rng.uniform(0, 5, 200)]))
+        out = self.snap(frames, self.refresh)
+        snapped, index = _naive_snap(frames, self.refresh)
+        np.testing.assert_allclose(out['snapped'], snapped)
+        np.testing.assert_array_equal(out['refresh_index'], index)
+        np.testing.assert_array_equal(out['unmatched'], index < 0)
+        self.assertTrue(np.all(np.isnan(out['latency'][index < 0])))
+        np.testing.assert_allclose(out['latency'][index >= 0], (frames - snapped)[index >= 0])
+
+    def test_dropped_and_duplicated(self):
+        # two refreshes per frame; frame 3 is one refresh late, frame 5 repeats refresh of frame 4
+        k = np.array([0, 2, 4, 7, 9, 9, 11])
+        frames = [self.refresh[k[:4]] + 0.001, self.refresh[k[4:]] + 0.001]
+        out = self.snap(frames, self.refresh)
+        self.assertEqual(out['refreshes_per_frame'], 2)
+        np.testing.assert_array_equal(out['dropped'], [0, 0, 0, 1, 0, 0, 0])
+        np.testing.assert_array_equal(out['duplicated'], [0, 0, 0, 0, 0, 1, 0])
+        np.testing.assert_array_equal(out['offsets'], [0, 4, 7])
+        self.assertEqual(len(out['snapped']), 2)
+        np.testing.assert_allclose(out['snapped'][1], self.refresh[k[4:]])
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestWriteInterconnectSnap(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+
+    def _out(self):
+        return {
+            'StimCode': np.array([1, 2]),
+            'StimTrigger': np.array([0.95, 2.0]),
+            'FrameTrigger': [np.array([0.96, 1.0501, 1.1001]), np.array([2.0001, 2.0501])],
+            'StimulusMonitorVerticalRefresh': 1.0 + np.arange(300) / 20.0,
+        }
+
+    def test_unmatched_frames_keep_times(self):
+        from vhlib.StimDecode import write_interconnect_textfiles
+        out = self._out()
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            write_interconnect_textfiles(self.dirname, out, snap_to_refresh=True)
+        self.assertIn('before the first vertical refresh', stdout.getvalue())
+        np.testing.assert_allclose(out['FrameTrigger'][0], [0.96, 1.05, 1.1])
+        self.assertTrue(out['FrameRefreshCheck']['unmatched'][0])
+        with open(os.path.join(self.dirname, 'stimtimes.txt')) as f:
+            self.assertNotIn('nan', f.read().lower())
+
+    def test_missing_refresh_warns(self):
+        from vhlib.StimDecode import write_interconnect_textfiles
+        out = self._out()
+        del out['StimulusMonitorVerticalRefresh']
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            write_interconnect_textfiles(self.dirname, out, snap_to_refresh=True)
+        self.assertIn('StimulusMonitorVerticalRefresh', stdout.getvalue())
+        self.assertNotIn('FrameRefreshCheck', out)
+
+
+if __name__ == '__main__':
+    unittest.main()
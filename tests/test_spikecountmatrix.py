@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from vhlib.md.general import spikecountmatrix
+
+
+def _naive_counts(trains, edges):
+    return np.array([[np.count_nonzero((t >= a) & (t < b)) for a, b in zip(edges[:-1], edges[1:])]
+                     for t in trains], dtype=np.int64).reshape(len(trains), len(edges) - 1)
+
+
+def _dense(counts):
+    if isinstance(counts, np.ndarray):
+        return counts
+    out = np.zeros(counts['shape'], dtype=np.int64)
+    for i in range(counts['shape'][0]):
+        s = slice(counts['indptr'][i], counts['indptr'][i + 1])
+        out[i, counts['indices'][s]] = counts['data'][s]
+    return out
+
+
+class TestSpikeCountMatrix(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.trains = [rng.uniform(0, 50, n) for n in (500, 20, 0, 1000)]
+
+    def test_uniform_bins(self):
+        for t0, t1, binsize in ((0, 50, 1.0), (5, 45.3, 0.7), (0, 1.3, 0.1)):
+            for output in ('dense', 'sparse'):
+                for chunkbins in (None, 3):
+                    with self.subTest(bins=(t0, t1, binsize), output=output, chunkbins=chunkbins):
+                        counts, edges = spikecountmatrix(self.trains, bins=(t0, t1, binsize), output=output,
+                                                         chunkbins=chunkbins)
+                        self.assertEqual(edges[0], t0)
+                        self.assertEqual(edges[-1], t1)
+                        self.assertEqual(len(edges), int(np.ceil((t1 - t0) / binsize - 1e-9)) + 1)
+                        self.assertEqual(isinstance(counts, dict), output == 'sparse')
+                        np.testing.assert_array_equal(_dense(counts), _naive_counts(self.trains, edges))
+
+    def test_bin_edges(self):
+        edges = np.array([0, 0.5, 3, 3.1, 20, 49])
+        for chunkbins in (None, 2):
+            counts, out = spikecountmatrix(self.trains, bins=edges, output='dense', chunkbins=chunkbins)
+            np.testing.assert_array_equal(out, edges)
+            np.testing.assert_array_equal(counts, _naive_counts(self.trains, edges))
+
+    def test_windows(self):
+        starts = np.arange(0, 45, 3.0)
+        windows = np.column_stack([starts, starts + 1.5])
+        for output in ('dense', 'sparse'):
+            counts, out = spikecountmatrix(self.trains, windows=windows, output=output)
+            np.testing.assert_array_equal(out, windows)
+            expected = [[np.count_nonzero((t >= a) & (t < b)) for a, b in windows] for t in self.trains]
+            np.testing.assert_array_equal(_dense(counts), expected)
+
+    def test_auto_output(self):
+        counts, _ = spikecountmatrix(self.trains, bins=(0, 50, 1.0))
+        self.assertIsInstance(counts, np.ndarray)
+        counts, edges = spikecountmatrix(self.trains, bins=(0, 50, 0.001))
+        self.assertIsInstance(counts, dict)
+        nnz = [np.count_nonzero(r) for r in _naive_counts(self.trains, edges)]
+        np.testing.assert_array_equal(np.diff(counts['indptr']), nnz)
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            spikecountmatrix(self.trains)
+        with self.assertRaises(ValueError):
+            spikecountmatrix(self.trains, bins=(0, 1, 0.1), windows=[[0, 1]])
+        with self.assertRaises(ValueError):
+            spikecountmatrix(self.trains, bins=(0, 1, 0.1), output='csr')
+        with self.assertRaises(ValueError):
+            spikecountmatrix(self.trains, bins=(1, 1, 0.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
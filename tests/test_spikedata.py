@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from vhlib.md import SpikeData, findassociate, associate
+
+
+class TestSpikeData(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.times = rng.uniform(0, 100, 2000)
+        self.sd = SpikeData([[0, 50], [40, 100]], 'unit 1', 'u1', self.times)
+
+    def test_sorted(self):
+        np.testing.assert_array_equal(self.sd.spiketimes, np.sort(self.times))
+        self.assertTrue(self.sd.spiketimes.flags['C_CONTIGUOUS'])
+        self.assertEqual(len(self.sd), len(self.times))
+
+    def test_spikes_outside_intervals(self):
+        with self.assertRaises(ValueError):
+            SpikeData([[0, 1], [2, 3]], data=[0.5, 1.5])
+        with self.assertRaises(ValueError):
+            SpikeData([], data=[0.5])
+        self.assertEqual(len(SpikeData([[0, 1], [1, 2]], data=[0, 1, 2])), 3)
+
+    def test_windows_match_naive_counts(self):
+        starts = np.arange(0, 95, 2.5)
+        stops = starts + np.linspace(0.1, 5, len(starts))
+        counts = [np.count_nonzero((self.times >= a) & (self.times < b)) for a, b in zip(starts, stops)]
+        np.testing.assert_array_equal(self.sd.count_in_windows(starts, stops), counts)
+        lo, hi = self.sd.window_bounds(starts, stops)
+        for a, b, i, j in zip(starts, stops, lo, hi):
+            np.testing.assert_array_equal(self.sd.spiketimes[i:j], np.sort(self.times[(self.times >= a) & (self.times < b)]))
+        np.testing.assert_array_equal(self.sd.get_data(10, 20), np.sort(self.times[(self.times >= 10) & (self.times < 20)]))
+        np.testing.assert_array_equal(self.sd.get_data(), self.sd.spiketimes)
+
+    def test_bin(self):
+        for binsize, t1 in ((1.0, 100), (0.1, 1.3), (0.3, 0.9), (7.0, 100)):
+            with self.subTest(binsize=binsize, t1=t1):
+                counts, edges = self.sd.bin(binsize, 0, t1)
+                self.assertEqual(edges[0], 0)
+                self.assertEqual(edges[-1], t1)
+                self.assertTrue(np.all(np.diff(edges) > 0))
+                self.assertEqual(len(edges), int(np.ceil(t1 / binsize - 1e-9)) + 1)
+                expected = [np.count_nonzero((self.times >= a) & (self.times < b)) for a, b in zip(edges[:-1], edges[1:])]
+                np.testing.assert_array_equal(counts, expected)
+
+    def test_bin_round_off(self):
+        sd = SpikeData([[0, 3]], data=[1.05, 1.25, 1.29])
+        counts, edges = sd.bin(0.1, 1, 1.3)
+        np.testing.assert_allclose(edges, [1, 1.1, 1.2, 1.3])
+        np.testing.assert_array_equal(counts, [1, 0, 2])
+
+    def test_isi_stats(self):
+        sd = SpikeData([[0, 10]], data=[1.0, 1.5, 1.5005, 3.0])
+        np.testing.assert_allclose(sd.isi(), [0.5, 0.0005, 1.4995])
+        stats = sd.isi_stats(refractory=0.001)
+        self.assertEqual(stats['n'], 3)
+        self.assertAlmostEqual(stats['violations'], 1 / 3)
+        self.assertAlmostEqual(stats['mean'], 2.0 / 3)
+        self.assertTrue(np.isnan(SpikeData([[0, 1]], data=[0.5]).isi_stats()['mean']))
+
+    def test_associates(self):
+        associate(self.sd, 'Dir test', 'me', 't00001', 'desc')
+        A, _ = findassociate(self.sd, 'Dir test', '', '')
+        self.assertEqual(len(A), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
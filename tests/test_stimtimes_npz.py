@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+class TestStimtimesNpz(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        rng = np.random.default_rng(0)
+        n = 25
+        self.stimids = rng.integers(1, 256, n).astype(float)
+        self.stimtimes = np.sort(rng.uniform(0, 1000, n))
+        self.frametimes = [t + np.arange(rng.integers(0, 12)) / 60.0 for t in self.stimtimes]
+
+    def _assert_equal(self, value, stimids, stimtimes, frametimes, **kwargs):
+        np.testing.assert_allclose(value[0], stimids, **kwargs)
+        np.testing.assert_allclose(value[1], stimtimes, **kwargs)
+        self.assertEqual(len(value[2]), len(frametimes))
+        for x, y in zip(value[2], frametimes):
+            np.testing.assert_allclose(x, y, **kwargs)
+
+    def test_round_trip(self):
+        from vhlib.StimDecode import write_stimtimes_npz, read_stimtimes_npz
+        write_stimtimes_npz(self.dirname, self.stimids, self.stimtimes, self.frametimes)
+        value = read_stimtimes_npz(os.path.join(self.dirname, 'stimtimes.npz'))
+        # full precision
+        self._assert_equal(value, self.stimids, self.stimtimes, self.frametimes, rtol=0, atol=0)
+        with self.assertRaises(IOError):
+            write_stimtimes_npz(self.dirname, self.stimids, self.stimtimes, self.frametimes)
+
+    def test_no_frames(self):
+        from vhlib.StimDecode import write_stimtimes_npz, read_stimtimes_npz
+        write_stimtimes_npz(self.dirname, self.stimids, self.stimtimes, filename='stimontimes.npz')
+        value = read_stimtimes_npz(os.path.join(self.dirname, 'stimontimes.npz'))
+        self._assert_equal(value, self.stimids, self.stimtimes, [np.zeros(0)] * len(self.stimids))
+
+    def test_mismatched_lengths(self):
+        from vhlib.StimDecode import write_stimtimes_npz
+        with self.assertRaises(ValueError):
+            write_stimtimes_npz(self.dirname, self.stimids, self.stimtimes[:-1], self.frametimes)
+
+    def test_stale_binary(self):
+        from vhlib.StimDecode import write_stimtimes_npz, write_stimtimes_txt, read_stimtimes_txt
+        write_stimtimes_npz(self.dirname, self.stimids[:3], self.stimtimes[:3], self.frametimes[:3])
+        with self.assertRaises(IOError):
+            write_stimtimes_txt(self.dirname, self.stimids, self.stimtimes, self.frametimes, binary=True)
+        # the text file is not written next to the old binary file
+        self.assertFalse(os.path.isfile(os.path.join(self.dirname, 'stimtimes.txt')))
+        write_stimtimes_txt(self.dirname, self.stimids, self.stimtimes, self.frametimes)
+        value = read_stimtimes_txt(self.dirname, cache=False, use_binary=False)
+        self._assert_equal(value, self.stimids, self.stimtimes, self.frametimes, rtol=0, atol=1e-5)
+
+    def test_matches_text(self):
+        from vhlib.StimDecode import write_stimtimes_txt, read_stimtimes_txt, convert_stimtimes_txt
+        write_stimtimes_txt(self.dirname, self.stimids, self.stimtimes, self.frametimes, binary=True)
+        text = read_stimtimes_txt(self.dirname, cache=False, use_binary=False)
+        binary = read_stimtimes_txt(self.dirname, cache=False)
+        self._assert_equal(binary, self.stimids, self.stimtimes, self.frametimes, rtol=0, atol=0)
+        self._assert_equal(text, self.stimids, self.stimtimes, self.frametimes, rtol=0, atol=1e-5)
+
+        os.remove(os.path.join(self.dirname, 'stimtimes.npz'))
+        written = convert_stimtimes_txt(self.dirname)
+        self.assertEqual(written, [os.path.join(self.dirname, 'stimtimes.npz')])
+        self._assert_equal(read_stimtimes_txt(self.dirname, cache=False), *text, rtol=0, atol=0)
+        self.assertEqual(convert_stimtimes_txt(self.dirname), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
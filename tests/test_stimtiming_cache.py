@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+class TestStimTimingCache(unittest.TestCase):
+
+    def setUp(self):
+        from vhlib.StimDecode import StimTimingCache
+        self.StimTimingCache = StimTimingCache
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        self.path = os.path.join(self.dirname, 'stimtimes.txt')
+        self._write('1 0.5 0.5 0.6\n2 1.5 1.5 1.6 1.7\n', 1)
+        self.calls = 0
+
+    def _write(self, text, mtime):
+        with open(self.path, 'w') as f:
+            f.write(text)
+        os.utime(self.path, ns=(mtime * 10 ** 9, mtime * 10 ** 9))
+
+    def _loader(self):
+        self.calls += 1
+        from vhlib.StimDecode.read_stimtimes_txt import _parse_stimtimes_txt
+        return _parse_stimtimes_txt(self.path)
+
+    def _assert_same(self, a, b):
+        np.testing.assert_array_equal(a[0], b[0])
+        np.testing.assert_array_equal(a[1], b[1])
+        self.assertEqual(len(a[2]), len(b[2]))
+        for x, y in zip(a[2], b[2]):
+            np.testing.assert_array_equal(x, y)
+
+    def test_hit_and_invalidation(self):
+        cache = self.StimTimingCache(sidecar=False)
+        first = cache.get(self.path, 'stimtimes_txt', self._loader)
+        second = cache.get(self.path, 'stimtimes_txt', self._loader)
+        self.assertEqual(self.calls, 1)
+        self._assert_same(first, second)
+
+        self._write('1 0.5 0.5 0.6\n2 1.5 1.5 1.6 1.8\n', 2)
+        third = cache.get(self.path, 'stimtimes_txt', self._loader)
+        self.assertEqual(self.calls, 2)
+        np.testing.assert_array_equal(third[2][1], [1.5, 1.6, 1.8])
+
+        cache.invalidate(self.path)
+        cache.get(self.path, 'stimtimes_txt', self._loader)
+        self.assertEqual(self.calls, 3)
+
+    def test_returns_copies(self):
+        cache = self.StimTimingCache(sidecar=False)
+        value = cache.get(self.path, 'stimtimes_txt', self._loader)
+        value[0][:] = 99
+        value[2][0][:] = 99
+        again = cache.get(self.path, 'stimtimes_txt', self._loader)
+        np.testing.assert_array_equal(again[0], [1, 2])
+        np.testing.assert_array_equal(again[2][0], [0.5, 0.6])
+
+    def test_content_hash(self):
+        cache = self.StimTimingCache(sidecar=False, content_hash=True)
+        cache.get(self.path, 'stimtimes_txt', self._loader)
+        # same size and modification time, different contents
+        self._write('1 0.5 0.5 0.7\n2 1.5 1.5 1.6 1.7\n', 1)
+        value = cache.get(self.path, 'stimtimes_txt', self._loader)
+        self.assertEqual(self.calls, 2)
+        np.testing.assert_array_equal(value[2][0], [0.5, 0.7])
+
+    def test_sidecar(self):
+        from vhlib.StimDecode.stimtiming_cache import sidecar_filename
+        first = self.StimTimingCache(sidecar=True).get(self.path, 'stimtimes_txt', self._loader)
+        self.assertTrue(os.path.isfile(sidecar_filename(self.path)))
+        # a new cache (e.g., in another process) reads the sidecar
+        second = self.StimTimingCache(sidecar=True).get(self.path, 'stimtimes_txt', self._loader)
+        self.assertEqual(self.calls, 1)
+        self._assert_same(first, second)
+        # a stale sidecar is ignored
+        self._write('3 2.5\n', 2)
+        third = self.StimTimingCache(sidecar=True).get(self.path, 'stimtimes_txt', self._loader)
+        self.assertEqual(self.calls, 2)
+        np.testing.assert_array_equal(third[0], [3])
+        self.assertEqual(len(third[2]), 1)
+        self.assertEqual(len(third[2][0]), 0)
+
+    def test_default_writes_no_sidecar(self):
+        from vhlib.StimDecode import read_stimtimes_txt
+        from vhlib.StimDecode.stimtiming_cache import sidecar_filename
+        self.StimTimingCache().get(self.path, 'stimtimes_txt', self._loader)
+        read_stimtimes_txt(self.dirname, use_binary=False)
+        self.assertFalse(os.path.isfile(sidecar_filename(self.path)))
+        self.assertEqual(os.listdir(self.dirname), ['stimtimes.txt'])
+
+    def test_memory_bound(self):
+        cache = self.StimTimingCache(max_bytes=100, sidecar=False)
+        cache.get(self.path, 'a', lambda: np.zeros(10))
+        cache.get(self.path, 'b', lambda: np.zeros(10))
+        self.assertLessEqual(cache._nbytes, 100)
+        self.assertEqual(len(cache._entries), 1)
+        cache.get(self.path, 'c', lambda: np.zeros(1000))
+        self.assertNotIn((os.path.abspath(self.path), 'c'), cache._entries)
+
+    def test_read_stimtimes_txt(self):
+        from vhlib.StimDecode import read_stimtimes_txt
+        cache = self.StimTimingCache(sidecar=False)
+        uncached = read_stimtimes_txt(self.dirname, cache=False, use_binary=False)
+        cached = read_stimtimes_txt(self.dirname, cache=cache, use_binary=False)
+        self._assert_same(uncached, cached)
+        self._assert_same(uncached, read_stimtimes_txt(self.dirname, cache=cache, use_binary=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
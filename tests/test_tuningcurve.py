@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from vhlib.md.general import tuningcurve
+
+
+def _naive_tuningcurve(spiketimes, onsets, stimids, window, tf):
+    out = {}
+    for s in np.unique(stimids):
+        rates, f1s = [], []
+        for onset, sid in zip(onsets, stimids):
+            if sid != s:
+                continue
+            t0, t1 = onset + window[0], onset + window[1]
+            spikes = [t for t in spiketimes if t0 <= t < t1]
+            rates.append(len(spikes) / (t1 - t0))
+            phase = [2 * np.pi * tf * (t - t0) for t in spikes]
+            f1s.append(2 * abs(sum(np.exp(1j * p) for p in phase)) / (t1 - t0))
+        out[s] = (np.array(rates), np.array(f1s))
+    return out
+
+
+def _std(x):
+    return np.std(x, ddof=1) if len(x) > 1 else 0.0
+
+
+class TestTuningCurve(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.spiketimes = np.sort(rng.uniform(0, 200, 4000))
+        self.onsets = np.arange(1, 190, 3.0)
+        self.stimids = rng.integers(1, 7, len(self.onsets))
+        self.window = (0.1, 2.0)
+        self.tf = 4.0
+
+    def test_matches_naive_loop(self):
+        out = tuningcurve(self.spiketimes, self.onsets, self.stimids, self.window, tf=self.tf)
+        naive = _naive_tuningcurve(self.spiketimes, self.onsets, self.stimids, self.window, self.tf)
+        np.testing.assert_array_equal(out['stimids'], sorted(naive))
+        for i, s in enumerate(out['stimids']):
+            rates, f1s = naive[s]
+            self.assertEqual(out['ntrials'][i], len(rates))
+            np.testing.assert_allclose(out['mean'][i], rates.mean())
+            np.testing.assert_allclose(out['stddev'][i], _std(rates))
+            np.testing.assert_allclose(out['sem'][i], _std(rates) / np.sqrt(len(rates)))
+            np.testing.assert_allclose(out['trials'][i, :len(rates)], rates)
+            self.assertTrue(np.all(np.isnan(out['trials'][i, len(rates):])))
+            np.testing.assert_allclose(out['f1mean'][i], f1s.mean())
+            np.testing.assert_allclose(out['f1stddev'][i], _std(f1s))
+        np.testing.assert_allclose(out['curve'], np.vstack([out['stimids'], out['mean'], out['stddev'], out['sem']]))
+
+    def test_grouping(self):
+        out = tuningcurve(self.spiketimes, self.onsets, self.stimids, self.window)
+        for i, s in enumerate(out['stimids']):
+            members = out['order'][out['offsets'][i]:out['offsets'][i + 1]]
+            np.testing.assert_array_equal(members, np.flatnonzero(self.stimids == s))
+        self.assertNotIn('f1mean', out)
+
+    def test_per_presentation_windows(self):
+        windows = np.column_stack([np.zeros(len(self.onsets)), np.where(self.stimids > 3, 1.0, 2.0)])
+        out = tuningcurve(self.spiketimes, self.onsets, self.stimids, windows)
+        counts = [np.count_nonzero((self.spiketimes >= o) & (self.spiketimes < o + w))
+                  for o, w in zip(self.onsets, windows[:, 1])]
+        rates = np.array(counts) / windows[:, 1]
+        for i, s in enumerate(out['stimids']):
+            np.testing.assert_allclose(out['mean'][i], rates[self.stimids == s].mean())
+
+    def test_bad_windows(self):
+        with self.assertRaises(ValueError):
+            tuningcurve(self.spiketimes, self.onsets, self.stimids, (1.0, 0.5))
+        with self.assertRaises(ValueError):
+            tuningcurve(self.spiketimes, self.onsets, self.stimids[:-1], self.window)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+def _naive_frame_stim(frametimes, onsets, offsets):
+    out = []
+    for f in frametimes:
+        match = [i for i, (a, b) in enumerate(zip(onsets, offsets)) if a <= f < b]
+        out.append(match[0] if match else -1)
+    return np.array(out)
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestTwophotonStimFrames(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frametimes = np.arange(0, 100, 1 / 30.0)
+        self.onsets = np.sort(rng.uniform(2, 95, 20))
+        gaps = np.diff(np.append(self.onsets, 100))
+        self.offsets = self.onsets + gaps * rng.uniform(0, 1, len(gaps))
+        self.stimids = rng.integers(1, 9, len(self.onsets))
+
+    def test_matches_naive_loop(self):
+        from vhlib.StimDecode import twophoton_stim_frames
+        out = twophoton_stim_frames(self.frametimes, self.onsets, self.offsets, self.stimids)
+        frame_stim = _naive_frame_stim(self.frametimes, self.onsets, self.offsets)
+        np.testing.assert_array_equal(out['frame_stim'], frame_stim)
+        for i in range(len(self.onsets)):
+            frames = np.flatnonzero(frame_stim == i)
+            self.assertEqual(out['nframes'][i], len(frames))
+            if len(frames):
+                self.assertEqual(out['first'][i], frames[0])
+                self.assertEqual(out['stop'][i], frames[-1] + 1)
+            else:
+                self.assertEqual(out['first'][i], out['stop'][i])
+        expected = np.where(frame_stim >= 0, self.stimids[np.maximum(frame_stim, 0)], np.nan)
+        np.testing.assert_array_equal(out['frame_stimid'], expected)
+
+    def test_default_offsets(self):
+        from vhlib.StimDecode import twophoton_stim_frames
+        out = twophoton_stim_frames(self.frametimes, self.onsets)
+        offsets = np.append(self.onsets[1:], np.inf)
+        np.testing.assert_array_equal(out['frame_stim'], _naive_frame_stim(self.frametimes, self.onsets, offsets))
+        self.assertEqual(out['stop'][-1], len(self.frametimes))
+        self.assertNotIn('frame_stimid', out)
+
+    def test_bad_arguments(self):
+        from vhlib.StimDecode import twophoton_stim_frames
+        with self.assertRaises(ValueError):
+            twophoton_stim_frames(self.frametimes, self.onsets, self.offsets[:-1])
+        with self.assertRaises(ValueError):
+            twophoton_stim_frames(self.frametimes, self.onsets, self.onsets - 1)
+        with self.assertRaises(ValueError):
+            twophoton_stim_frames(self.frametimes, self.onsets, self.offsets, self.stimids[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+try:
+    import vlt
+except ImportError:
+    vlt = None
+
+
+@unittest.skipIf(vlt is None, "vlt (vhlab-toolbox-python) is not installed")
+class TestVhlabCorrectMti(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirname)
+        rng = np.random.default_rng(0)
+        n = 12
+        # recording time = offset + drift * stimulus computer time
+        self.offset, self.drift = -1000.0, 1.0001
+        self.stimids = rng.integers(1, 300, n)
+        onsets = 1000 + np.cumsum(rng.uniform(2, 4, n))
+        self.mti = []
+        for sid, t in zip(self.stimids, onsets):
+            frames = t + np.arange(int(rng.integers(0, 20))) / 60.0
+            self.mti.append({'stimid': sid, 'startStopTimes': np.array([t - 0.5, t, t + 1, t + 1.5]),
+                             'frameTimes': frames, 'extra': 'kept'})
+        self.filename = os.path.join(self.dirname, 'stimtimes.txt')
+
+    def _write(self, frames_dropped=0):
+        from vhlib.StimDecode import write_stimtimes_txt
+        stimtimes = [self.offset + self.drift * m['startStopTimes'][1] for m in self.mti]
+        frametimes = [self.offset + self.drift * m['frameTimes'][:max(len(m['frameTimes']) - frames_dropped, 0)]
+                      for m in self.mti]
+        # the acquisition system records the low 8 bits of the id
+        write_stimtimes_txt(self.dirname, np.mod(self.stimids, 256), stimtimes, frametimes, binary=True)
+
+    def _check(self, mti2, starttime, shift):
+        self.assertAlmostEqual(starttime, -self.offset / self.drift, places=6)
+        for m, m2 in zip(self.mti, mti2):
+            np.testing.assert_allclose(m2['startStopTimes'], self.offset + self.drift * m['startStopTimes'] + shift,
+                                       rtol=0, atol=1e-7)
+            np.testing.assert_allclose(m2['frameTimes'], self.offset + self.drift * m['frameTimes'] + shift,
+                                       rtol=0, atol=1e-7)
+            self.assertEqual(m2['extra'], 'kept')
+            self.assertEqual(len(m2['frameTimes']), len(m['frameTimes']))
+
+    def test_recovers_clock(self):
+        from vhlib.StimDecode import vhlabcorrectmti
+        self._write()
+        mti2, starttime = vhlabcorrectmti(self.mti, self.filename)
+        self._check(mti2, starttime, 0.0)
+        mti2, starttime = vhlabcorrectmti(self.mti, self.filename, globaltime=1)
+        self._check(mti2, starttime, -self.offset / self.drift)
+        # the input is not modified
+        self.assertEqual(self.mti[0]['startStopTimes'][1] - self.mti[0]['startStopTimes'][0], 0.5)
+
+    def test_missing_recorded_frames(self):
+        from vhlib.StimDecode import vhlabcorrectmti
+        self._write(frames_dropped=3)
+        mti2, starttime = vhlabcorrectmti(self.mti, self.filename)
+        self._check(mti2, starttime, 0.0)
+
+    def test_mismatch(self):
+        from vhlib.StimDecode import vhlabcorrectmti
+        self._write()
+        with self.assertRaises(ValueError):
+            vhlabcorrectmti(self.mti[:-1], self.filename)
+        self.mti[3]['stimid'] += 1
+        with self.assertRaises(ValueError):
+            vhlabcorrectmti(self.mti, self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from vhlib.CDM import was_recorded, was_recorded_matrix
+
+
+def _random_cell(rng):
+    names = [f't{k:05d}' for k in range(1, 12)] + ['T00004', 'x', '']
+    associates = []
+    for typ in rng.choice(['Dir', 'SF', 'TF'], int(rng.integers(0, 4))):
+        associates.append({'type': f'{typ} test', 'owner': '', 'data': str(rng.choice(names)), 'desc': ''})
+    kind = int(rng.integers(0, 4))
+    if kind > 0:
+        items = [{'clusterinfo': {}} for _ in range(int(rng.integers(1, 4)))]
+        for item in items:
+            if kind > 1:
+                item['clusterinfo']['EpochStart'] = str(rng.choice(names[:12]))
+                item['clusterinfo']['EpochStop'] = str(rng.choice(names[:13]))
+            if rng.random() < 0.5:
+                item['clusterinfo']['number'] = 1
+        data = items if kind > 2 or len(items) > 1 else items[0]
+        associates.append({'type': 'vhlv_loadcelldata', 'owner': '', 'data': data, 'desc': ''})
+    rng.shuffle(associates)
+    return {'associates': associates}
+
+
+class TestWasRecordedMatrix(unittest.TestCase):
+
+    def test_matches_was_recorded(self):
+        rng = np.random.default_rng(0)
+        cells = [_random_cell(rng) for _ in range(500)]
+        for testdirs in ([f't{k:05d}' for k in range(1, 12)],
+                         ['t00001', 'Dir', 't00007', 'SF', 'T00004', 'Contrast', 'TF']):
+            with self.subTest(testdirs=testdirs):
+                out = was_recorded_matrix(cells, testdirs)
+                self.assertEqual(out.shape, (len(cells), len(testdirs)))
+                self.assertEqual(out.dtype, bool)
+                expected = [[bool(was_recorded(c, t)) for t in testdirs] for c in cells]
+                np.testing.assert_array_equal(out, expected)
+                # the random cells cover both answers
+                self.assertTrue(out.any() and not out.all())
+
+    def test_empty(self):
+        self.assertEqual(was_recorded_matrix([], ['t00001']).shape, (0, 1))
+        np.testing.assert_array_equal(was_recorded_matrix([{'associates': []}], []), np.ones((1, 0), dtype=bool))
+
+
+if __name__ == '__main__':
+    unittest.main()
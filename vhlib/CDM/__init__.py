@@ -12,8 +12,15 @@ from .add_testdir_info import add_testdir_info
 from .help_files import unitquality_channelshift, testdirinfo
 from .findtestdirinfo import findtestdirinfo
 from .remove_associate import remove_associate
-from .extractstimdirectorytimes import extractstimdirectorytimes
+from .extractstimdirectorytimes import extractstimdirectorytimes, extractstimdirectorytimes_all
 from .filter_by_index import filter_by_index
 from .filter_by_reference import filter_by_reference
 from .filter_by_quality import filter_by_quality
 from .repeated_measurement_associates import repeated_measurement_associates
+from .cellname_index import CellNameIndex
+from .cellquery import CellQuery
+from .experiment_context import ExperimentContext
+from .was_recorded_matrix import was_recorded_matrix
+from .cdm_pipeline import run_cdm_pipeline, run_cdm_experiment
+from .cdm_manifest import experiment_fingerprints, plan_cdm_stages
+from .metadata_table import read_metadata_table, MetadataTable
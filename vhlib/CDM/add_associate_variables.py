@@ -1,25 +1,20 @@
 import os
+from .experiment_context import context_load, context_inventory
+from .metadata_table import read_metadata_table
 
-def add_associate_variables(ds, cells=None):
+def add_associate_variables(ds, cells=None, inventory=None):
     """
     Add associates from the file 'associate_variables.txt' to all cells in an experiment
 
-    :param ds: vlt.file.dirstruct object
+    :param ds: vlt.file.dirstruct object or ExperimentContext (which caches the parsed file)
     :param cells: list of cell objects (optional). If provided, modifications are returned.
                   If not provided, it would load cells, modify and save back.
+    :param inventory: optional ExperimentInventory used to answer existence checks
     :return: list of modified cells
     """
 
     from vhlib.md import associate_all, findassociate, disassociate
-    try:
-        from vlt.file.custom_struct_io import loadStructArray
-    except ImportError:
-         raise NotImplementedError("vlt.file.custom_struct_io.loadStructArray missing")
-
-    try:
-        from vlt.file.load2celllist import load2celllist
-    except ImportError:
-         raise NotImplementedError("vlt.file.load2celllist missing")
+    from vhlib.StimDecode.experiment_inventory import inventory_isfile
 
     try:
         pathname = ds.getpathname()
@@ -29,17 +24,23 @@ def add_associate_variables(ds, cells=None):
         else:
              raise ValueError("ds must have getpathname method or be a string path")
 
+    inventory = context_inventory(ds, inventory)
     filename = os.path.join(pathname, 'associate_variables.txt')
 
-    if not os.path.isfile(filename):
+    if not inventory_isfile(inventory, filename):
          raise FileNotFoundError(f"Could not find the file 'associate_variables.txt' in the directory {pathname}.")
 
-    assoclist = loadStructArray(filename)
+    assoclist = context_load(ds, filename, read_metadata_table).rows()
 
     saving_needed = False
     cellnames = []
 
     if cells is None:
+        try:
+            from vlt.file.load2celllist import load2celllist
+        except ImportError:
+             raise NotImplementedError("vlt.file.load2celllist missing")
+
         if hasattr(ds, 'getexperimentfile'):
             exp_file, _ = ds.getexperimentfile()
         else:
@@ -1,21 +1,23 @@
 import os
 from .cellname2nameref import cellname2nameref
+from .experiment_context import context_load
+from .cellname_index import CellNameIndex
+from .metadata_table import read_metadata_table
 
 def add_testdir_info(ds, cells=None, cellnames=None):
     """
     Add test directory info as associates to cells
 
-    :param ds: vlt.file.dirstruct object
+    :param ds: vlt.file.dirstruct object or ExperimentContext (which reads 'testdirinfo.txt'
+               once and keeps it until the file changes)
     :param cells: list of cell objects
-    :param cellnames: list of cell names (optional, but needed for filtering by recording)
+    :param cellnames: list of cell names or CellNameIndex (optional, but needed for filtering
+                      by recording); cells are grouped by name/ref, so ds.gettests is called
+                      once for each name/ref pair
     :return: tuple (assoc, cells)
     """
 
-    from vhlib.md import associate_all, associate
-    try:
-        from vlt.file.custom_struct_io import loadStructArray
-    except ImportError:
-         raise NotImplementedError("vlt.file.custom_struct_io.loadStructArray missing")
+    from vhlib.md import associate_all
 
     try:
         pathname = ds.getpathname()
@@ -26,17 +28,52 @@ def add_testdir_info(ds, cells=None, cellnames=None):
             raise ValueError("ds must have getpathname method or be a string path")
 
     testdirinfo_file = os.path.join(pathname, 'testdirinfo.txt')
-    testdirinfo = loadStructArray(testdirinfo_file)
+    assoc = [dict(a) for a in context_load(ds, testdirinfo_file, read_testdir_associates)]
 
-    assoc = []
+    if cells is not None:
+        if cellnames is None:
+             cells = associate_all(cells, assoc)
+        else:
+             groups = {}
+             if isinstance(cellnames, CellNameIndex):
+                 names = cellnames.names()
+                 for i, (name, ref) in enumerate(zip(names, cellnames.ref)):
+                     groups.setdefault((name, int(ref)), []).append(i)
+             else:
+                 for i in range(len(cells)):
+                     nameref, _, _ = cellname2nameref(cellnames[i])
+                     groups.setdefault((nameref['name'], nameref['ref']), []).append(i)
+
+             if groups and not hasattr(ds, 'gettests'):
+                 raise NotImplementedError("ds.gettests method is missing")
+
+             for (name, ref), I in groups.items():
+                t = set(ds.gettests(name, ref))
+                matched = [a for a in assoc if a['data'] in t]
+                if matched:
+                    group = associate_all([cells[i] for i in I], matched)
+                    for i, c in zip(I, group):
+                        cells[i] = c
+
+    return assoc, cells
+
+
+def read_testdir_associates(filename):
+    """
+    Read a 'testdirinfo.txt' file into a list of test directory associates
+
+    :param filename: full path of the file
+    :return: list of associate dictionaries ('<type> test', with the test directory as data)
+    """
 
-    for info in testdirinfo:
-        types_str = info.get('types', '')
-        types = [x.strip() for x in types_str.split(',') if x.strip()]
+    testdirinfo = read_metadata_table(filename)
+    types = testdirinfo.column('types', [])
+    testdirs = testdirinfo.column('testdir', '')
 
-        td = info.get('testdir', '')
+    assoc = []
 
-        for t in types:
+    for td, ts in zip(testdirs, types):
+        for t in ts:
             a = {
                 'type': f"{t} test",
                 'owner': 'add_testdir_info',
@@ -45,20 +82,4 @@ def add_testdir_info(ds, cells=None, cellnames=None):
             }
             assoc.append(a)
 
-    if cells is not None:
-        if cellnames is None:
-             cells = associate_all(cells, assoc)
-        else:
-             for i in range(len(cells)):
-                nameref, _, _ = cellname2nameref(cellnames[i])
-
-                if hasattr(ds, 'gettests'):
-                    t = ds.gettests(nameref['name'], nameref['ref'])
-                else:
-                    raise NotImplementedError("ds.gettests method is missing")
-
-                for a in assoc:
-                    if a['data'] in t:
-                        cells[i] = associate(cells[i], a)
-
-    return assoc, cells
+    return assoc
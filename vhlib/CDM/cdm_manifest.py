@@ -0,0 +1,174 @@
+import os
+import json
+import fnmatch
+import hashlib
+
+MANIFEST_VERSION = 1
+
+# version of each built-in stage; increase it when a stage's output changes, so that
+# incremental rebuilds rerun it
+CDM_STAGE_VERSIONS = {
+    'load': 1,
+    'read_unitquality': 1,
+    'filter_by_quality': 1,
+    'add_testdir_info': 1,
+    'read_trainingtype': 1,
+    'add_associate_variables': 1,
+    'extractstimdirectorytimes': 1,
+    'save': 1,
+}
+
+# input files of each stage, as patterns relative to the experiment directory;
+# EXPERIMENT_FILE stands for the experiment file (ds.getexperimentfile())
+EXPERIMENT_FILE = '<experiment file>'
+CDM_STAGE_INPUTS = {
+    'load': (EXPERIMENT_FILE,),
+    'read_unitquality': ('unitquality.txt', 'unitquality_channelshift.txt'),
+    'add_testdir_info': ('testdirinfo.txt',),
+    'read_trainingtype': ('training*.txt',),
+    'add_associate_variables': ('associate_variables.txt',),
+    'extractstimdirectorytimes': ('*/filetime.txt', '*/stims.mat', '*/spike2data.smr', '*/stimtimes*.txt'),
+}
+
+# stages that need the output of another stage of the same run
+CDM_STAGE_REQUIRES = {
+    'filter_by_quality': ('read_unitquality',),
+}
+
+# stages that load and save the cells; they run whenever any stage runs ('load' then
+# loads the cells saved by the earlier run)
+CDM_IO_STAGES = ('load', 'save')
+
+# stages that must run whenever any stage runs: the experiment file also holds the cells
+# that filter_by_quality leaves out, and filter_by_quality removes the ' test'
+# associates of the cells it keeps that are not in their good test directories
+CDM_ALWAYS_STAGES = ('filter_by_quality',)
+
+
+def experiment_fingerprints(ds, previous=None):
+    """
+    Fingerprint the input files of the CDM stages for one experiment
+
+    :param ds: ExperimentContext (or dirstruct) of the experiment; its inventory, if any,
+               is used to list the files
+    :param previous: optional fingerprints from an earlier run; the content hash of a file
+                     whose size and modification time are unchanged is taken from there
+                     instead of being computed again
+    :return: dictionary of file (relative to the experiment directory, or EXPERIMENT_FILE)
+             -> [size, mtime_ns, hash]
+    """
+    from vhlib.StimDecode.experiment_inventory import ExperimentInventory
+
+    previous = previous or {}
+    root = ds.getpathname()
+    inventory = getattr(ds, 'inventory', None)
+    if inventory is None:
+        inventory = ExperimentInventory(root)
+
+    patterns = [p for stage in CDM_STAGE_INPUTS.values() for p in stage if p != EXPERIMENT_FILE]
+    paths = {}
+    for dirname, files in inventory.dirs.items():
+        rel = os.path.relpath(dirname, inventory.root)
+        for name, stat in files.items():
+            relname = name if rel == '.' else rel.replace(os.sep, '/') + '/' + name
+            if any(fnmatch.fnmatchcase(relname, p) for p in patterns):
+                paths[relname] = (os.path.join(dirname, name), stat)
+
+    if hasattr(ds, 'getexperimentfile'):
+        exp_file, _ = ds.getexperimentfile()
+        if os.path.isfile(exp_file):
+            st = os.stat(exp_file)
+            paths[EXPERIMENT_FILE] = (exp_file, (st.st_size, st.st_mtime_ns))
+
+    fingerprints = {}
+    for relname, (path, stat) in paths.items():
+        old = previous.get(relname)
+        if old is not None and old[0] == stat[0] and old[1] == stat[1]:
+            fingerprints[relname] = list(old)
+        else:
+            fingerprints[relname] = [stat[0], stat[1], _hash_file(path)]
+    return fingerprints
+
+
+def plan_cdm_stages(stages, fingerprints, entry):
+    """
+    Decide which stages must run for an experiment
+
+    A stage is affected if it is new or its version changed since the run recorded in
+    ENTRY, or if the content of one of its input files changed (files whose modification
+    time changed but whose content hash did not are not changes). If any stage is
+    affected, the stages in CDM_ALWAYS_STAGES are affected too. Each stage works on the
+    cells left by the stages before it, so all stages from the first affected stage
+    onward are run, along with the stages they require (CDM_STAGE_REQUIRES) and the
+    stages that load and save the cells (CDM_IO_STAGES); 'load' then loads the cells
+    saved by the earlier run. The result is the same as that of running all stages. If
+    the inputs of 'load' changed, there is no earlier run, or there is no 'load' stage
+    to recover the cells of the earlier run, all stages run.
+
+    :param stages: list of (name, version) tuples, in order
+    :param fingerprints: current fingerprints from EXPERIMENT_FINGERPRINTS
+    :param entry: manifest entry of the earlier run ({'inputs':..., 'stages':...}) or None
+    :return: list of the names of the stages to run, in order (empty if none)
+    """
+    names = [name for name, _ in stages]
+    if not entry:
+        return names
+    old_stages = entry.get('stages', {})
+    old_inputs = entry.get('inputs', {})
+
+    changed = {f for f in set(fingerprints) | set(old_inputs)
+               if f not in fingerprints or f not in old_inputs or fingerprints[f][2] != old_inputs[f][2]}
+
+    affected = set()
+    for name, version in stages:
+        if old_stages.get(name) != version:
+            affected.add(name)
+        patterns = CDM_STAGE_INPUTS.get(name, ())
+        if any(fnmatch.fnmatchcase(f, p) for f in changed for p in patterns):
+            affected.add(name)
+
+    if not affected:
+        return []
+    if 'load' in affected or 'load' not in names:
+        return names
+    affected.update(CDM_ALWAYS_STAGES)
+
+    first = min((i for i, name in enumerate(names) if name in affected and name not in CDM_IO_STAGES),
+                default=len(names))
+    torun = set(names[first:]) | set(CDM_IO_STAGES)
+    for name in names[first:]:
+        torun.update(CDM_STAGE_REQUIRES.get(name, ()))
+    return [name for name in names if name in torun]
+
+
+def load_manifest(filename):
+    """
+    Read a CDM rebuild manifest (an empty manifest if FILENAME does not exist)
+
+    :return: dictionary of experiment directory -> entry
+    """
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('experiments', {})
+
+
+def save_manifest(filename, experiments):
+    """
+    Write a CDM rebuild manifest, replacing FILENAME in one step
+    """
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'experiments': experiments}, f, indent=1, sort_keys=True)
+    os.replace(tmp, filename)
+
+
+def _hash_file(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,261 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from .cdm_manifest import CDM_STAGE_VERSIONS, experiment_fingerprints, plan_cdm_stages, load_manifest, save_manifest
+
+DEFAULT_STAGES = ('load', 'read_unitquality', 'filter_by_quality', 'add_testdir_info', 'read_trainingtype',
+                  'add_associate_variables', 'extractstimdirectorytimes', 'save')
+
+
+def run_cdm_pipeline(experiments, stages=DEFAULT_STAGES, processes=None, options=None, verbose=True, manifest=None):
+    """
+    Run the cell database (CDM) processing stages on many experiments
+
+    Each experiment is processed by RUN_CDM_EXPERIMENT in its own worker of a process
+    pool. An error in one experiment stops only that experiment; it is recorded in the
+    experiment's result, and the other experiments continue.
+
+    If MANIFEST is given, the rebuild is incremental: the fingerprints of each
+    experiment's input files and the versions of the stages applied are recorded in the
+    manifest file, and on the next run an experiment is skipped if nothing changed, or
+    the stages from the first one affected by the changes onward are run (see
+    PLAN_CDM_STAGES).
+
+    :param experiments: list of experiment directory paths
+    :param stages: list of stages; each is the name of a stage in CDM_STAGES or a tuple
+                   (name, function) or (name, function, version), where
+                   FUNCTION(STATE, **OPTIONS) is a module-level function that updates the
+                   STATE dictionary (see RUN_CDM_EXPERIMENT)
+    :param processes: number of worker processes (default: the number of CPUs; 1 runs
+                      the experiments in this process)
+    :param options: dictionary of stage name -> dictionary of options for that stage,
+                    e.g. {'extractstimdirectorytimes': {'ErrorIfEmpty': False}}
+    :param verbose: if True, print a line per experiment and a summary
+    :param manifest: optional path of the manifest file for incremental rebuilds
+    :return: summary dictionary with fields
+             results: list of the results of RUN_CDM_EXPERIMENT, in the order of EXPERIMENTS
+             succeeded: experiments that completed all stages
+             failed: experiments that stopped with an error
+             skipped: experiments that were up to date (with MANIFEST only)
+             stage_time: total time (s) spent in each stage, across experiments
+             elapsed: wall-clock time (s) of the whole run
+    """
+
+    t0 = time.perf_counter()
+    stages = list(stages)
+    options = options or {}
+    n = len(experiments)
+    results = [None] * n
+
+    incremental = manifest is not None
+    entries = load_manifest(manifest) if incremental else {}
+    keys = [os.path.abspath(e) for e in experiments]
+    jobs = [(e, stages, options, entries.get(k), incremental) for e, k in zip(experiments, keys)]
+
+    if processes == 1 or n <= 1:
+        for i, job in enumerate(jobs):
+            results[i] = run_cdm_experiment(*job)
+            _report(results[i], verbose)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(run_cdm_experiment, *job): i for i, job in enumerate(jobs)}
+            for f, i in futures.items():
+                try:
+                    results[i] = f.result()
+                except Exception as err:
+                    # the worker itself failed (e.g., it was killed)
+                    results[i] = {'experiment': experiments[i], 'ok': False, 'skipped': False, 'failed_stage': None,
+                                  'error': repr(err), 'traceback': '', 'timing': {}, 'ncells': 0,
+                                  'stages_run': [], 'manifest_entry': None}
+                _report(results[i], verbose)
+
+    if incremental:
+        for k, r in zip(keys, results):
+            if r['ok'] and r['manifest_entry'] is not None:
+                entries[k] = r['manifest_entry']
+        save_manifest(manifest, entries)
+
+    stage_time = {}
+    for r in results:
+        for s, t in r['timing'].items():
+            stage_time[s] = stage_time.get(s, 0.0) + t
+
+    summary = {
+        'results': results,
+        'succeeded': [r['experiment'] for r in results if r['ok'] and not r['skipped']],
+        'failed': [r['experiment'] for r in results if not r['ok']],
+        'skipped': [r['experiment'] for r in results if r['skipped']],
+        'stage_time': stage_time,
+        'elapsed': time.perf_counter() - t0,
+    }
+
+    if verbose:
+        print(f"{len(summary['succeeded'])} of {n} experiments processed in {summary['elapsed']:.1f} s; "
+              f"{len(summary['skipped'])} up to date, {len(summary['failed'])} failed.")
+        for s, t in stage_time.items():
+            print(f"  {s}: {t:.2f} s")
+
+    return summary
+
+
+def run_cdm_experiment(experiment, stages=DEFAULT_STAGES, options=None, manifest_entry=None, incremental=False):
+    """
+    Run the cell database (CDM) processing stages on one experiment
+
+    The stages share a STATE dictionary with fields
+        experiment: the experiment directory
+        ds: ExperimentContext of the experiment
+        cells, cellnames: the cells and their names (set by the 'load' stage)
+        cellinfo: unit quality information (set by the 'read_unitquality' stage)
+    Errors are caught and recorded, so that a failing experiment does not stop others.
+
+    :param experiment: experiment directory path
+    :param stages: list of stage names or (name, function[, version]) tuples (see RUN_CDM_PIPELINE)
+    :param options: dictionary of stage name -> dictionary of options for that stage
+    :param manifest_entry: the experiment's entry in the rebuild manifest, if any
+    :param incremental: if True, run only the stages that PLAN_CDM_STAGES selects given
+                        MANIFEST_ENTRY, and return the new entry
+    :return: dictionary with fields experiment, ok (bool), skipped (bool, True if nothing
+             needed to run), failed_stage, error, traceback, timing (stage name -> seconds,
+             for the stages that ran), ncells, stages_run, and manifest_entry (the new
+             manifest entry if INCREMENTAL, else None)
+    """
+
+    options = options or {}
+    result = {'experiment': experiment, 'ok': True, 'skipped': False, 'failed_stage': None, 'error': '',
+              'traceback': '', 'timing': {}, 'ncells': 0, 'stages_run': [], 'manifest_entry': None}
+    state = {'experiment': experiment}
+    name = None
+
+    try:
+        stages = [_stage_function(stage) for stage in stages]
+        ds = _open_experiment(experiment)
+        state['ds'] = ds
+        torun = [s[0] for s in stages]
+        if incremental:
+            previous = (manifest_entry or {}).get('inputs')
+            fingerprints = experiment_fingerprints(ds, previous)
+            torun = plan_cdm_stages([(s[0], s[2]) for s in stages], fingerprints, manifest_entry)
+            if not torun:
+                result['skipped'] = True
+                return result
+
+        for name, func, _ in stages:
+            if name not in torun:
+                continue
+            t = time.perf_counter()
+            func(state, **options.get(name, {}))
+            result['timing'][name] = time.perf_counter() - t
+            result['stages_run'].append(name)
+        name = None
+
+        if incremental:
+            # the stages may have written the experiment file
+            result['manifest_entry'] = {
+                'inputs': experiment_fingerprints(ds, fingerprints),
+                'stages': {s[0]: s[2] for s in stages},
+            }
+    except Exception as err:
+        result['ok'] = False
+        result['failed_stage'] = name
+        result['error'] = f"{type(err).__name__}: {err}"
+        result['traceback'] = traceback.format_exc()
+
+    result['ncells'] = len(state.get('cells', []))
+    return result
+
+
+def _open_experiment(experiment):
+    from vhlib.StimDecode.experiment_inventory import ExperimentInventory
+    from .experiment_context import ExperimentContext
+    try:
+        from vlt.file.dirstruct import dirstruct
+    except ImportError:
+         raise NotImplementedError("vlt.file.dirstruct missing")
+
+    return ExperimentContext(dirstruct(experiment), inventory=ExperimentInventory(experiment))
+
+
+def _stage_function(stage):
+    # (name, function, version) of a stage
+    if isinstance(stage, str):
+        if stage not in CDM_STAGES:
+            raise ValueError(f"Unknown stage {stage}; known stages are {', '.join(CDM_STAGES)}.")
+        return stage, CDM_STAGES[stage], CDM_STAGE_VERSIONS[stage]
+    if len(stage) == 2:
+        return stage[0], stage[1], 1
+    return tuple(stage)
+
+
+def _report(result, verbose):
+    if not verbose:
+        return
+    if result['skipped']:
+        print(f"{result['experiment']}: up to date")
+    elif result['ok']:
+        print(f"{result['experiment']}: {result['ncells']} cells, {sum(result['timing'].values()):.2f} s")
+    else:
+        print(f"Warning: {result['experiment']} failed in stage {result['failed_stage']}: {result['error']}")
+
+
+def _stage_load(state):
+    try:
+        from vlt.file.load2celllist import load2celllist
+    except ImportError:
+         raise NotImplementedError("vlt.file.load2celllist missing")
+    exp_file, _ = state['ds'].getexperimentfile()
+    state['cells'], state['cellnames'] = load2celllist(exp_file, 'cell*', '-mat')
+
+
+def _stage_read_unitquality(state):
+    from .read_unitquality import read_unitquality
+    state['cellinfo'] = read_unitquality(state['ds'])
+
+
+def _stage_filter_by_quality(state):
+    from .filter_by_quality import filter_by_quality
+    state['cells'], state['cellnames'], _ = filter_by_quality(state['ds'], state['cells'], state['cellnames'],
+                                                              state['cellinfo'])
+
+
+def _stage_add_testdir_info(state):
+    from .add_testdir_info import add_testdir_info
+    _, state['cells'] = add_testdir_info(state['ds'], state['cells'], state['cellnames'])
+
+
+def _stage_read_trainingtype(state, **kwargs):
+    from vhlib.md import associate_all
+    from .read_trainingtype import read_trainingtype
+    assoc = read_trainingtype(state['ds'], **kwargs)
+    if assoc:
+        state['cells'] = associate_all(state['cells'], assoc)
+
+
+def _stage_add_associate_variables(state):
+    from .add_associate_variables import add_associate_variables
+    ds = state['ds']
+    # the file is optional for an experiment
+    if os.path.isfile(os.path.join(ds.getpathname(), 'associate_variables.txt')):
+        state['cells'] = add_associate_variables(ds, state['cells'])
+
+
+def _stage_extractstimdirectorytimes(state, **kwargs):
+    from .extractstimdirectorytimes import extractstimdirectorytimes_all
+    state['cells'], _ = extractstimdirectorytimes_all(state['ds'], state['cells'], **kwargs)
+
+
+def _stage_save(state):
+    state['ds'].saveexpvar(state['cells'], list(state['cellnames']), 0)
+
+
+CDM_STAGES = {
+    'load': _stage_load,
+    'read_unitquality': _stage_read_unitquality,
+    'filter_by_quality': _stage_filter_by_quality,
+    'add_testdir_info': _stage_add_testdir_info,
+    'read_trainingtype': _stage_read_trainingtype,
+    'add_associate_variables': _stage_add_associate_variables,
+    'extractstimdirectorytimes': _stage_extractstimdirectorytimes,
+    'save': _stage_save,
+}
@@ -0,0 +1,215 @@
+import numpy as np
+
+CELLNAME_DTYPE = np.dtype([('name', np.int32), ('ref', np.int64), ('index', np.int64), ('date', 'datetime64[D]')])
+
+
+class CellNameIndex:
+    """
+    A list of VHLab cell names, parsed once
+
+    Each cell name (e.g., 'cell_ctx_0003_001_2003_05_27') is split into its parts a
+    single time and stored in the structured array FIELDS, with one row per cell:
+        name: code of the reference name; the name is REFNAMES[code]
+        ref: reference number
+        index: cell (cluster) index
+        date: recording date (numpy datetime64; NaT if the date part of the name is not
+              a valid date, so that the cell matches no date filter)
+    Filters on these fields return boolean masks that are computed on the whole array
+    at once, so several filters can be combined with & and | without re-parsing names.
+
+    A CellNameIndex can be passed in place of the CELLNAMES list to FILTER_BY_INDEX and
+    FILTER_BY_REFERENCE; it can be indexed and iterated like the list of names.
+    """
+
+    def __init__(self, cellnames):
+        """
+        CNI = CELLNAMEINDEX(CELLNAMES)
+
+        :param cellnames: list of cell name strings
+        """
+        self.cellnames = list(cellnames)
+        n = len(self.cellnames)
+        self.position = _positions(self.cellnames)
+
+        codes = {}
+        fields = np.zeros(n, dtype=CELLNAME_DTYPE)
+        dates = []
+        for i, c in enumerate(self.cellnames):
+            parts = c.split('_')
+            if len(parts) < 7:
+                raise ValueError(f"Invalid cellname format: {c}")
+            try:
+                fields['ref'][i] = int(parts[2])
+                fields['index'][i] = int(parts[3])
+            except ValueError:
+                raise ValueError(f"Invalid cellname format: {c}")
+            fields['name'][i] = codes.setdefault(parts[1], len(codes))
+            dates.append(parts[4:7])
+        if n:
+            try:
+                fields['date'] = np.array(['-'.join(d) for d in dates], dtype='datetime64[D]')
+            except ValueError:
+                # dates without zero padding (e.g., 2003_5_27) or invalid dates
+                fields['date'] = [_parse_date(*d) for d in dates]
+
+        self.refnames = list(codes)
+        self.fields = fields
+
+    @classmethod
+    def _from_subset(cls, parent, I):
+        cni = cls.__new__(cls)
+        cni.cellnames = [parent.cellnames[i] for i in I]
+        cni.position = _positions(cni.cellnames)
+        cni.refnames = parent.refnames
+        cni.fields = parent.fields[I]
+        return cni
+
+    def __len__(self):
+        return len(self.cellnames)
+
+    def __iter__(self):
+        return iter(self.cellnames)
+
+    def __getitem__(self, i):
+        return self.cellnames[i]
+
+    def __contains__(self, cellname):
+        return cellname in self.position
+
+    def index(self, cellname):
+        """
+        Returns the position of CELLNAME (like list.index)
+        """
+        try:
+            return self.position[cellname]
+        except KeyError:
+            raise ValueError(f"{cellname} is not in the list of cell names.")
+
+    def positions(self, cellnames):
+        """
+        Returns the positions of many cell names as an array (-1 for names not present)
+        """
+        return np.array([self.position.get(c, -1) for c in cellnames], dtype=np.int64)
+
+    @property
+    def ref(self):
+        return self.fields['ref']
+
+    @property
+    def cellindex(self):
+        return self.fields['index']
+
+    @property
+    def date(self):
+        return self.fields['date']
+
+    def names(self):
+        """
+        Returns the reference name of each cell as an array of strings
+        """
+        return np.array(self.refnames, dtype=object)[self.fields['name']] if len(self) else np.zeros(0, dtype=object)
+
+    def name_is(self, name):
+        """
+        Returns a mask of the cells with reference name NAME (e.g., 'extra')
+        """
+        if name not in self.refnames:
+            return np.zeros(len(self), dtype=bool)
+        return self.fields['name'] == self.refnames.index(name)
+
+    def index_range(self, minindex, maxindex):
+        """
+        Returns a mask of the cells with MININDEX <= index <= MAXINDEX
+        """
+        x = self.fields['index']
+        return (x >= minindex) & (x <= maxindex)
+
+    def ref_range(self, minreference, maxreference):
+        """
+        Returns a mask of the cells with MINREFERENCE <= ref <= MAXREFERENCE
+        """
+        x = self.fields['ref']
+        return (x >= minreference) & (x <= maxreference)
+
+    def date_range(self, mindate=None, maxdate=None):
+        """
+        Returns a mask of the cells recorded from MINDATE to MAXDATE (inclusive)
+
+        Dates may be given as 'YYYY-MM-DD' or 'YYYY_MM_DD' strings or datetime64 values;
+        None means no limit.
+        """
+        x = self.fields['date']
+        mask = np.ones(len(self), dtype=bool)
+        if mindate is not None:
+            mask &= x >= _todate(mindate)
+        if maxdate is not None:
+            mask &= x <= _todate(maxdate)
+        return mask
+
+    def subset(self, I):
+        """
+        Returns a new CellNameIndex of the cells at positions I (or where mask I is True)
+        """
+        I = np.asarray(I)
+        if I.dtype == bool:
+            I = np.flatnonzero(I)
+        return CellNameIndex._from_subset(self, I)
+
+    def select(self, cells, mask):
+        """
+        Select cells, in the manner of the FILTER_BY_ functions
+
+        :param cells: list of cell objects, in the same order as the cell names
+        :param mask: boolean mask (or array of positions) of the cells to keep
+        :return: tuple (filtered_cells, filtered_cellnames, included_indices), where
+                 filtered_cellnames is a CellNameIndex
+        """
+        I = np.asarray(mask)
+        if I.dtype == bool:
+            I = np.flatnonzero(I)
+        I = [int(i) for i in I]
+        return [cells[i] for i in I], self.subset(I), I
+
+    @staticmethod
+    def make_cellnames(name, ref, index, date):
+        """
+        Produces many cell names at once
+
+        Arguments are broadcast against each other, so e.g. one NAME and DATE can be given
+        with arrays of REF and INDEX.
+
+        :param name: reference name string(s)
+        :param ref: reference number(s)
+        :param index: cell index(es)
+        :param date: recording date(s), as 'YYYY-MM-DD' or 'YYYY_MM_DD' strings
+        :return: list of cell name strings
+        """
+        name, ref, index, date = np.broadcast_arrays(np.asarray(name, dtype=object), np.asarray(ref),
+                                                     np.asarray(index), np.asarray(date, dtype=object))
+        return [f"cell_{n}_{int(r):03d}_{int(i):03d}_{str(d).replace('-', '_')}"
+                for n, r, i, d in zip(name.ravel(), ref.ravel(), index.ravel(), date.ravel())]
+
+
+def _todate(d):
+    if isinstance(d, str):
+        date = _parse_date(*d.replace('_', '-').split('-'))
+        if np.isnat(date):
+            raise ValueError(f"Invalid date {d}.")
+        return date
+    return np.datetime64(d, 'D')
+
+
+def _parse_date(year, month='', day='', *rest):
+    # date of a cell name from its parts (e.g., '2003', '5', '27'); NaT if not a valid date
+    try:
+        return np.datetime64(f"{int(year):04d}-{int(month):02d}-{int(day):02d}", 'D')
+    except ValueError:
+        return np.datetime64('NaT', 'D')
+
+
+def _positions(cellnames):
+    # first occurrence of each name, as list.index
+    position = {}
+    for i, c in enumerate(cellnames):
+        position.setdefault(c, i)
+    return position
@@ -0,0 +1,144 @@
+import numpy as np
+from .cellname_index import CellNameIndex
+from .nameref2cellname import cellname_datestr
+
+class CellQuery:
+    """
+    A lazy selection of cells from a list of cells and cell names
+
+    Predicates are recorded by the selection methods, which return a new CellQuery and
+    do not touch the cells. RUN evaluates all of them in one pass over one array of
+    positions: the predicates on the cell names (index, reference, quality rows) are
+    evaluated as masks over all cells at once, and the predicates that need the cell
+    objects (associates, was_recorded) are then tested, cell by cell, only on the cells
+    that remain. The cell list is copied once, at the end.
+
+    Example:
+        cells, cellnames, I = CellQuery(cells, cellnames).index_range(401, 500) \\
+            .quality(ds, read_unitquality(ds)).recorded_in('t00003').run()
+    """
+
+    def __init__(self, cells, cellnames, predicates=()):
+        """
+        Q = CELLQUERY(CELLS, CELLNAMES)
+
+        :param cells: list of cell objects
+        :param cellnames: list of cell name strings, or a CellNameIndex
+        """
+        if len(cells) != len(cellnames):
+            raise ValueError("cells and cellnames must have the same length.")
+        self.cells = cells
+        self.cellnames = cellnames
+        self.predicates = tuple(predicates)
+
+    def _add(self, kind, *args):
+        return CellQuery(self.cells, self.cellnames, self.predicates + ((kind, args),))
+
+    def index_range(self, minindex, maxindex):
+        """
+        Keep cells with MININDEX <= index <= MAXINDEX (see FILTER_BY_INDEX)
+        """
+        return self._add('index', minindex, maxindex)
+
+    def ref_range(self, minreference, maxreference):
+        """
+        Keep cells with MINREFERENCE <= ref <= MAXREFERENCE (see FILTER_BY_REFERENCE)
+        """
+        return self._add('ref', minreference, maxreference)
+
+    def quality(self, ds, cellinfo, qualities=None):
+        """
+        Keep cells that have a row in CELLINFO (from READ_UNITQUALITY)
+
+        This only selects; use FILTER_BY_QUALITY to also trim the test associates and
+        add the 'Plexon Quality' associate.
+
+        :param ds: vlt.file.dirstruct object or experiment directory path
+        :param cellinfo: list of cell info dictionaries
+        :param qualities: optional list of quality labels (e.g., ['Excellent', 'Good']);
+                          if given, only rows with one of these labels count
+        """
+        return self._add('quality', ds, cellinfo, qualities)
+
+    def has_associate(self, type_str, owner='', description=''):
+        """
+        Keep cells that have an associate of TYPE_STR (and OWNER, DESCRIPTION if given)
+        """
+        return self._add('associate', type_str, owner, description)
+
+    def recorded_in(self, testdir):
+        """
+        Keep cells that WAS_RECORDED in TESTDIR (a test directory or a test type)
+        """
+        return self._add('recorded', testdir)
+
+    def mask(self):
+        """
+        Evaluate the predicates
+
+        :return: boolean array with True for each cell that passes all predicates
+        """
+        n = len(self.cells)
+        keep = np.ones(n, dtype=bool)
+
+        names = None
+        cell_predicates = []
+        for kind, args in self.predicates:
+            if kind in ('index', 'ref'):
+                if names is None:
+                    names = self.cellnames if isinstance(self.cellnames, CellNameIndex) else CellNameIndex(self.cellnames)
+                keep &= names.index_range(*args) if kind == 'index' else names.ref_range(*args)
+            elif kind == 'quality':
+                keep &= self._quality_mask(*args)
+            else:
+                cell_predicates.append((kind, args))
+
+        if cell_predicates:
+            from vhlib.md import findassociate
+            from .was_recorded import was_recorded
+
+            for i in np.flatnonzero(keep):
+                cell = self.cells[i]
+                for kind, args in cell_predicates:
+                    if kind == 'associate':
+                        A, _ = findassociate(cell, *args)
+                        ok = bool(A)
+                    else:
+                        ok = was_recorded(cell, *args) == 1
+                    if not ok:
+                        keep[i] = False
+                        break
+        return keep
+
+    def _quality_mask(self, ds, cellinfo, qualities):
+        if qualities is not None:
+            qualities = set(qualities)
+            cellinfo = [c for c in cellinfo if c.get('quality', '') in qualities]
+        keep = np.zeros(len(self.cells), dtype=bool)
+        if not cellinfo:
+            return keep
+        rownames = CellNameIndex.make_cellnames([c['name'] for c in cellinfo], [c['ref'] for c in cellinfo],
+                                                [c['index'] for c in cellinfo], cellname_datestr(ds))
+        rows = set(rownames)
+        return np.fromiter((c in rows for c in self.cellnames), dtype=bool, count=len(self.cells))
+
+    def run(self):
+        """
+        Evaluate the predicates and select the cells
+
+        :return: tuple (filtered_cells, filtered_cellnames, included_indices), as the
+                 FILTER_BY_ functions; filtered_cellnames is a CellNameIndex if CELLNAMES is
+        """
+        I = [int(i) for i in np.flatnonzero(self.mask())]
+        cells = [self.cells[i] for i in I]
+        if isinstance(self.cellnames, CellNameIndex):
+            cellnames = self.cellnames.subset(I)
+        else:
+            cellnames = [self.cellnames[i] for i in I]
+        return cells, cellnames, I
+
+    def count(self):
+        """
+        Returns the number of cells that pass all predicates
+        """
+        return int(np.count_nonzero(self.mask()))
@@ -0,0 +1,120 @@
+import os
+
+class ExperimentContext:
+    """
+    An experiment directory with its parsed metadata files cached
+
+    Wraps a vlt.file.dirstruct object (or an experiment directory path) and can be
+    passed to the CDM functions in place of DS. Each metadata file (testdirinfo.txt,
+    unitquality.txt, associate_variables.txt, training*.txt, ...) is parsed at most
+    once; before a cached value is used, the file is stat'ed, and it is parsed again
+    if its modification time or size changed.
+
+    Methods of the wrapped dirstruct (gettests, getexperimentfile, saveexpvar, ...) are
+    available on the context.
+    """
+
+    def __init__(self, ds, inventory=None):
+        """
+        CTX = EXPERIMENTCONTEXT(DS, INVENTORY)
+
+        :param ds: vlt.file.dirstruct object or experiment directory path
+        :param inventory: optional ExperimentInventory of the experiment directory, used
+                          by the CDM functions for file existence checks
+        """
+        if isinstance(ds, ExperimentContext):
+            inventory = inventory if inventory is not None else ds.inventory
+            ds = ds.ds
+        try:
+            pathname = ds.getpathname()
+        except AttributeError:
+            if isinstance(ds, str):
+                pathname = ds
+            else:
+                raise ValueError("ds must have getpathname method or be a string path")
+        self.ds = ds
+        self.pathname = pathname
+        self.inventory = inventory
+        self._cache = {}
+
+    def __getattr__(self, name):
+        # delegate dirstruct methods (gettests, getexperimentfile, saveexpvar, ...)
+        ds = self.__dict__.get('ds')
+        if ds is None or isinstance(ds, str):
+            raise AttributeError(name)
+        return getattr(ds, name)
+
+    def getpathname(self):
+        return self.pathname
+
+    def load(self, filename, parser):
+        """
+        Returns PARSER(path) for a file of the experiment, parsing it at most once per
+        version of the file
+
+        :param filename: file name relative to the experiment directory, or a full path
+        :param parser: function that takes the full path and returns the parsed value;
+                       values are cached separately for each parser
+        :return: the parsed value (shared between calls; do not modify it)
+        """
+        path = os.path.join(self.pathname, filename)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = (path, parser)
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        value = parser(path)
+        self._cache[key] = (stamp, value)
+        return value
+
+    def invalidate(self, filename=None):
+        """
+        Discard the cached values of FILENAME (default: all files)
+        """
+        if filename is None:
+            self._cache = {}
+        else:
+            path = os.path.join(self.pathname, filename)
+            self._cache = {k: v for k, v in self._cache.items() if k[0] != path}
+        return self
+
+    def testdir_associates(self):
+        """
+        Returns the test directory associates described by 'testdirinfo.txt'
+        (see ADD_TESTDIR_INFO)
+        """
+        from .add_testdir_info import read_testdir_associates
+        return self.load('testdirinfo.txt', read_testdir_associates)
+
+    def testdir(self, tag):
+        """
+        Returns the test directory of test TAG (without ' test'), or None
+        """
+        return self.load('testdirinfo.txt', _testdir_lookup).get(tag)
+
+
+def _testdir_lookup(path):
+    from .add_testdir_info import read_testdir_associates
+    lookup = {}
+    for a in read_testdir_associates(path):
+        lookup.setdefault(a['type'][:-len(' test')], a['data'])
+    return lookup
+
+
+def context_load(ds, path, parser):
+    """
+    Returns PARSER(PATH), cached in DS if DS is an ExperimentContext
+    """
+    if isinstance(ds, ExperimentContext):
+        return ds.load(path, parser)
+    return parser(path)
+
+
+def context_inventory(ds, inventory):
+    """
+    Returns INVENTORY, or the inventory of DS if INVENTORY is None and DS is an ExperimentContext
+    """
+    if inventory is None and isinstance(ds, ExperimentContext):
+        return ds.inventory
+    return inventory
@@ -1,20 +1,27 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from .experiment_context import context_inventory
 
 def extractstimdirectorytimes(ds, cell, **kwargs):
     """
     Loop through all known TEST directories and extract the time of presentation
 
-    :param ds: vlt.file.dirstruct object
+    :param ds: vlt.file.dirstruct object or ExperimentContext
     :param cell: cell object
     :param kwargs:
         ErrorIfEmptyTestData (bool, default True)
         WarnOnEarlyMorning (bool, default True)
         EarlyMorningCutOffTime (float, default 5)
         ErrorIfEmpty (bool, default True)
+        Inventory (ExperimentInventory, default None): answers file existence checks
+            from memory (see vhlib.StimDecode.ExperimentInventory)
     :return: tuple (cell, assoc_list)
     """
 
     error_if_empty_test_data = kwargs.get('ErrorIfEmptyTestData', True)
+    inventory = context_inventory(ds, kwargs.get('Inventory', None))
+    if inventory is not None:
+        kwargs['Inventory'] = inventory
 
     from vhlib.md import findassociate, associate
 
@@ -34,29 +41,107 @@ def extractstimdirectorytimes(ds, cell, **kwargs):
 
     if A:
         if not isinstance(A, list): A = [A]
-        for item in A:
-            atype = item.get('type', '')
-            if atype.upper().endswith(' TEST'):
-                idx = atype.upper().rfind(' TEST')
-                if idx != -1:
-                    newtype = atype[:idx] + ' time'
-
-                    data = item.get('data')
-                    if not data:
-                        if error_if_empty_test_data:
-                            raise ValueError(f"Test directory associate label '{atype}' is present but is empty.")
-                        else:
-                            print(f"Warning: Test directory label {atype} is present but empty and will be ignored.")
-                    else:
-                        time_val = getstimdirectorytime(os.path.join(pn, data), **kwargs)
-
-                        a_struct = {
-                            'type': newtype,
-                            'owner': 'extractstimdirectorytimes',
-                            'data': time_val,
-                            'desc': 'Time of day of the recording'
-                        }
-                        assoc_new.append(a_struct)
-                        cell = associate(cell, a_struct)
+        for newtype, data in _time_associates(A, error_if_empty_test_data):
+            time_val = getstimdirectorytime(os.path.join(pn, data), **kwargs)
+
+            a_struct = {
+                'type': newtype,
+                'owner': 'extractstimdirectorytimes',
+                'data': time_val,
+                'desc': 'Time of day of the recording'
+            }
+            assoc_new.append(a_struct)
+            cell = associate(cell, a_struct)
 
     return cell, assoc_new
+
+
+def extractstimdirectorytimes_all(ds, cells, **kwargs):
+    """
+    Extract the time of presentation of all TEST directories for a list of cells
+
+    The population version of EXTRACTSTIMDIRECTORYTIMES: the test directories named by
+    the ' test' associates of all cells are collected first, the time of each unique
+    directory is read once with GETSTIMDIRECTORYTIME (optionally in a thread pool, for
+    slow file systems), and the ' time' associates are then added to all cells.
+
+    :param ds: vlt.file.dirstruct object or ExperimentContext
+    :param cells: list of cell objects
+    :param kwargs: options of EXTRACTSTIMDIRECTORYTIMES, and
+        Threads (int, default 1): number of threads used to read the directory times
+    :return: tuple (cells, assoc_lists), where assoc_lists[i] is the list of associates
+             added to cells[i]
+    """
+
+    error_if_empty_test_data = kwargs.get('ErrorIfEmptyTestData', True)
+    threads = kwargs.pop('Threads', 1)
+    inventory = context_inventory(ds, kwargs.get('Inventory', None))
+    if inventory is not None:
+        kwargs['Inventory'] = inventory
+
+    from vhlib.md import findassociate, associate
+
+    from vhlib.StimDecode import getstimdirectorytime
+
+    try:
+        pn = ds.getpathname()
+    except AttributeError:
+        if isinstance(ds, str):
+            pn = ds
+        else:
+             raise ValueError("ds must have getpathname method or be a string path")
+
+    wanted = []
+    for cell in cells:
+        A, _ = findassociate(cell, '', '', '')
+        if not A:
+            A = []
+        elif not isinstance(A, list):
+            A = [A]
+        wanted.append(_time_associates(A, error_if_empty_test_data))
+
+    testdirs = list(dict.fromkeys(data for w in wanted for _, data in w))
+
+    def read_time(data):
+        return getstimdirectorytime(os.path.join(pn, data), **kwargs)
+
+    if threads > 1 and len(testdirs) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            times = dict(zip(testdirs, pool.map(read_time, testdirs)))
+    else:
+        times = {data: read_time(data) for data in testdirs}
+
+    cells = list(cells)
+    assoc_lists = []
+    for i, w in enumerate(wanted):
+        assoc_new = []
+        for newtype, data in w:
+            a_struct = {
+                'type': newtype,
+                'owner': 'extractstimdirectorytimes',
+                'data': times[data],
+                'desc': 'Time of day of the recording'
+            }
+            assoc_new.append(a_struct)
+            cells[i] = associate(cells[i], a_struct)
+        assoc_lists.append(assoc_new)
+
+    return cells, assoc_lists
+
+
+def _time_associates(A, error_if_empty_test_data):
+    # (' time' associate type, test directory) for each ' test' associate in A
+    out = []
+    for item in A:
+        atype = item.get('type', '')
+        if atype.upper().endswith(' TEST'):
+            idx = atype.upper().rfind(' TEST')
+            data = item.get('data')
+            if not data:
+                if error_if_empty_test_data:
+                    raise ValueError(f"Test directory associate label '{atype}' is present but is empty.")
+                else:
+                    print(f"Warning: Test directory label {atype} is present but empty and will be ignored.")
+            else:
+                out.append((atype[:idx] + ' time', data))
+    return out
@@ -1,16 +1,21 @@
 from .cellname2nameref import cellname2nameref
+from .cellname_index import CellNameIndex
 
 def filter_by_index(cells, cellnames, minindex, maxindex):
     """
     Filter out cells by the cluster index number
 
     :param cells: list of cell objects
-    :param cellnames: list of cell name strings
+    :param cellnames: list of cell name strings, or a CellNameIndex (then the filter is
+                      applied to the parsed fields and filtered_cellnames is a CellNameIndex)
     :param minindex: minimum index value (inclusive)
     :param maxindex: maximum index value (inclusive)
     :return: tuple (filtered_cells, filtered_cellnames, included_indices)
     """
 
+    if isinstance(cellnames, CellNameIndex):
+        return cellnames.select(cells, cellnames.index_range(minindex, maxindex))
+
     incl = []
 
     for i, name in enumerate(cellnames):
@@ -1,51 +1,61 @@
-from .nameref2cellname import nameref2cellname
+from .nameref2cellname import cellname_datestr
+from .cellname_index import CellNameIndex, _positions
 
 def filter_by_quality(ds, cells, cellnames, cellinfo):
     """
     Filter out all but specified cell recordings
 
+    The cell names of all CELLINFO rows are generated at once and joined to CELLNAMES
+    through a name -> position dictionary that is built once (or taken from CELLNAMES
+    if it is a CellNameIndex).
+
     :param ds: vlt.dirstruct object
     :param cells: list of cell objects
-    :param cellnames: list of cell name strings
+    :param cellnames: list of cell name strings, or a CellNameIndex
     :param cellinfo: list of cell info dictionaries (from read_unitquality)
     :return: tuple (filtered_cells, filtered_cellnames, indices)
     """
 
     from vhlib.md import findassociate, disassociate, associate
 
-    I = []
-
-    for i in range(len(cellinfo)):
-        cell_name = nameref2cellname(ds, cellinfo[i]['name'], cellinfo[i]['ref'], cellinfo[i]['index'])
+    datestr = cellname_datestr(ds)
+    rownames = CellNameIndex.make_cellnames([c['name'] for c in cellinfo], [c['ref'] for c in cellinfo],
+                                            [c['index'] for c in cellinfo], datestr) if cellinfo else []
 
-        try:
-            j = cellnames.index(cell_name)
-        except ValueError:
-             raise ValueError(f"No cell {cell_name} encountered in input cellnames.")
+    if isinstance(cellnames, CellNameIndex):
+        position = cellnames.position
+    else:
+        position = _positions(cellnames)
 
-        I.append(j)
+    I = [position.get(name, -1) for name in rownames]
+    for name, j in zip(rownames, I):
+        if j < 0:
+            raise ValueError(f"No cell {name} encountered in input cellnames.")
 
+    for info, j in zip(cellinfo, I):
         inds_to_ax = []
         A, _ = findassociate(cells[j], '', '', '')
 
         if A:
             if not isinstance(A, list): A = [A]
+            good_dirs = set(info.get('goodtestdirs', []))
             for idx, a in enumerate(A):
                 atype = a.get('type', '')
                 if atype.endswith(' test'):
                     data = a.get('data')
-                    good_dirs = cellinfo[i].get('goodtestdirs', [])
-
-                    if data not in good_dirs:
+                    if not (isinstance(data, str) and data in good_dirs):
                         inds_to_ax.append(idx)
 
         if inds_to_ax:
              cells[j] = disassociate(cells[j], inds_to_ax)
 
-        cells[j] = associate(cells[j], 'Plexon Quality', '', cellinfo[i].get('quality', ''), 'Quality label as determined by the user of the Offline Spike Sorter by Plexon')
+        cells[j] = associate(cells[j], 'Plexon Quality', '', info.get('quality', ''), 'Quality label as determined by the user of the Offline Spike Sorter by Plexon')
 
     I = sorted(I)
     cells = [cells[i] for i in I]
-    cellnames = [cellnames[i] for i in I]
+    if isinstance(cellnames, CellNameIndex):
+        cellnames = cellnames.subset(I)
+    else:
+        cellnames = [cellnames[i] for i in I]
 
     return cells, cellnames, I
@@ -1,16 +1,21 @@
 from .cellname2nameref import cellname2nameref
+from .cellname_index import CellNameIndex
 
 def filter_by_reference(cells, cellnames, minreference, maxreference):
     """
     Filter out cells by the cluster reference number
 
     :param cells: list of cell objects
-    :param cellnames: list of cell name strings
+    :param cellnames: list of cell name strings, or a CellNameIndex (then the filter is
+                      applied to the parsed fields and filtered_cellnames is a CellNameIndex)
     :param minreference: minimum reference value (inclusive)
     :param maxreference: maximum reference value (inclusive)
     :return: tuple (filtered_cells, filtered_cellnames, included_indices)
     """
 
+    if isinstance(cellnames, CellNameIndex):
+        return cellnames.select(cells, cellnames.ref_range(minreference, maxreference))
+
     incl = []
 
     for i, name in enumerate(cellnames):
@@ -1,14 +1,18 @@
 from .add_testdir_info import add_testdir_info
+from .experiment_context import ExperimentContext
 
 def findtestdirinfo(ds, tag):
     """
     Find a test directory record from testdirinfo.txt file
 
-    :param ds: vlt.dirstruct object
+    :param ds: vlt.dirstruct object or ExperimentContext (then the lookup is precomputed)
     :param tag: directory label to look for (without ' test')
     :return: directory name string or None if not found
     """
 
+    if isinstance(ds, ExperimentContext):
+        return ds.testdir(tag)
+
     # In MATLAB: assoc = add_testdir_info(ds);
     # My python impl returns (assoc, cells) tuple.
     assoc, _ = add_testdir_info(ds)
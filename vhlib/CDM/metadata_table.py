@@ -0,0 +1,157 @@
+import os
+import re
+import csv
+import numpy as np
+
+QUALITYCODES = {
+    'multiunit': 'Multi-unit', 'mu': 'Multi-unit',
+    'excellent': 'Excellent', 'e': 'Excellent',
+    'good': 'Good', 'g': 'Good',
+    'nu': 'Not useable', 'notuseable': 'Not useable',
+}
+
+# field types of the known tab-delimited metadata files; fields not listed are strings
+#   'str': the text as is
+#   'int', 'float': numbers (empty or invalid floats are NaN; invalid ints are an error)
+#   'list': comma-separated list of strings, stripped, without empty entries
+#   'auto': an int or float if the text is a plain decimal number (no leading zeros,
+#           underscores or spaces), otherwise the text
+#   ('enum', mapping): the lower-case text is mapped through MAPPING (unknown text is kept)
+METADATA_SCHEMAS = {
+    'unitquality.txt': {
+        'channel': 'float',
+        'unit': 'list',
+        'qualitycode': ('enum', QUALITYCODES),
+        'goodtestdirs': 'list',
+    },
+    'testdirinfo.txt': {
+        'types': 'list',
+    },
+    # associate_variables.txt: all fields are strings, as loadStructArray returns them
+}
+
+_INT_PATTERN = re.compile(r'[+-]?(0|[1-9][0-9]*)')
+_FLOAT_PATTERN = re.compile(r'[+-]?((0|[1-9][0-9]*)(\.[0-9]+)?|\.[0-9]+)([eE][+-]?[0-9]+)?')
+
+
+class MetadataTable:
+    """
+    The contents of a tab-delimited metadata file, by column
+
+    The first line of the file has the field names, separated by tabs, and each
+    following line has one value per field (see TESTDIRINFO and UNITQUALITY).
+    COLUMNS is a dictionary of field name -> numpy array with one entry per row
+    (float or int arrays for numeric fields, object arrays otherwise).
+    """
+
+    def __init__(self, fields, columns):
+        self.fields = list(fields)
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]]) if self.fields else 0
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def column(self, field, default=''):
+        """
+        Returns the column FIELD, or a column of DEFAULT values if the file has no such field
+        """
+        if field in self.columns:
+            return self.columns[field]
+        return _object_array([default] * len(self))
+
+    def rows(self):
+        """
+        Returns the rows as a list of dictionaries (as vlt.file.custom_struct_io.loadStructArray)
+        """
+        cols = [self.columns[f].tolist() for f in self.fields]
+        return [dict(zip(self.fields, values)) for values in zip(*cols)]
+
+
+def read_metadata_table(filename, schema=None):
+    """
+    Read a tab-delimited metadata file in one pass
+
+    :param filename: full path of the file
+    :param schema: dictionary of field name -> type (see METADATA_SCHEMAS); by default
+                   the schema of the file's name in METADATA_SCHEMAS
+    :return: MetadataTable
+    """
+
+    if schema is None:
+        schema = METADATA_SCHEMAS.get(os.path.basename(filename), {})
+
+    with open(filename, 'r', newline='') as f:
+        reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        try:
+            fields = next(reader)
+        except StopIteration:
+            return MetadataTable([], {})
+        lines = [r for r in reader if any(r)]
+
+    nf = len(fields)
+    lines = [r + [''] * (nf - len(r)) if len(r) < nf else r for r in lines]
+    raw = list(zip(*lines)) if lines else [()] * nf
+
+    columns = {}
+    for field, values in zip(fields, raw):
+        try:
+            columns[field] = _convert(values, schema.get(field, 'str'))
+        except ValueError as e:
+            raise ValueError(f"Error reading field '{field}' of {filename}: {e}")
+    return MetadataTable(fields, columns)
+
+
+def _convert(values, ftype):
+    if ftype == 'str':
+        return _object_array(values)
+    if ftype == 'float':
+        try:
+            return np.array(values, dtype=float)
+        except ValueError:
+            return np.array([_float(v) for v in values], dtype=float)
+    if ftype == 'int':
+        return np.array([_int(v) for v in values], dtype=np.int64)
+    if ftype == 'list':
+        return _object_array([[x.strip() for x in v.split(',') if x.strip()] for v in values])
+    if ftype == 'auto':
+        return _object_array([_auto(v) for v in values])
+    if isinstance(ftype, tuple) and ftype[0] == 'enum':
+        mapping = ftype[1]
+        return _object_array([mapping.get(v.lower(), v) for v in values])
+    raise ValueError(f"Unknown field type {ftype}.")
+
+
+def _object_array(values):
+    # element by element, so that lists are stored as lists
+    a = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        a[i] = v
+    return a
+
+
+def _float(v):
+    try:
+        return float(v)
+    except ValueError:
+        return np.nan
+
+
+def _int(v):
+    if not re.fullmatch(r'[+-]?[0-9]+', v.strip()):
+        raise ValueError(f"invalid integer '{v}'")
+    return int(v)
+
+
+def _auto(v):
+    # int() and float() also accept '1_000', ' 7 ' and 'nan'; only plain numbers are converted
+    if _INT_PATTERN.fullmatch(v):
+        return int(v)
+    if _FLOAT_PATTERN.fullmatch(v):
+        return float(v)
+    return v
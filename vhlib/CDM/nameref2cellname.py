@@ -11,6 +11,21 @@ def nameref2cellname(ds, name, ref, index):
     :return: cell name string
     """
 
+    datestr_formatted = cellname_datestr(ds)
+
+    cellname = f"cell_{name}_{int(ref):03d}_{int(index):03d}_{datestr_formatted}"
+
+    return cellname
+
+
+def cellname_datestr(ds):
+    """
+    Returns the date part of cell names ('YYYY_MM_DD') for an experiment
+
+    :param ds: vlt.file.dirstruct object or experiment directory path named 'YYYY-MM-DD'
+    :return: date string with underscores
+    """
+
     try:
         pathname = ds.getpathname()
     except AttributeError:
@@ -30,6 +45,4 @@ def nameref2cellname(ds, name, ref, index):
 
     datestr_formatted = f"{parts[0]}_{parts[1]}_{parts[2]}"
 
-    cellname = f"cell_{name}_{int(ref):03d}_{int(index):03d}_{datestr_formatted}"
-
-    return cellname
+    return datestr_formatted
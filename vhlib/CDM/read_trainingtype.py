@@ -1,15 +1,18 @@
 import os
+from .experiment_context import context_load, context_inventory
 
 def read_trainingtype(ds, **kwargs):
     """
     Read the trainingtype.txt file and prepare data to associate with cells
 
-    :param ds: vlt.file.dirstruct object
+    :param ds: vlt.file.dirstruct object or ExperimentContext (which caches the files read)
     :param kwargs:
         ErrorIfNoTrainingType (bool, default False)
         ErrorIfNoTrainingAngle (bool, default False)
         ErrorIfNoTF (bool, default False)
         ErrorIfNoTrainingStim (bool, default False)
+        Inventory (ExperimentInventory, default None): answers file existence checks
+            from memory (see vhlib.StimDecode.ExperimentInventory)
     :return: list of associate dictionaries
     """
 
@@ -17,6 +20,9 @@ def read_trainingtype(ds, **kwargs):
     error_if_no_training_angle = kwargs.get('ErrorIfNoTrainingAngle', False)
     error_if_no_tf = kwargs.get('ErrorIfNoTF', False)
     error_if_no_training_stim = kwargs.get('ErrorIfNoTrainingStim', False)
+    inventory = context_inventory(ds, kwargs.get('Inventory', None))
+
+    from vhlib.StimDecode.experiment_inventory import inventory_isfile
 
     assoc = []
 
@@ -30,9 +36,8 @@ def read_trainingtype(ds, **kwargs):
 
     filename = os.path.join(pathname, 'trainingtype.txt')
 
-    if os.path.isfile(filename):
-        with open(filename, 'r') as f:
-            content = f.readline().strip()
+    if inventory_isfile(inventory, filename):
+        content = context_load(ds, filename, _read_first_line)
 
         type_str = ''
         content_lower = content.lower()
@@ -66,12 +71,8 @@ def read_trainingtype(ds, **kwargs):
              raise FileNotFoundError(f"No trainingtype.txt file in {pathname}; error was requested if no file exists.")
 
     filename = os.path.join(pathname, 'trainingangle.txt')
-    if os.path.isfile(filename):
-        with open(filename, 'r') as f:
-            try:
-                angles = [float(x) for x in f.read().split()]
-            except ValueError:
-                angles = []
+    if inventory_isfile(inventory, filename):
+        angles = list(context_load(ds, filename, _read_floats))
 
         assoc.append({
             'type': 'Training Angle',
@@ -84,12 +85,8 @@ def read_trainingtype(ds, **kwargs):
              raise FileNotFoundError(f"No trainingangle.txt file in {pathname}; error was requested if no file exists.")
 
     filename = os.path.join(pathname, 'trainingtemporalfrequency.txt')
-    if os.path.isfile(filename):
-        with open(filename, 'r') as f:
-             try:
-                tfs = [float(x) for x in f.read().split()]
-             except ValueError:
-                tfs = []
+    if inventory_isfile(inventory, filename):
+        tfs = list(context_load(ds, filename, _read_floats))
 
         assoc.append({
             'type': 'Training TF',
@@ -102,9 +99,8 @@ def read_trainingtype(ds, **kwargs):
              raise FileNotFoundError(f"No trainingtemporalfrequency.txt file in {pathname}; error was requested if no file exists.")
 
     filename = os.path.join(pathname, 'trainingstim.txt')
-    if os.path.isfile(filename):
-        with open(filename, 'r') as f:
-            content = f.readline().strip().upper()
+    if inventory_isfile(inventory, filename):
+        content = context_load(ds, filename, _read_first_line).upper()
 
         assoc.append({
             'type': 'Training Stim',
@@ -117,3 +113,16 @@ def read_trainingtype(ds, **kwargs):
              raise FileNotFoundError(f"No trainingstim.txt file in {pathname}; error was requested if no file exists.")
 
     return assoc
+
+
+def _read_first_line(filename):
+    with open(filename, 'r') as f:
+        return f.readline().strip()
+
+
+def _read_floats(filename):
+    with open(filename, 'r') as f:
+        try:
+            return [float(x) for x in f.read().split()]
+        except ValueError:
+            return []
@@ -1,17 +1,20 @@
 import os
+import numpy as np
+from .experiment_context import context_load, context_inventory
+from .metadata_table import read_metadata_table
 
-def read_unitquality(ds):
+def read_unitquality(ds, inventory=None):
     """
     Read the unitquality.txt file and prepare a list of cells to include
 
-    :param ds: vlt.file.dirstruct object
+    :param ds: vlt.file.dirstruct object or ExperimentContext (which caches the parsed files)
+    :param inventory: optional ExperimentInventory used to answer existence checks
     :return: list of cell info dictionaries
     """
 
-    try:
-        from vlt.file.custom_struct_io import loadStructArray
-    except ImportError:
-         raise NotImplementedError("vlt.file.custom_struct_io.loadStructArray missing")
+    from vhlib.StimDecode.experiment_inventory import inventory_isfile
+
+    inventory = context_inventory(ds, inventory)
 
     unit_shift = 400
 
@@ -24,44 +27,27 @@ def read_unitquality(ds):
              raise ValueError("ds must have getpathname method or be a string path")
 
     uq_file = os.path.join(pathn, 'unitquality.txt')
-    if not os.path.exists(uq_file):
+    if not inventory_isfile(inventory, uq_file):
         raise FileNotFoundError(f"File not found: {uq_file}")
 
-    uq = loadStructArray(uq_file)
+    uq = context_load(ds, uq_file, read_metadata_table)
 
     channelshift = 0
     channelshift_file = os.path.join(pathn, 'unitquality_channelshift.txt')
-    if os.path.isfile(channelshift_file):
-        with open(channelshift_file, 'r') as f:
-            try:
-                content = f.read().split()
-                if content:
-                    channelshift = float(content[0])
-            except ValueError:
-                pass
-
-    uq2 = []
-
-    for item in uq:
-        base_uq = item.copy()
-
-        qc = item.get('qualitycode', '').lower()
-        if qc in ['multiunit', 'mu']:
-            base_uq['qualitycode'] = 'Multi-unit'
-        elif qc in ['excellent', 'e']:
-             base_uq['qualitycode'] = 'Excellent'
-        elif qc in ['good', 'g']:
-             base_uq['qualitycode'] = 'Good'
-        elif qc in ['nu', 'notuseable']:
-             base_uq['qualitycode'] = 'Not useable'
-
-        gtd = item.get('goodtestdirs', '')
-        base_uq['goodtestdirs'] = [x.strip() for x in gtd.split(',') if x.strip()]
-
-        unit_str = item.get('unit', '')
-        unit_list_str = [x.strip() for x in unit_str.split(',') if x.strip()]
-
-        for u_str in unit_list_str:
+    if inventory_isfile(inventory, channelshift_file):
+        channelshift = context_load(ds, channelshift_file, _read_channelshift)
+
+    channel = uq['channel']
+    ref = np.where(np.isnan(channel), 0, channel) + channelshift
+    units = uq.column('unit', [])
+    goodtestdirs = uq.column('goodtestdirs', [])
+    quality = uq.column('qualitycode', '')
+    comment = uq.column('comment', '')
+
+    cellinfo = []
+
+    for i in range(len(uq)):
+        for u_str in units[i]:
             if len(u_str) == 1 and u_str.isalpha():
                 if 'a' <= u_str <= 'z':
                     unit = unit_shift + 1 + ord(u_str) - ord('a')
@@ -75,26 +61,26 @@ def read_unitquality(ds):
                 except ValueError:
                     unit = 0
 
-            entry = base_uq.copy()
-            entry['unit'] = unit
-            uq2.append(entry)
+            celli = {}
+            celli['name'] = 'extra'
+            celli['ref'] = float(ref[i])
+            celli['index'] = unit
+            celli['goodtestdirs'] = list(goodtestdirs[i])
+            celli['quality'] = quality[i]
+            celli['comment'] = comment[i]
 
-    cellinfo = []
+            cellinfo.append(celli)
 
-    for item in uq2:
-        celli = {}
-        celli['name'] = 'extra'
-        try:
-            ch = float(item['channel'])
-        except ValueError:
-            ch = 0
-
-        celli['ref'] = ch + channelshift
-        celli['index'] = item['unit']
-        celli['goodtestdirs'] = item['goodtestdirs']
-        celli['quality'] = item['qualitycode']
-        celli['comment'] = item.get('comment', '')
+    return cellinfo
 
-        cellinfo.append(celli)
 
-    return cellinfo
+def _read_channelshift(filename):
+    channelshift = 0
+    with open(filename, 'r') as f:
+        try:
+            content = f.read().split()
+            if content:
+                channelshift = float(content[0])
+        except ValueError:
+            pass
+    return channelshift
@@ -36,34 +36,48 @@ def was_recorded(cell, testdir):
                  testdirname = asc.get('data', '')
 
     if testdirname:
-        if isinstance(A, list):
-             A_assoc = A[0]
-        else:
-             A_assoc = A
+        epoch = cluster_epoch(A)
+        if epoch is not None and not in_epoch(epoch[0], epoch[1], testdirname):
+            b = 0
 
-        data = A_assoc.get('data', [])
+    return b
 
-        if not isinstance(data, list):
-            data = [data]
 
-        a_ind = 0
-        for j, item in enumerate(data):
-            if isinstance(item, dict) and 'clusterinfo' in item:
-                if 'number' in item['clusterinfo']:
-                    a_ind = j
+def cluster_epoch(A):
+    """
+    Returns (EpochStart, EpochStop) of the cluster in the 'vhlv_loadcelldata' associate(s) A,
+    or None if the cluster has no EpochStart
+    """
+    if isinstance(A, list):
+         A_assoc = A[0]
+    else:
+         A_assoc = A
 
-        if a_ind < len(data):
-            selected_item = data[a_ind]
-            if isinstance(selected_item, dict) and 'clusterinfo' in selected_item:
-                clusterinfo = selected_item['clusterinfo']
-                if 'EpochStart' in clusterinfo:
-                    strs = [clusterinfo['EpochStart'], clusterinfo.get('EpochStop', '')]
+    data = A_assoc.get('data', [])
 
-                    if testdirname not in strs:
-                         strs.append(testdirname)
-                         sorted_strs = sorted(strs)
+    if not isinstance(data, list):
+        data = [data]
 
-                         if sorted_strs[1] != testdirname:
-                             b = 0
+    a_ind = 0
+    for j, item in enumerate(data):
+        if isinstance(item, dict) and 'clusterinfo' in item:
+            if 'number' in item['clusterinfo']:
+                a_ind = j
 
-    return b
+    if a_ind < len(data):
+        selected_item = data[a_ind]
+        if isinstance(selected_item, dict) and 'clusterinfo' in selected_item:
+            clusterinfo = selected_item['clusterinfo']
+            if 'EpochStart' in clusterinfo:
+                return clusterinfo['EpochStart'], clusterinfo.get('EpochStop', '')
+    return None
+
+
+def in_epoch(start, stop, testdirname):
+    """
+    Returns True if TESTDIRNAME sorts between START and STOP (or equals one of them)
+    """
+    strs = [start, stop]
+    if testdirname in strs:
+        return True
+    return sorted(strs + [testdirname])[1] == testdirname
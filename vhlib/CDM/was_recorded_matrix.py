@@ -0,0 +1,84 @@
+import numpy as np
+from .was_recorded import cluster_epoch, in_epoch
+
+def was_recorded_matrix(cells, testdirs, ds=None):
+    """
+    Looks to see which cells were recorded in which test directories
+
+    Gives the same answers as WAS_RECORDED for every pair of cell and test directory.
+    The associates of each cell are scanned once to find its cluster's EpochStart and
+    EpochStop; test directory names ('t00001', ...) are then compared as integers for
+    all cells and test directories at once.
+
+    :param cells: list of cell objects
+    :param testdirs: list of test directories (e.g., 't00001') or test types
+    :param ds: optional vlt.file.dirstruct object or ExperimentContext; if given, test
+               types are resolved once through 'testdirinfo.txt' (see FINDTESTDIRINFO)
+               instead of through each cell's ' test' associates
+    :return: boolean array of size len(cells) x len(testdirs)
+    """
+
+    from vhlib.md import findassociate
+
+    nc, nt = len(cells), len(testdirs)
+    out = np.ones((nc, nt), dtype=bool)
+
+    istestdir = [len(t) == 6 and t.lower().startswith('t') and t[1:].isdigit() for t in testdirs]
+    resolved = [t if istestdir[j] else None for j, t in enumerate(testdirs)]
+    if ds is not None:
+        from .findtestdirinfo import findtestdirinfo
+        resolved = [r if r is not None else (findtestdirinfo(ds, t) or '') for r, t in zip(resolved, testdirs)]
+
+    # the test directory of each cell and column (as a number), for the vectorized
+    # comparison; -1 means no test directory, so the cell is assumed recorded
+    lo = np.zeros(nc, dtype=np.int64)
+    hi = np.zeros(nc, dtype=np.int64)
+    fast = np.zeros(nc, dtype=bool)
+    cols = np.full((nc, nt), -1, dtype=np.int64)
+    fixed = np.array([r is not None for r in resolved], dtype=bool)
+    if fixed.all():
+        col_numbers = [_testdir_number(r) if r else -1 for r in resolved]
+
+    for c, cell in enumerate(cells):
+        A, _ = findassociate(cell, '', '', '')
+        if not A:
+            continue
+        if not isinstance(A, list): A = [A]
+        load = [a for a in A if a.get('type') == 'vhlv_loadcelldata']
+        if not load:
+            continue
+        epoch = cluster_epoch(load)
+        if epoch is None:
+            continue
+
+        names = list(resolved)
+        if fixed.all():
+            numbers = col_numbers
+        else:
+            tests = {}
+            for a in A:
+                tests.setdefault(a.get('type', ''), a.get('data', ''))
+            for j in np.flatnonzero(~fixed):
+                names[j] = tests.get(testdirs[j] + ' test', '')
+            numbers = [_testdir_number(n) if n else -1 for n in names]
+
+        start, stop = _testdir_number(epoch[0]), _testdir_number(epoch[1])
+        if start is None or stop is None or any(x is None for x in numbers):
+            # not all names are of the form tNNNNN; compare the strings as WAS_RECORDED
+            out[c] = [not n or in_epoch(epoch[0], epoch[1], n) for n in names]
+            continue
+
+        fast[c] = True
+        lo[c], hi[c] = min(start, stop), max(start, stop)
+        cols[c] = numbers
+
+    T = cols[fast]
+    out[fast] = (T < 0) | ((lo[fast, None] <= T) & (T <= hi[fast, None]))
+    return out
+
+
+def _testdir_number(name):
+    # 't00012' -> 12; None if NAME is not a test directory name
+    if isinstance(name, str) and len(name) == 6 and name[0] == 't' and name[1:].isdigit():
+        return int(name[1:])
+    return None
@@ -8,3 +8,11 @@ from .vhlabcorrectmti import vhlabcorrectmti
 from .write_interconnect_textfiles import write_interconnect_textfiles
 from .write_stimtimes_txt import write_stimtimes_txt
 from .getstimdirectorytime import getstimdirectorytime
+from .stimtiming_cache import StimTimingCache, get_stimtiming_cache
+from .experiment_inventory import ExperimentInventory
+from .stimtimes_npz import read_stimtimes_npz, write_stimtimes_npz, convert_stimtimes_txt
+from .load_mat_variables import load_mat_variables
+from .twophoton_stim_frames import twophoton_stim_frames
+from .snap_frames_to_refresh import snap_frames_to_refresh
+from .experiment_timeline import ExperimentTimeline
+from .check_stimtimes import check_stimtimes, check_stimtimes_dirs
@@ -0,0 +1,117 @@
+import os
+import traceback
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+CHECKS = ('nonmonotonic_onsets', 'nonmonotonic_frames', 'frames_before_onset',
+          'framecount_mismatch', 'stimid_mismatch', 'overlapping')
+
+
+def check_stimtimes(stimids, stimtimes, frametimes, displayorder=None, goodframes=None):
+    """
+    Check decoded stimulus timing for consistency
+
+    All checks are run on whole arrays at once:
+        nonmonotonic_onsets: stimuli whose onset is not after the previous onset
+        nonmonotonic_frames: stimuli whose frame times are not increasing
+        frames_before_onset: stimuli with a frame before their own onset
+        framecount_mismatch: stimuli whose number of frames differs from GOODFRAMES
+            (default: the most common number of frames)
+        stimid_mismatch: stimuli whose id differs from DISPLAYORDER (compared on the
+            low 8 bits, as transmitted), if DISPLAYORDER is given
+        overlapping: stimuli whose last frame is at or after the next onset
+
+    :param stimids: array of stimulus ids (as from READ_STIMTIMES_TXT)
+    :param stimtimes: array of stimulus onset times
+    :param frametimes: list of arrays of frame times
+    :param displayorder: optional display order (stimulus ids) from the stimulus script
+    :param goodframes: optional expected number of frames per stimulus
+    :return: dictionary with, for each check above, the indices of the offending
+             stimuli; 'counts', the number of offenders of each check; 'n', the number
+             of stimuli; 'ok', True if no check found offenders; and 'messages', a list
+             of other problems (e.g., a length mismatch with DISPLAYORDER)
+    """
+
+    stimids = np.asarray(stimids, dtype=float).ravel()
+    stimtimes = np.asarray(stimtimes, dtype=float).ravel()
+    n = len(stimtimes)
+    messages = []
+    if len(stimids) != n or len(frametimes) != n:
+        raise ValueError("stimids, stimtimes, and frametimes must have the same number of entries.")
+
+    nf = np.fromiter((len(f) for f in frametimes), dtype=np.int64, count=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(nf, out=offsets[1:])
+    frames = np.concatenate([np.asarray(f, dtype=float).ravel() for f in frametimes]) if n else np.zeros(0)
+    stim_of_frame = np.repeat(np.arange(n), nf)
+
+    report = {'n': n}
+
+    report['nonmonotonic_onsets'] = np.flatnonzero(np.diff(stimtimes) <= 0) + 1
+
+    d = np.diff(frames)
+    same = stim_of_frame[1:] == stim_of_frame[:-1]
+    report['nonmonotonic_frames'] = np.unique(stim_of_frame[1:][same & (d <= 0)])
+
+    report['frames_before_onset'] = np.unique(stim_of_frame[frames < stimtimes[stim_of_frame]])
+
+    if goodframes is None:
+        goodframes = np.bincount(nf).argmax() if n else 0
+    report['framecount_mismatch'] = np.flatnonzero(nf != goodframes)
+
+    if displayorder is not None:
+        do = np.asarray(displayorder, dtype=float).ravel()
+        if len(do) != n:
+            messages.append(f"{n} stimuli were recorded but the display order has {len(do)}.")
+        m = min(len(do), n)
+        report['stimid_mismatch'] = np.flatnonzero(np.mod(do[:m], 256) != np.mod(stimids[:m], 256))
+    else:
+        report['stimid_mismatch'] = np.zeros(0, dtype=np.int64)
+
+    has_frames = nf[:-1] > 0
+    lastframe = frames[np.maximum(offsets[1:-1] - 1, 0)] if len(frames) else np.zeros(max(n - 1, 0))
+    report['overlapping'] = np.flatnonzero(has_frames & (lastframe >= stimtimes[1:]))
+
+    report['counts'] = {c: len(report[c]) for c in CHECKS}
+    report['messages'] = messages
+    report['ok'] = not messages and not any(report['counts'].values())
+    return report
+
+
+def check_stimtimes_dirs(dirnames, filename='stimtimes.txt', displayorders=None, goodframes=None, processes=None):
+    """
+    Check the stimulus timing of many directories in a process pool
+
+    :param dirnames: list of directory paths
+    :param filename: stimulus timing file in each directory (default 'stimtimes.txt')
+    :param displayorders: optional dictionary of dirname -> display order
+    :param goodframes: optional expected number of frames per stimulus
+    :param processes: number of worker processes (default: the number of CPUs; 1
+                      checks the directories in this process)
+    :return: dictionary of dirname -> report from CHECK_STIMTIMES; directories that
+             could not be read or checked have a report with 'ok' False, the error in
+             'error', and its traceback in 'traceback'
+    """
+
+    displayorders = displayorders or {}
+    jobs = [(d, filename, displayorders.get(d), goodframes) for d in dirnames]
+
+    if processes == 1 or len(jobs) <= 1:
+        results = [_check_dir(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_check_dir, jobs, chunksize=max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1)))))
+
+    return dict(zip(dirnames, results))
+
+
+def _check_dir(job):
+    from .read_stimtimes_txt import read_stimtimes_txt
+
+    dirname, filename, displayorder, goodframes = job
+    try:
+        stimids, stimtimes, frametimes = read_stimtimes_txt(dirname, filename)
+        return check_stimtimes(stimids, stimtimes, frametimes, displayorder, goodframes)
+    except Exception as err:
+        # an error in one directory must not stop the others
+        return {'ok': False, 'error': f"{type(err).__name__}: {err}", 'traceback': traceback.format_exc()}
@@ -0,0 +1,145 @@
+import os
+import fnmatch
+
+KNOWN_FILE_PATTERNS = (
+    # test directory files
+    'stims.mat', 'spike2data.smr', 'filetime.txt', 'stimtimes*.txt', 'stimontimes.txt',
+    'stimtimes*.mat', 'stimtimes*.npz', 'stimontimes.npz', 'verticalblanking.txt', 'twophotontimes.txt',
+    'Intan_decoding_finished.txt', 'reference.txt', '*.vhcache.npz',
+    # experiment-level metadata files
+    'unitquality.txt', 'unitquality_channelshift.txt', 'testdirinfo.txt',
+    'associate_variables.txt', 'training*.txt',
+)
+
+
+class ExperimentInventory:
+    """
+    Inventory of the known files in an experiment directory
+
+    Scans the experiment directory ROOT and each of its immediate subdirectories
+    (the test directories) once with os.scandir, and records which known files
+    (stims.mat, spike2data.smr, filetime.txt, stimtimes*.txt, testdirinfo.txt, etc.)
+    exist, along with their sizes and modification times. Existence checks for those
+    files can then be answered from memory instead of with a stat call per file.
+
+    The inventory is a snapshot; call REFRESH after files are written.
+    """
+
+    def __init__(self, root, patterns=KNOWN_FILE_PATTERNS):
+        """
+        INV = EXPERIMENTINVENTORY(ROOT, PATTERNS)
+
+        :param root: experiment directory (or a dirstruct object with getpathname())
+        :param patterns: file name patterns (fnmatch style) of the files to record
+        """
+        try:
+            root = root.getpathname()
+        except AttributeError:
+            if not isinstance(root, str):
+                raise ValueError("root must have getpathname method or be a string path")
+        self.root = os.path.abspath(root)
+        self.patterns = tuple(patterns)
+        self.dirs = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rescan the experiment directory
+        """
+        self.dirs = {}
+        subdirs = self._scan(self.root)
+        for d in subdirs:
+            self._scan(d)
+        return self
+
+    def _scan(self, dirname):
+        files = {}
+        subdirs = []
+        try:
+            it = os.scandir(dirname)
+        except OSError:
+            return subdirs
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                elif entry.is_file() and self._known(entry.name):
+                    st = entry.stat()
+                    files[entry.name] = (st.st_size, st.st_mtime_ns)
+        self.dirs[os.path.normpath(dirname)] = files
+        return sorted(subdirs)
+
+    def _known(self, name):
+        return any(fnmatch.fnmatchcase(name, p) for p in self.patterns)
+
+    def _lookup(self, filepath):
+        """
+        Returns (covered, record) for FILEPATH
+
+        COVERED is True if the inventory can answer for FILEPATH; RECORD is the
+        (size, mtime_ns) tuple of the file, or None if it does not exist.
+        """
+        filepath = os.path.abspath(filepath)
+        dirname, name = os.path.split(filepath)
+        files = self.dirs.get(os.path.normpath(dirname))
+        if files is None or not self._known(name):
+            return False, None
+        return True, files.get(name)
+
+    def isfile(self, filepath):
+        """
+        Returns True if FILEPATH exists, answering from memory when possible
+        """
+        covered, rec = self._lookup(filepath)
+        if not covered:
+            return os.path.isfile(filepath)
+        return rec is not None
+
+    def stat(self, filepath):
+        """
+        Returns (size, mtime_ns) of FILEPATH, or None if it does not exist
+        """
+        covered, rec = self._lookup(filepath)
+        if not covered:
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                return None
+            return (st.st_size, st.st_mtime_ns)
+        return rec
+
+    def files(self, dirname):
+        """
+        Returns a dictionary of the known files in DIRNAME: name -> (size, mtime_ns)
+        """
+        return dict(self.dirs.get(os.path.normpath(os.path.abspath(dirname)), {}))
+
+    def testdirs(self):
+        """
+        Returns the names of the scanned subdirectories of the experiment directory
+        """
+        return sorted(os.path.basename(d) for d in self.dirs if d != os.path.normpath(self.root))
+
+
+def inventory_isfile(inventory, filepath):
+    """
+    Returns os.path.isfile(FILEPATH), using INVENTORY if it is not None
+    """
+    if inventory is None:
+        return os.path.isfile(filepath)
+    return inventory.isfile(filepath)
+
+
+def inventory_stat(inventory, filepath):
+    """
+    Returns the (size, mtime_ns) of FILEPATH, using INVENTORY if it is not None
+
+    Returns None if FILEPATH does not exist.
+    """
+    if inventory is None:
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+    return inventory.stat(filepath)
@@ -0,0 +1,198 @@
+import os
+import numpy as np
+from .experiment_inventory import ExperimentInventory
+from .getstimdirectorytime import getstimdirectorytime
+from .read_stimtimes_txt import read_stimtimes_txt
+
+
+class ExperimentTimeline:
+    """
+    All stimulus presentations of an experiment on one absolute time axis
+
+    The stimuli of every test directory are read with READ_STIMTIMES_TXT, shifted by
+    the directory's start time from GETSTIMDIRECTORYTIME, and merged into one table
+    sorted by onset. Times are in seconds since midnight on the first day of the
+    experiment. The table is built on first use and kept until REFRESH is called.
+
+    Columns (numpy arrays with one entry per presentation):
+        dir: index into DIRNAMES of the test directory
+        stimid: stimulus id
+        onset: stimulus onset time
+        offset: end of the stimulus (last frame plus one frame interval, or the next
+            onset in the same directory if no frames were recorded; for the last
+            stimulus of a directory without frames, the onset plus the median duration
+            of the directory's other stimuli, or else the next onset in the experiment)
+        frame_offsets: frame times of presentation i are
+            frames[frame_offsets[i]:frame_offsets[i+1]]
+    """
+
+    def __init__(self, ds, testdirs=None, inventory=None, filename='stimtimes.txt', **kwargs):
+        """
+        TL = EXPERIMENTTIMELINE(DS, TESTDIRS, INVENTORY, FILENAME, ...)
+
+        :param ds: vlt.file.dirstruct object or experiment directory path
+        :param testdirs: list of test directory names (default: all test directories
+                         that have stimulus timing and start time files)
+        :param inventory: optional ExperimentInventory of the experiment directory
+        :param filename: stimulus timing file in each directory (default 'stimtimes.txt')
+        :param kwargs: options passed to GETSTIMDIRECTORYTIME (e.g., EarlyMorningCutOffTime)
+        """
+        try:
+            self.pathname = ds.getpathname()
+        except AttributeError:
+            if isinstance(ds, str):
+                self.pathname = ds
+            else:
+                raise ValueError("ds must have getpathname method or be a string path")
+        self.testdirs = testdirs
+        self.inventory = inventory
+        self.filename = filename
+        self.options = kwargs
+        self._table = None
+
+    def refresh(self):
+        """
+        Discard the table so that it is rebuilt on next use
+        """
+        self._table = None
+        return self
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = self._build()
+        return self._table
+
+    def __len__(self):
+        return len(self.table['onset'])
+
+    def __getattr__(self, name):
+        if name in ('dirnames', 'dir', 'stimid', 'onset', 'offset', 'frames', 'frame_offsets'):
+            return self.table[name]
+        raise AttributeError(name)
+
+    def _build(self):
+        inv = self.inventory
+        if inv is None:
+            inv = ExperimentInventory(self.pathname)
+        testdirs = self.testdirs
+        if testdirs is None:
+            binname = os.path.splitext(self.filename)[0] + '.npz'
+            testdirs = [d for d in inv.testdirs()
+                        if inv.isfile(os.path.join(self.pathname, d, self.filename))
+                        or inv.isfile(os.path.join(self.pathname, d, binname))]
+
+        options = dict(self.options)
+        options.setdefault('ErrorIfEmpty', False)
+        options['Inventory'] = inv
+
+        dirnames, dirs, ids, onsets, offsets, counts, frames = [], [], [], [], [], [], []
+        for d in testdirs:
+            dirname = os.path.join(self.pathname, d)
+            t0 = getstimdirectorytime(dirname, **options)
+            if np.isnan(t0):
+                continue
+            stimids, stimtimes, frametimes = read_stimtimes_txt(dirname, self.filename, inventory=inv)
+            n = len(stimids)
+            k = len(dirnames)
+            dirnames.append(d)
+
+            nf = np.array([len(f) for f in frametimes], dtype=np.int64)
+            fr = (np.concatenate(frametimes) if n else np.zeros(0)) + t0
+            on = np.asarray(stimtimes, dtype=float) + t0
+
+            # one frame interval: the median spacing of frames within a stimulus
+            within = np.diff(fr)[_within_mask(nf)]
+            dt = np.median(within) if len(within) else 0.0
+            off = np.append(on[1:], np.nan)
+            if len(fr):
+                last = np.maximum(np.cumsum(nf) - 1, 0)
+                off = np.where(nf > 0, fr[last] + dt, off)
+            if n and np.isnan(off[-1]):
+                durations = (off - on)[:-1]
+                durations = durations[durations > 0]
+                if len(durations):
+                    off[-1] = on[-1] + np.median(durations)
+
+            dirs.append(np.full(n, k, dtype=np.int64))
+            ids.append(np.asarray(stimids, dtype=float))
+            onsets.append(on)
+            offsets.append(off)
+            counts.append(nf)
+            frames.append(fr)
+
+        dirs = _cat(dirs, np.int64)
+        ids = _cat(ids)
+        onsets = _cat(onsets)
+        offsets = _cat(offsets)
+        counts = _cat(counts, np.int64)
+        frames = _cat(frames)
+
+        order = np.argsort(onsets, kind='stable')
+        old_offsets = np.concatenate(([0], np.cumsum(counts)))
+        counts = counts[order]
+        frame_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        # gather each presentation's frames in the new order
+        src = np.repeat(old_offsets[:-1][order] - frame_offsets[:-1], counts) + np.arange(frame_offsets[-1])
+
+        offsets = offsets[order]
+        # a directory's last stimulus with no duration to go by ends at the next onset
+        missing = np.isnan(offsets)
+        if missing.any():
+            nextonset = np.append(onsets[order][1:], np.nan)
+            offsets[missing] = nextonset[missing]
+            offsets = np.where(np.isnan(offsets), onsets[order], offsets)
+        return {
+            'dirnames': dirnames,
+            'dir': dirs[order],
+            'stimid': ids[order],
+            'onset': onsets[order],
+            'offset': offsets,
+            'frames': frames[src],
+            'frame_offsets': frame_offsets,
+            'maxduration': float(np.max(offsets - onsets[order])) if len(order) else 0.0,
+        }
+
+    def stimulus_at(self, t):
+        """
+        Returns the index of the presentation that was on at each time T (-1 if none)
+        """
+        tb = self.table
+        scalar = np.ndim(t) == 0
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        k = np.searchsorted(tb['onset'], t, side='right') - 1
+        on = k >= 0
+        on[on] = t[on] < tb['offset'][k[on]]
+        k = np.where(on, k, -1)
+        return int(k[0]) if scalar else k
+
+    def presentations_in(self, t0, t1):
+        """
+        Returns the indices of the presentations that overlap the window [T0, T1)
+        """
+        tb = self.table
+        lo = np.searchsorted(tb['onset'], t0 - tb['maxduration'], side='left')
+        hi = np.searchsorted(tb['onset'], t1, side='left')
+        k = np.arange(lo, hi)
+        return k[tb['offset'][k] > t0]
+
+    def frametimes(self, i):
+        """
+        Returns the absolute frame times of presentation I
+        """
+        tb = self.table
+        return tb['frames'][tb['frame_offsets'][i]:tb['frame_offsets'][i + 1]]
+
+
+def _cat(arrays, dtype=float):
+    return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+
+def _within_mask(nf):
+    # diffs between consecutive frames are within a stimulus except at the boundaries
+    n = int(nf.sum())
+    mask = np.ones(max(n - 1, 0), dtype=bool)
+    ends = np.cumsum(nf)[:-1] - 1
+    ends = ends[(ends >= 0) & (ends < len(mask))]
+    mask[ends] = False
+    return mask
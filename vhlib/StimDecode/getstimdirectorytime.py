@@ -1,5 +1,7 @@
 import os
 import numpy as np
+from .stimtiming_cache import resolve_stimtiming_cache
+from .experiment_inventory import inventory_isfile, inventory_stat
 
 def getstimdirectorytime(dirname, **kwargs):
     """
@@ -10,12 +12,18 @@ def getstimdirectorytime(dirname, **kwargs):
         WarnOnEarlyMorning (bool, default True)
         EarlyMorningCutOffTime (float, default 5)
         ErrorIfEmpty (bool, default True)
+        Cache (StimTimingCache, default None): cache for the parsed filetime.txt;
+            None uses the process-wide cache and False re-reads the file
+        Inventory (ExperimentInventory, default None): answers the file existence
+            checks from memory instead of the file system
     :return: time in seconds since midnight on the first day of the experiment
     """
 
     error_if_empty = kwargs.get('ErrorIfEmpty', True)
     early_morning_cutoff_time = kwargs.get('EarlyMorningCutOffTime', 5)
     warn_on_early_morning = kwargs.get('WarnOnEarlyMorning', True)
+    cache = resolve_stimtiming_cache(kwargs.get('Cache', None))
+    inventory = kwargs.get('Inventory', None)
 
     time_val = np.nan
 
@@ -32,11 +40,14 @@ def getstimdirectorytime(dirname, **kwargs):
     # if exist(fname1)==2&exist(fname2)==2&exist(fname3)==2
     # This condition is quite strict. All 3 files must exist.
 
-    if os.path.isfile(fname1) and os.path.isfile(fname2) and os.path.isfile(fname3):
+    if inventory_isfile(inventory, fname1) and inventory_isfile(inventory, fname2) and inventory_isfile(inventory, fname3):
         try:
-            with open(fname3, 'r') as f:
-                content = f.read().strip()
-                time_val = float(content)
+            if cache is None:
+                time_val = _read_filetime(fname3)
+            else:
+                # a single number is cheaper to re-parse than to load from a sidecar
+                time_val = cache.get(fname3, 'filetime_txt', lambda: _read_filetime(fname3), sidecar=False,
+                                     stat=inventory_stat(inventory, fname3))
         except ValueError:
             if error_if_empty:
                 raise ValueError(f"Could not read time from {fname3}")
@@ -55,3 +66,8 @@ def getstimdirectorytime(dirname, **kwargs):
             raise FileNotFoundError(f"No time information found for directory {dirname} (requires stims.mat, spike2data.smr, and filetime.txt).")
 
     return time_val
+
+def _read_filetime(filename):
+    with open(filename, 'r') as f:
+        content = f.read().strip()
+    return float(content)
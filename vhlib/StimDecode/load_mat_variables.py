@@ -0,0 +1,50 @@
+import numpy as np
+
+def load_mat_variables(filepath, variable_names):
+    """
+    Load only the named variables from a MATLAB MAT file
+
+    Like MATLAB's load(FILEPATH, VARIABLE_NAMES{:}, '-mat'), variables that are not
+    requested are skipped rather than read. Both v5 MAT files (read with scipy.io)
+    and v7.3 MAT files (HDF5, read with h5py if it is installed) are supported.
+
+    :param filepath: full path of the MAT file
+    :param variable_names: list of variable names to load
+    :return: dictionary of the requested variables that are present in the file
+    :raises IOError: if the file cannot be read as a MAT file
+    """
+
+    variable_names = list(variable_names)
+
+    try:
+        from scipy.io import loadmat
+        from scipy.io.matlab import MatReadError
+    except ImportError:
+        raise NotImplementedError("scipy is required to read MAT files")
+
+    try:
+        data = loadmat(filepath, variable_names=variable_names)
+    except NotImplementedError:
+        # scipy does not read v7.3 files, which are HDF5 files
+        return _load_mat73_variables(filepath, variable_names)
+    except (MatReadError, OSError, ValueError, TypeError) as e:
+        raise IOError(f"Could not read MAT file {filepath}: {e}")
+
+    return {k: data[k] for k in variable_names if k in data}
+
+def _load_mat73_variables(filepath, variable_names):
+    try:
+        import h5py
+    except ImportError:
+        raise IOError(f"{filepath} is a MATLAB v7.3 file; h5py is required to read it.")
+
+    out = {}
+    try:
+        with h5py.File(filepath, 'r') as f:
+            for k in variable_names:
+                if k in f and isinstance(f[k], h5py.Dataset):
+                    # MATLAB writes arrays column-major; HDF5 sees them transposed
+                    out[k] = np.asarray(f[k][()]).T
+    except OSError as e:
+        raise IOError(f"Could not read MAT file {filepath}: {e}")
+    return out
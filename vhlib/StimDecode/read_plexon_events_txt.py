@@ -1,6 +1,9 @@
 import os
 import numpy as np
-from vlt.file.custom_struct_io import loadStructArray
+try:
+    from vlt.file.custom_struct_io import loadStructArray
+except ImportError:
+    def loadStructArray(filename): raise NotImplementedError("vlt.file.custom_struct_io.loadStructArray missing")
 
 def read_plexon_events_txt(filename):
     """
@@ -1,12 +1,11 @@
 import os
 import numpy as np
 from .read_plexon_events_txt import read_plexon_events_txt
-try:
-    from vlt.file.dirstruct import _load_mat_file
-except ImportError:
-    def _load_mat_file(filepath): raise NotImplementedError("vlt.file.dirstruct._load_mat_file missing")
+from .stimtiming_cache import resolve_stimtiming_cache
+from .experiment_inventory import inventory_isfile, inventory_stat
+from .load_mat_variables import load_mat_variables
 
-def read_stimtimes_plexon_txt(dirname):
+def read_stimtimes_plexon_txt(dirname, cache=None, inventory=None):
     """
     Interpret the stimtimes.txt file written by VH lab Spike2
 
@@ -15,6 +14,9 @@ def read_stimtimes_plexon_txt(dirname):
     needed).
 
     :param dirname: Directory name.
+    :param cache: StimTimingCache to use; None uses the process-wide cache and False
+                  re-reads the file (see STIMTIMINGCACHE)
+    :param inventory: optional ExperimentInventory used to answer existence checks
     :return: tuple (stimids, stimtimes, frametimes)
              stimids: vector containing the stim id of each stimulus presentation.
              stimtimes: vector with the time of stimulus onset.
@@ -24,27 +26,44 @@ def read_stimtimes_plexon_txt(dirname):
     fname = 'stimtimes_plexon.txt'
     fname_alt = 'stimtimes_plexon.mat'
 
+    has_alt = inventory_isfile(inventory, os.path.join(dirname, fname_alt))
+
+    cache = resolve_stimtiming_cache(cache)
+    if cache is None:
+        return _parse_stimtimes_plexon(dirname, fname, fname_alt, has_alt)
+
+    source = os.path.join(dirname, fname_alt if has_alt else fname)
+    return cache.get(source, 'stimtimes_plexon',
+                     lambda: _parse_stimtimes_plexon(dirname, fname, fname_alt, has_alt),
+                     stat=inventory_stat(inventory, source))
+
+def _parse_stimtimes_plexon(dirname, fname, fname_alt, has_alt):
     gotit = 0
     events = None
 
-    if os.path.exists(os.path.join(dirname, fname_alt)):
+    if has_alt:
+        matfile = os.path.join(dirname, fname_alt)
         try:
-            # Load specific variables
             # events = load([dirname filesep fname_alt],'FrameTrigger','StimulusTrigger','Strobed','-mat');
-            # _load_mat_file loads all variables.
-            events = _load_mat_file(os.path.join(dirname, fname_alt))
+            events = load_mat_variables(matfile, ['FrameTrigger', 'StimulusTrigger', 'Strobed'])
+        except IOError as e:
+            if not os.path.isfile(os.path.join(dirname, fname)):
+                raise IOError(f"Could not read {fname_alt} in {dirname}, and there is no {fname} to fall back on: {e}")
+            print(f"Warning: {e}; reading {fname} instead.")
+        else:
+            for k in ['FrameTrigger', 'StimulusTrigger']:
+                if k in events:
+                    events[k] = np.asarray(events[k], dtype=float).ravel()
             # events.stimid = events.Strobed(:,2);
-            # Check if Strobed exists and is 2D array
             if 'Strobed' in events:
-                strobed = events['Strobed']
-                # strobed might be numpy array.
+                strobed = np.asarray(events['Strobed'])
                 if len(strobed.shape) > 1 and strobed.shape[1] >= 2:
                     events['stimid'] = strobed[:, 1]
+                elif strobed.size == 0:
+                    events['stimid'] = np.array([])
                 else:
-                    events['stimid'] = np.array([]) # Or handle error
+                    raise IOError(f"Strobed in {matfile} does not have the expected 2 columns (time, value).")
             gotit = 1
-        except Exception:
-            pass
 
     if not gotit:
         events = read_plexon_events_txt(os.path.join(dirname, fname))
@@ -1,20 +1,43 @@
 import os
 import numpy as np
+from .stimtiming_cache import resolve_stimtiming_cache
+from .experiment_inventory import inventory_stat
+from .stimtimes_npz import stimtimes_npz_filename, read_stimtimes_npz
 
-def read_stimtimes_txt(dirname, filename='stimtimes.txt'):
+def read_stimtimes_txt(dirname, filename='stimtimes.txt', cache=None, inventory=None, use_binary=True):
     """
     Interpret the stimtimes.txt file written by VH lab Spike2
 
     :param dirname: Directory path
     :param filename: Filename (default 'stimtimes.txt')
+    :param cache: StimTimingCache to use; None uses the process-wide cache and False
+                  re-reads the file (see STIMTIMINGCACHE)
+    :param inventory: optional ExperimentInventory used to answer existence checks
+    :param use_binary: if True (default), read the binary companion file (e.g., 'stimtimes.npz')
+                       instead when it exists and is at least as new as the text file
     :return: tuple (stimids, stimtimes, frametimes)
     """
 
     filepath = os.path.join(dirname, filename)
 
-    if not os.path.isfile(filepath):
+    st = inventory_stat(inventory, filepath)
+
+    if use_binary:
+        binpath = stimtimes_npz_filename(filepath)
+        st_bin = inventory_stat(inventory, binpath)
+        if st_bin is not None and (st is None or st_bin[1] >= st[1]):
+            return read_stimtimes_npz(binpath)
+
+    if st is None:
         raise IOError(f"Could not open file {filename} in directory {dirname}.")
 
+    cache = resolve_stimtiming_cache(cache)
+    if cache is None:
+        return _parse_stimtimes_txt(filepath)
+    return cache.get(filepath, 'stimtimes_txt', lambda: _parse_stimtimes_txt(filepath),
+                     stat=st)
+
+def _parse_stimtimes_txt(filepath):
     stimids = []
     stimtimes = []
     frametimes = []
@@ -8,7 +8,7 @@ except ImportError:
 from .read_stimtimes_txt import read_stimtimes_txt
 from .write_stimtimes_txt import write_stimtimes_txt # To be implemented
 
-def repairoverflow_stimtimes_txt(dirname, skiplineafteroverflow=0, stimtimes_file='stimtimes.txt', stims_mat_file='stims.mat', goodframes=10):
+def repairoverflow_stimtimes_txt(dirname, skiplineafteroverflow=0, stimtimes_file='stimtimes.txt', stims_mat_file='stims.mat', goodframes=10, verbose=False):
     """
     Repair stimtimes.txt file where numstims > 255
 
@@ -17,6 +17,8 @@ def repairoverflow_stimtimes_txt(dirname, skiplineafteroverflow=0, stimtimes_fil
     :param stimtimes_file: Filename for stimtimes (default 'stimtimes.txt')
     :param stims_mat_file: Filename for stims.mat (default 'stims.mat')
     :param goodframes: Number of frames in a proper stimulus (default 10)
+    :param verbose: if True, print a status line for every stimulus (default False)
+    :return: repair report dictionary (see ALIGN_DISPLAY_ORDER)
     """
 
     fout = 'stimtimes_repaired.txt'
@@ -33,13 +35,6 @@ def repairoverflow_stimtimes_txt(dirname, skiplineafteroverflow=0, stimtimes_fil
     # [stimids,stimtimes,frametimes] = read_stimtimes_txt(dirname,stimtimes_file);
     stimids, stimtimes, frametimes = read_stimtimes_txt(dirname, stimtimes_file)
 
-    stimtimes_entry = 0 # 0-based index
-    i = 0 # 0-based
-
-    stimids_new = []
-    stimtimes_new = []
-    frametimes_new = []
-
     # do = getDisplayOrder(saveScript);
     # Asssuming saveScript is in stims_data
     if 'saveScript' in stims_data:
@@ -81,29 +76,105 @@ def repairoverflow_stimtimes_txt(dirname, skiplineafteroverflow=0, stimtimes_fil
         # Fallback?
         raise NotImplementedError("getDisplayOrder functionality missing")
 
-    print(f"Total stims to display: {len(do)}.")
-
-    while i < len(do):
-        print(f"displayorder: {i+1} stimtimes line#: {stimtimes_entry+1} "
-              f"stimshouldbe: {do[i]} stimis: {stimids[stimtimes_entry]} "
-              f"stimtime: {stimtimes[stimtimes_entry]}")
+    report = align_display_order(do, stimids, stimtimes, frametimes, goodframes, skiplineafteroverflow)
 
-        recordthisentry = 1
-        if len(frametimes[stimtimes_entry]) < goodframes:
-            print('hmmm, a mismatch we did not expect')
-            recordthisentry = 0
+    if verbose:
+        _print_report(report, stimids, stimtimes)
 
-        if recordthisentry:
-            stimids_new.append(do[i])
-            stimtimes_new.append(stimtimes[stimtimes_entry])
-            frametimes_new.append(frametimes[stimtimes_entry][:goodframes])
+    e = report['entry_for_display']
+    frametimes_new = [frametimes[k][:goodframes] for k in e]
 
-        stimtimes_entry += 1
+    write_stimtimes_txt(dirname, report['stimids'], stimtimes[e], frametimes_new, fout)
+    report['filename'] = os.path.join(dirname, fout)
 
-        if skiplineafteroverflow and recordthisentry and (do[i] >= 255):
-            stimtimes_entry += 1
+    return report
 
-        if recordthisentry:
-            i += 1
+def align_display_order(do, stimids, stimtimes, frametimes, goodframes=10, skiplineafteroverflow=0):
+    """
+    Align stimtimes.txt entries with the stimulus display order
+
+    Entries with fewer than GOODFRAMES frames are dropped. If SKIPLINEAFTEROVERFLOW
+    is true, the entry that follows each kept entry whose stimulus id is 255 or
+    greater is also dropped. The remaining entries are matched, in order, with the
+    display order DO.
+
+    :param do: display order (stimulus ids) from the stimulus script
+    :param stimids: stimulus ids read from stimtimes.txt
+    :param stimtimes: stimulus onset times read from stimtimes.txt
+    :param frametimes: list of frame time arrays read from stimtimes.txt
+    :param goodframes: number of frames in a proper stimulus (default 10)
+    :param skiplineafteroverflow: 1 if an extra line follows each overflowed stimulus
+    :return: dictionary with fields
+             stimids: the display order (the repaired stimulus ids)
+             entry_for_display: stimtimes entry used for each display position
+             recorded_stimids: stimulus ids recorded for those entries
+             framecounts: number of frames of every stimtimes entry
+             kept: boolean mask of the stimtimes entries that were kept
+             dropped_short: entries dropped for having fewer than GOODFRAMES frames
+             dropped_overflow: entries dropped because they followed an overflow
+             unused: trailing entries after the end of the display order
+    """
 
-    write_stimtimes_txt(dirname, stimids_new, stimtimes_new, frametimes_new, fout)
+    do = np.asarray(do).ravel()
+    stimids = np.asarray(stimids)
+    n_display = len(do)
+    n_entries = len(stimids)
+
+    framecounts = np.fromiter((len(f) for f in frametimes), dtype=np.int64, count=len(frametimes))
+    good = framecounts >= goodframes
+    g = np.flatnonzero(good)
+
+    # When entry x is kept for an overflowed stimulus, entry x+1 is skipped. If x+1
+    # would have been dropped anyway this changes nothing; if it is good, it uses up
+    # one good entry. Only the overflowed display positions need this decision, so
+    # the walk below visits those alone and the rest is done on whole arrays.
+    adjacent = np.zeros(len(g), dtype=bool)
+    adjacent[:-1] = g[1:] == g[:-1] + 1
+    consumed = np.zeros(n_display, dtype=np.int64)
+    overflow = np.flatnonzero(do >= 255) if skiplineafteroverflow else np.array([], dtype=np.int64)
+    shift = 0
+    for j in overflow:
+        p = j + shift
+        if p >= len(g):
+            break
+        if adjacent[p]:
+            consumed[j] = 1
+            shift += 1
+
+    pos = np.arange(n_display) + np.cumsum(consumed) - consumed
+    if n_display and pos[-1] >= len(g):
+        raise ValueError(f"Only {len(g)} usable stimtimes entries were found for {n_display} displayed stimuli.")
+    entry = g[pos]
+
+    skipped = entry[overflow] + 1
+    skipped = skipped[skipped < n_entries]
+    last = max(entry[-1] if n_display else -1, skipped[-1] if len(skipped) else -1)
+
+    kept = np.zeros(n_entries, dtype=bool)
+    kept[entry] = True
+    overflow_mask = np.zeros(n_entries, dtype=bool)
+    overflow_mask[skipped] = True
+    short = ~good
+    short[last + 1:] = False
+    short &= ~overflow_mask
+
+    return {
+        'stimids': do,
+        'entry_for_display': entry,
+        'recorded_stimids': stimids[entry],
+        'framecounts': framecounts,
+        'kept': kept,
+        'dropped_short': np.flatnonzero(short),
+        'dropped_overflow': skipped,
+        'unused': np.arange(last + 1, n_entries),
+    }
+
+def _print_report(report, stimids, stimtimes):
+    do = report['stimids']
+    e = report['entry_for_display']
+    lines = [f"Total stims to display: {len(do)}."]
+    lines += [f"displayorder: {i+1} stimtimes line#: {k+1} stimshouldbe: {d} stimis: {s} stimtime: {t}"
+              for i, (k, d, s, t) in enumerate(zip(e, do, stimids[e], np.asarray(stimtimes)[e]))]
+    lines += [f"stimtimes line#: {k+1} has {report['framecounts'][k]} frames; dropped" for k in report['dropped_short']]
+    lines += [f"stimtimes line#: {k+1} follows an overflowed stimulus; dropped" for k in report['dropped_overflow']]
+    print('\n'.join(lines))
@@ -0,0 +1,79 @@
+import numpy as np
+
+def snap_frames_to_refresh(frametimes, refreshtimes, refreshes_per_frame=None):
+    """
+    Snap stimulus frame times to the vertical refresh of the stimulus monitor
+
+    Each frame time (e.g., FrameTriggerRaw or FrameTrigger from VHINTERCONNECT_DECODE)
+    is moved to the nearest preceding vertical refresh (StimulusMonitorVerticalRefresh),
+    using one searchsorted call. Frames that land on the same refresh as the previous
+    frame are flagged as duplicated, and refreshes skipped between consecutive frames
+    of the same stimulus are counted as dropped. Frames before the first refresh
+    cannot be snapped; they keep their measured time and are flagged as unmatched.
+
+    :param frametimes: array of frame times, or a list of arrays of frame times (one
+                       per stimulus, as FrameTrigger); frames must be in increasing order
+    :param refreshtimes: array of vertical refresh times, in increasing order
+    :param refreshes_per_frame: number of refreshes each frame is expected to last
+                                (default: the median number observed)
+    :return: dictionary with fields
+             snapped: frame times moved to the preceding refresh (the measured time for
+                 unmatched frames); a list of arrays if FRAMETIMES was a list
+             latency: frame time minus the refresh time, for each frame (NaN if unmatched)
+             unmatched: boolean, True for frames before the first refresh
+             refresh_index: index of the refresh each frame was snapped to (-1 if none)
+             duplicated: boolean, True for frames on the same refresh as the previous frame
+             dropped: number of refreshes missing before each frame (0 for the first
+                 frame of each stimulus)
+             refreshes_per_frame: the expected number of refreshes per frame
+             offsets: frames of stimulus i are entries offsets[i]:offsets[i+1]
+    """
+
+    refreshtimes = np.asarray(refreshtimes, dtype=float).ravel()
+
+    is_list = isinstance(frametimes, list)
+    if is_list:
+        parts = [np.asarray(f, dtype=float).ravel() for f in frametimes]
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in parts], out=offsets[1:])
+        frames = np.concatenate(parts) if parts else np.zeros(0)
+    else:
+        frames = np.asarray(frametimes, dtype=float).ravel()
+        offsets = np.array([0, len(frames)], dtype=np.int64)
+
+    k = np.searchsorted(refreshtimes, frames, side='right') - 1
+    valid = k >= 0
+    snapped = frames.copy()
+    snapped[valid] = refreshtimes[k[valid]]
+    latency = np.where(valid, frames - snapped, np.nan)
+    k[~valid] = -1
+
+    # steps between consecutive frames, within a stimulus only
+    step = np.diff(k)
+    within = np.ones(len(step), dtype=bool)
+    boundaries = offsets[1:-1] - 1
+    within[boundaries[(boundaries >= 0) & (boundaries < len(step))]] = False
+    within &= valid[1:] & valid[:-1]
+
+    if refreshes_per_frame is None:
+        positive = step[within & (step > 0)]
+        refreshes_per_frame = int(np.median(positive)) if len(positive) else 1
+
+    duplicated = np.zeros(len(frames), dtype=bool)
+    duplicated[1:] = within & (step == 0)
+    dropped = np.zeros(len(frames), dtype=np.int64)
+    dropped[1:] = np.where(within, np.maximum(step - refreshes_per_frame, 0), 0)
+
+    if is_list:
+        snapped = np.split(snapped, offsets[1:-1])
+
+    return {
+        'snapped': snapped,
+        'latency': latency,
+        'refresh_index': k,
+        'unmatched': ~valid,
+        'duplicated': duplicated,
+        'dropped': dropped,
+        'refreshes_per_frame': refreshes_per_frame,
+        'offsets': offsets,
+    }
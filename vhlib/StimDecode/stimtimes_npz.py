@@ -0,0 +1,110 @@
+import os
+import numpy as np
+
+STIMTIMES_NPZ_VERSION = 1
+
+
+def stimtimes_npz_filename(filepath):
+    """
+    Returns the binary companion file name of a stimtimes text file
+
+    For example, 'stimtimes.txt' -> 'stimtimes.npz'.
+    """
+    return os.path.splitext(filepath)[0] + '.npz'
+
+
+def write_stimtimes_npz(dirname, stimids, stimtimes, frametimes=None, filename='stimtimes.npz'):
+    """
+    Writes stimulus timing in the binary stimtimes.npz format
+
+    The file holds the arrays 'stimids', 'stimtimes', 'frames' (all frame times,
+    concatenated) and 'offsets' (frame times of stimulus i are
+    frames[offsets[i]:offsets[i+1]]), all at full float64 precision.
+
+    :param dirname: Directory path
+    :param stimids: list of stim ids
+    :param stimtimes: list of stim times
+    :param frametimes: list of frame times (list of arrays/lists), or None
+    :param filename: Filename (default 'stimtimes.npz')
+    """
+
+    filepath = os.path.join(dirname, filename)
+
+    if os.path.isfile(filepath):
+        raise IOError(f"Could not write {filename}; file already exists in {dirname}.")
+
+    stimids = np.asarray(stimids, dtype=float).ravel()
+    stimtimes = np.asarray(stimtimes, dtype=float).ravel()
+
+    if frametimes is None:
+        frames = np.array([], dtype=float)
+        offsets = np.zeros(len(stimids) + 1, dtype=np.int64)
+    else:
+        fts = [np.asarray(f, dtype=float).ravel() for f in frametimes]
+        offsets = np.zeros(len(fts) + 1, dtype=np.int64)
+        np.cumsum([len(f) for f in fts], out=offsets[1:])
+        frames = np.concatenate(fts) if fts else np.array([], dtype=float)
+
+    if len(stimtimes) != len(stimids) or len(offsets) != len(stimids) + 1:
+        raise ValueError("stimids, stimtimes, and frametimes must have the same number of entries.")
+
+    with open(filepath, 'wb') as f:
+        np.savez(f, version=np.array(STIMTIMES_NPZ_VERSION), stimids=stimids,
+                 stimtimes=stimtimes, frames=frames, offsets=offsets)
+
+
+def read_stimtimes_npz(filepath):
+    """
+    Reads a binary stimtimes.npz file
+
+    :param filepath: full path of the file
+    :return: tuple (stimids, stimtimes, frametimes), as READ_STIMTIMES_TXT
+    """
+
+    try:
+        with np.load(filepath, allow_pickle=False) as z:
+            version = int(z['version'])
+            if version > STIMTIMES_NPZ_VERSION:
+                raise IOError(f"{filepath} has unsupported version {version}.")
+            stimids = z['stimids']
+            stimtimes = z['stimtimes']
+            frames = z['frames']
+            offsets = z['offsets']
+    except (KeyError, ValueError) as e:
+        raise IOError(f"error in {filepath}: {e}")
+
+    frametimes = np.split(frames, offsets[1:-1]) if len(offsets) > 1 else []
+
+    return stimids, stimtimes, frametimes
+
+
+def convert_stimtimes_txt(dirname, filenames=('stimtimes.txt', 'stimontimes.txt'), overwrite=False):
+    """
+    Write binary companions for the stimtimes text files in a directory
+
+    Each text file in FILENAMES that exists in DIRNAME is parsed and written as
+    '<name>.npz'. Times converted from text keep the 5 decimals of the text file.
+
+    :param dirname: Directory path
+    :param filenames: text files to convert (default 'stimtimes.txt' and 'stimontimes.txt')
+    :param overwrite: if True, replace existing binary files (default False)
+    :return: list of the binary files that were written
+    """
+
+    from .read_stimtimes_txt import read_stimtimes_txt
+
+    written = []
+    for fname in filenames:
+        if not os.path.isfile(os.path.join(dirname, fname)):
+            continue
+        binname = stimtimes_npz_filename(fname)
+        binpath = os.path.join(dirname, binname)
+        if os.path.isfile(binpath):
+            if not overwrite:
+                continue
+            os.remove(binpath)
+        stimids, stimtimes, frametimes = read_stimtimes_txt(dirname, fname, cache=False, use_binary=False)
+        write_stimtimes_npz(dirname, stimids, stimtimes, frametimes, binname)
+        written.append(binpath)
+
+    return written
@@ -0,0 +1,228 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+SIDECAR_SUFFIX = '.vhcache.npz'
+
+
+class StimTimingCache:
+    """
+    Cache of parsed stimulus timing files
+
+    Parsed results are keyed on the source file's path, size and modification
+    time (and, optionally, a hash of its contents). Results are kept in an
+    in-process LRU that is bounded by the number of bytes held. A cache created with
+    SIDECAR=True also writes them to a sidecar binary file next to the source
+    ('<source>.vhcache.npz') so that later processes do not need to re-parse the
+    text; this writes into the data directories, so it is off by default. Entries
+    are invalidated automatically whenever the source file changes.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, sidecar=False, content_hash=False):
+        """
+        CACHE = STIMTIMINGCACHE(MAX_BYTES, SIDECAR, CONTENT_HASH)
+
+        :param max_bytes: maximum number of bytes of parsed data kept in memory
+        :param sidecar: if True, read and write sidecar cache files next to the sources
+                        (default False)
+        :param content_hash: if True, include a hash of the file contents in the key
+        """
+        self.max_bytes = max_bytes
+        self.sidecar = sidecar
+        self.content_hash = content_hash
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def fingerprint(self, filepath, stat=None):
+        """
+        Returns the (size, mtime_ns, digest) fingerprint of FILEPATH
+
+        DIGEST is an empty string unless the cache was created with CONTENT_HASH.
+        If STAT is a known (size, mtime_ns) tuple (e.g., from an ExperimentInventory),
+        the file is not stat'ed again.
+        """
+        if stat is None:
+            st = os.stat(filepath)
+            stat = (st.st_size, st.st_mtime_ns)
+        digest = ''
+        if self.content_hash:
+            h = hashlib.blake2b(digest_size=16)
+            with open(filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        return (stat[0], stat[1], digest)
+
+    def get(self, filepath, kind, loader, sidecar=None, stat=None):
+        """
+        Returns the parsed contents of FILEPATH, calling LOADER only if needed
+
+        :param filepath: full path of the source file
+        :param kind: a string naming the parser (several parsers may read one file)
+        :param loader: function of no arguments that parses the file; it should return
+                       a tuple of numpy arrays, lists of numpy arrays, or scalars
+        :param sidecar: override the cache's SIDECAR setting for this call
+        :param stat: (size, mtime_ns) of FILEPATH if already known
+        :return: the value returned by LOADER (fresh copies on each call)
+        """
+        if sidecar is None:
+            sidecar = self.sidecar
+        filepath = os.path.abspath(filepath)
+        fp = self.fingerprint(filepath, stat)
+        key = (filepath, kind)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fp:
+                self._entries.move_to_end(key)
+                return _unpack(entry[1])
+
+        packed = None
+        if sidecar:
+            packed = _read_sidecar(filepath, kind, fp)
+        if packed is None:
+            packed = _pack(loader())
+            if sidecar:
+                _write_sidecar(filepath, kind, fp, packed)
+
+        self._store(key, fp, packed)
+        return _unpack(packed)
+
+    def invalidate(self, filepath=None):
+        """
+        Drops in-memory entries for FILEPATH (or all entries if FILEPATH is None)
+        """
+        with self._lock:
+            if filepath is None:
+                self._entries.clear()
+                self._nbytes = 0
+                return
+            filepath = os.path.abspath(filepath)
+            for key in [k for k in self._entries if k[0] == filepath]:
+                self._nbytes -= _nbytes(self._entries.pop(key)[1])
+
+    def clear(self):
+        """
+        Drops all in-memory entries
+        """
+        self.invalidate()
+
+    def _store(self, key, fp, packed):
+        size = _nbytes(packed)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= _nbytes(old[1])
+            self._entries[key] = (fp, packed)
+            self._nbytes += size
+            while self._nbytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= _nbytes(evicted)
+
+
+_default_cache = StimTimingCache()
+
+
+def get_stimtiming_cache():
+    """
+    Returns the process-wide StimTimingCache used by the StimDecode readers
+
+    The process-wide cache keeps parsed files in memory only; to share them between
+    processes through sidecar files, pass CACHE=StimTimingCache(sidecar=True) to the
+    readers.
+    """
+    return _default_cache
+
+
+def resolve_stimtiming_cache(cache):
+    """
+    Interpret a CACHE argument of the StimDecode readers
+
+    None or True selects the process-wide cache, False disables caching, and a
+    StimTimingCache object is used as given.
+    """
+    if cache is None or cache is True:
+        return _default_cache
+    if cache is False:
+        return None
+    if not isinstance(cache, StimTimingCache):
+        raise ValueError("cache must be None, True, False, or a StimTimingCache.")
+    return cache
+
+
+def sidecar_filename(filepath):
+    """
+    Returns the name of the sidecar cache file for FILEPATH
+    """
+    return filepath + SIDECAR_SUFFIX
+
+
+def _pack(value):
+    """
+    Pack a tuple of arrays, ragged lists of arrays, and scalars into a dict of arrays
+    """
+    if not isinstance(value, tuple):
+        value = (value,)
+    packed = {'nitems': np.array(len(value))}
+    for i, item in enumerate(value):
+        if isinstance(item, list):
+            items = [np.asarray(x, dtype=float).ravel() for x in item]
+            lengths = np.array([len(x) for x in items], dtype=np.int64)
+            offsets = np.zeros(len(items) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            packed[f'v{i}_data'] = np.concatenate(items) if items else np.array([], dtype=float)
+            packed[f'v{i}_offsets'] = offsets
+        else:
+            packed[f'v{i}'] = np.asarray(item)
+    return packed
+
+
+def _unpack(packed):
+    n = int(packed['nitems'])
+    out = []
+    for i in range(n):
+        if f'v{i}_offsets' in packed:
+            data = packed[f'v{i}_data'].copy()
+            offsets = packed[f'v{i}_offsets']
+            out.append(np.split(data, offsets[1:-1]) if len(offsets) > 1 else [])
+        else:
+            v = packed[f'v{i}']
+            out.append(v.item() if v.ndim == 0 else v.copy())
+    return out[0] if n == 1 else tuple(out)
+
+
+def _nbytes(packed):
+    return sum(v.nbytes for v in packed.values())
+
+
+def _read_sidecar(filepath, kind, fp):
+    fname = sidecar_filename(filepath)
+    try:
+        with np.load(fname, allow_pickle=False) as z:
+            if (str(z['kind']) != kind or int(z['size']) != fp[0]
+                    or int(z['mtime_ns']) != fp[1] or str(z['digest']) != fp[2]):
+                return None
+            return {k: z[k] for k in z.files if k not in ('kind', 'size', 'mtime_ns', 'digest')}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_sidecar(filepath, kind, fp, packed):
+    fname = sidecar_filename(filepath)
+    tmpname = f"{fname}.{os.getpid()}.tmp"
+    try:
+        with open(tmpname, 'wb') as f:
+            np.savez(f, kind=np.array(kind), size=np.array(fp[0]),
+                     mtime_ns=np.array(fp[1]), digest=np.array(fp[2]), **packed)
+        os.replace(tmpname, fname)
+    except OSError:
+        # read-only archives simply go without a sidecar
+        try:
+            os.remove(tmpname)
+        except OSError:
+            pass
@@ -0,0 +1,60 @@
+import numpy as np
+
+def twophoton_stim_frames(frametimes, stimonsets, stimoffsets=None, stimids=None):
+    """
+    Map two-photon frames to the stimulus presentations they fall in
+
+    Uses searchsorted in both directions, so the cost is O((n+m) log(n+m)) for
+    n frames and m stimuli. Stimulus presentations are assumed not to overlap.
+
+    :param frametimes: array of two-photon frame times (e.g., from 'twophotontimes.txt'),
+                       in increasing order
+    :param stimonsets: array of stimulus onset times, in increasing order
+    :param stimoffsets: array of stimulus offset times (default: each stimulus lasts
+                        until the next onset, and the last one until the last frame)
+    :param stimids: optional array of the stimulus id of each presentation
+    :return: dictionary with fields
+             first: index of the first frame of each stimulus
+             stop: one past the index of the last frame of each stimulus; the frames
+                 of stimulus i are frametimes[first[i]:stop[i]]
+             nframes: number of frames in each stimulus
+             frame_stim: for each frame, the index of the stimulus presentation it
+                 falls in, or -1 if none
+             frame_stimid: (only if STIMIDS is given) for each frame, the stimulus id
+                 it falls in, or NaN if none
+    """
+
+    frametimes = np.asarray(frametimes, dtype=float).ravel()
+    stimonsets = np.asarray(stimonsets, dtype=float).ravel()
+
+    if stimoffsets is None:
+        stimoffsets = np.append(stimonsets[1:], np.inf)
+    else:
+        stimoffsets = np.asarray(stimoffsets, dtype=float).ravel()
+        if len(stimoffsets) != len(stimonsets):
+            raise ValueError("stimonsets and stimoffsets must have the same length.")
+        if np.any(stimoffsets < stimonsets):
+            raise ValueError("Each stimulus offset must be at or after its onset.")
+
+    first = np.searchsorted(frametimes, stimonsets, side='left')
+    stop = np.maximum(np.searchsorted(frametimes, stimoffsets, side='left'), first)
+
+    k = np.searchsorted(stimonsets, frametimes, side='right') - 1
+    inside = k >= 0
+    inside[inside] = frametimes[inside] < stimoffsets[k[inside]]
+    frame_stim = np.where(inside, k, -1)
+
+    out = {
+        'first': first,
+        'stop': stop,
+        'nframes': stop - first,
+        'frame_stim': frame_stim,
+    }
+
+    if stimids is not None:
+        stimids = np.asarray(stimids, dtype=float).ravel()
+        if len(stimids) != len(stimonsets):
+            raise ValueError("stimids and stimonsets must have the same length.")
+        out['frame_stimid'] = np.where(inside, stimids[np.maximum(k, 0)] if len(stimids) else np.nan, np.nan)
+
+    return out
@@ -1,5 +1,81 @@
+import os
+import numpy as np
+from .read_stimtimes_txt import read_stimtimes_txt
+
 def vhlabcorrectmti(mti, filename, globaltime=0):
     """
     Correct NewStim MTI based on recorded times
+
+    The stimulus presentations in the MTI (measured timing information from the
+    stimulus computer) are matched, in order, with the entries of the stimtimes.txt
+    file recorded by the acquisition system. The clock offset and drift between the
+    two computers are fit with one least-squares solve over all matched onsets and
+    frames, and the correction is applied to every time in the MTI at once.
+
+    :param mti: list of MTI records (dictionaries) with fields 'stimid',
+                'startStopTimes' (4 times: background start, stimulus start, stimulus
+                stop, background stop) and 'frameTimes' (array), in stimulus computer time
+    :param filename: full path of the stimtimes.txt file
+    :param globaltime: if 0 (default), the corrected times are in the time base of the
+                       recording; if 1, STARTTIME is added so that they are in the time
+                       base of the stimulus computer, with drift removed
+    :return: tuple (mti2, starttime); MTI2 is a corrected copy of MTI, and STARTTIME is
+             the stimulus computer time at time 0 of the recording
     """
-    raise NotImplementedError("vhlabcorrectmti depends on stimscript/mti objects not fully ported.")
+
+    dirname, fname = os.path.split(filename)
+    stimids, stimtimes, frametimes = read_stimtimes_txt(dirname, fname)
+
+    n = len(mti)
+    if len(stimids) != n:
+        raise ValueError(f"MTI has {n} stimulus presentations but {filename} has {len(stimids)}.")
+
+    mti_ids = np.array([m['stimid'] for m in mti], dtype=float)
+    # only the low 8 bits of the stimulus id are transmitted to the acquisition system
+    mismatch = np.flatnonzero(np.mod(mti_ids, 256) != np.mod(stimids, 256))
+    if len(mismatch):
+        i = mismatch[0]
+        raise ValueError(f"Stimulus {i+1} is id {mti_ids[i]:g} in the MTI but {stimids[i]:g} in {filename}.")
+
+    ss = np.array([np.asarray(m['startStopTimes'], dtype=float).ravel() for m in mti]).reshape(n, -1)
+    mti_frames, mti_offsets = _flatten([m['frameTimes'] for m in mti])
+    rec_frames, rec_offsets = _flatten(frametimes)
+
+    # pair the first min(n_mti, n_recorded) frames of each stimulus
+    nmatch = np.minimum(np.diff(mti_offsets), np.diff(rec_offsets))
+    stim = np.repeat(np.arange(n), nmatch)
+    j = np.arange(nmatch.sum()) - np.repeat(np.cumsum(nmatch) - nmatch, nmatch)
+
+    x = np.concatenate([ss[:, 1], mti_frames[mti_offsets[stim] + j]])
+    y = np.concatenate([stimtimes, rec_frames[rec_offsets[stim] + j]])
+
+    if len(x) >= 2 and np.ptp(x) > 0:
+        A = np.column_stack([np.ones_like(x), x])
+        (offset, drift), *_ = np.linalg.lstsq(A, y, rcond=None)
+    elif len(x) >= 1:
+        offset, drift = np.mean(y - x), 1.0
+    else:
+        offset, drift = 0.0, 1.0
+
+    # recording time = offset + drift * stimulus computer time
+    starttime = -offset / drift
+    shift = starttime if globaltime else 0.0
+
+    ss2 = offset + drift * ss + shift
+    frames2 = offset + drift * mti_frames + shift
+    frames2 = np.split(frames2, mti_offsets[1:-1]) if n else []
+
+    mti2 = []
+    for i, m in enumerate(mti):
+        m2 = dict(m)
+        m2['startStopTimes'] = ss2[i]
+        m2['frameTimes'] = frames2[i]
+        mti2.append(m2)
+
+    return mti2, starttime
+
+def _flatten(arrays):
+    parts = [np.asarray(a, dtype=float).ravel() for a in arrays]
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in parts], out=offsets[1:])
+    return (np.concatenate(parts) if parts else np.zeros(0)), offsets
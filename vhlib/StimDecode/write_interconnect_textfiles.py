@@ -1,13 +1,22 @@
 import os
 import numpy as np
 from .write_stimtimes_txt import write_stimtimes_txt
+from .snap_frames_to_refresh import snap_frames_to_refresh
+from .check_stimtimes import check_stimtimes
 
-def write_interconnect_textfiles(dirname, out):
+def write_interconnect_textfiles(dirname, out, binary=False, snap_to_refresh=False, check_timing=False):
     """
     Write interconnect text file info for a given directory
 
     :param dirname: Directory path
     :param out: Dictionary with fields StimTrigger, FrameTriggerRaw, etc.
+    :param binary: if True, also write binary 'stimtimes.npz' and 'stimontimes.npz' files
+    :param snap_to_refresh: if True, snap the frame times to the preceding vertical refresh
+                            (see SNAP_FRAMES_TO_REFRESH) before writing; the check is stored
+                            in out['FrameRefreshCheck']. Frames before the first refresh keep
+                            their measured times. Requires out['StimulusMonitorVerticalRefresh'].
+    :param check_timing: if True, check the stimulus timing (see CHECK_STIMTIMES) before
+                         writing; the report is stored in out['StimTimingCheck']
     """
 
     # if ~isfield(out,'FrameTrigger'),
@@ -37,7 +46,29 @@ def write_interconnect_textfiles(dirname, out):
         else:
             out['FrameTrigger'] = None
 
-    fnames = ['stimtimes.txt', 'stimontimes.txt', 'verticalblanking.txt', 'twophotontimes.txt', 'Intan_decoding_finished.txt']
+    if snap_to_refresh and out.get('FrameTrigger') is not None:
+        if 'StimulusMonitorVerticalRefresh' not in out:
+            print(f"Warning: in {dirname}, no StimulusMonitorVerticalRefresh was decoded; frame times were not snapped to the refresh.")
+        else:
+            check = snap_frames_to_refresh(list(out['FrameTrigger']), out['StimulusMonitorVerticalRefresh'])
+            out['FrameTrigger'] = check['snapped']
+            out['FrameRefreshCheck'] = check
+            ndropped = int(np.count_nonzero(check['dropped']))
+            nduplicated = int(check['duplicated'].sum())
+            nunmatched = int(check['unmatched'].sum())
+            if ndropped or nduplicated:
+                print(f"Warning: in {dirname}, {ndropped} frame drops and {nduplicated} duplicated frames were found.")
+            if nunmatched:
+                print(f"Warning: in {dirname}, {nunmatched} frames came before the first vertical refresh and were not snapped.")
+
+    if check_timing and out.get('FrameTrigger') is not None and 'StimCode' in out and 'StimTrigger' in out:
+        report = check_stimtimes(out['StimCode'], out['StimTrigger'], list(out['FrameTrigger']))
+        out['StimTimingCheck'] = report
+        if not report['ok']:
+            problems = ', '.join(f"{c} ({k})" for c, k in report['counts'].items() if k)
+            print(f"Warning: in {dirname}, stimulus timing check found: {problems}.")
+
+    fnames = ['stimtimes.txt', 'stimontimes.txt', 'stimtimes.npz', 'stimontimes.npz', 'verticalblanking.txt', 'twophotontimes.txt', 'Intan_decoding_finished.txt']
     for fname in fnames:
         fpath = os.path.join(dirname, fname)
         if os.path.isfile(fpath):
@@ -47,8 +78,8 @@ def write_interconnect_textfiles(dirname, out):
     # write_stimtimes_txt(dirname,out.StimCode,out.StimTrigger);
 
     if 'StimCode' in out and 'StimTrigger' in out:
-        write_stimtimes_txt(dirname, out['StimCode'], out['StimTrigger'], out.get('FrameTrigger'), filename='stimtimes.txt')
-        write_stimtimes_txt(dirname, out['StimCode'], out['StimTrigger'], filename='stimontimes.txt')
+        write_stimtimes_txt(dirname, out['StimCode'], out['StimTrigger'], out.get('FrameTrigger'), filename='stimtimes.txt', binary=binary)
+        write_stimtimes_txt(dirname, out['StimCode'], out['StimTrigger'], filename='stimontimes.txt', binary=binary)
 
     if 'TwoPhotonFrameTrigger' in out:
         np.savetxt(os.path.join(dirname, 'twophotontimes.txt'), out['TwoPhotonFrameTrigger'], fmt='%.5f', delimiter='\n')
@@ -1,7 +1,8 @@
 import os
 import numpy as np
+from .stimtimes_npz import stimtimes_npz_filename, write_stimtimes_npz
 
-def write_stimtimes_txt(dirname, stimids, stimtimes, frametimes=None, filename=None):
+def write_stimtimes_txt(dirname, stimids, stimtimes, frametimes=None, filename=None, binary=False):
     """
     Writes the stimtimes.txt file
 
@@ -10,6 +11,8 @@ def write_stimtimes_txt(dirname, stimids, stimtimes, frametimes=None, filename=N
     :param stimtimes: list of stim times
     :param frametimes: list of frame times (list of arrays/lists)
     :param filename: optional filename
+    :param binary: if True, also write the binary companion file (e.g., 'stimtimes.npz')
+                   that keeps full precision (see WRITE_STIMTIMES_NPZ)
     """
 
     if filename is None:
@@ -23,6 +26,12 @@ def write_stimtimes_txt(dirname, stimids, stimtimes, frametimes=None, filename=N
     if os.path.isfile(filepath):
         raise IOError(f"Could not write {filename}; file already exists in {dirname}.")
 
+    # check the binary target first, so that a failure cannot leave a new text file
+    # next to an old binary file (which readers would prefer)
+    npzname = stimtimes_npz_filename(filename)
+    if binary and os.path.isfile(os.path.join(dirname, npzname)):
+        raise IOError(f"Could not write {npzname}; file already exists in {dirname}.")
+
     with open(filepath, 'w') as fid:
         for i in range(len(stimids)):
             # fprintf(fid,'%d ', stimids(i));
@@ -42,3 +51,6 @@ def write_stimtimes_txt(dirname, stimids, stimtimes, frametimes=None, filename=N
             fid.write("\n")
 
         fid.write("\n") # Blank line at end
+
+    if binary:
+        write_stimtimes_npz(dirname, stimids, stimtimes, frametimes, npzname)
@@ -1,5 +1,6 @@
 from .measureddata import MeasuredData
-from .general import spiketriggeredaverage
+from .spikedata import SpikeData
+from .general import spiketriggeredaverage, psth, tuningcurve
 
 def findassociate(md, type_str, owner, description):
     """
@@ -1 +1,6 @@
 from .spiketriggeredaverage import spiketriggeredaverage
+from .psth import psth
+from .tuningcurve import tuningcurve
+from .spikewindows import sorted_spiketimes, spikewindow_bounds, spikewindow_members
+from .crosscorrelogram import crosscorrelogram, crosscorrelogram_all
+from .spikecountmatrix import spikecountmatrix
@@ -0,0 +1,85 @@
+import numpy as np
+from .spikewindows import sorted_spiketimes, spikewindow_bounds, spikewindow_members
+
+def crosscorrelogram(spiketimes1, spiketimes2, window, binsize, exclude_zero=False):
+    """
+    Computes the cross-correlogram of two spike trains
+
+    For every spike of train 1, the spikes of train 2 within +/- WINDOW are found
+    with searchsorted bounds on the sorted train 2, so the cost is
+    O((n+m) log m) plus the number of pairs found, rather than O(n*m).
+
+    :param spiketimes1: array of spike times of the reference unit, or a SpikeData object
+    :param spiketimes2: array of spike times of the target unit, or a SpikeData object
+    :param window: maximum absolute lag in seconds
+    :param binsize: bin width in seconds
+    :param exclude_zero: if True, pairs with a lag of exactly 0 are not counted (use
+                         this for autocorrelograms, where each spike pairs with itself)
+    :return: tuple (counts, bins); counts[k] is the number of pairs with lag
+             t2 - t1 in [bins[k], bins[k+1]); the bins cover [-WINDOW, WINDOW), and
+             the final bin is shortened if 2*WINDOW is not a multiple of BINSIZE
+    """
+
+    t1 = sorted_spiketimes(spiketimes1)
+    t2 = sorted_spiketimes(spiketimes2)
+    bins, nbins = _ccg_bins(window, binsize)
+
+    return _ccg_counts(t1, t2, window, binsize, nbins, exclude_zero, False), bins
+
+def crosscorrelogram_all(spiketrains, window, binsize, pairs=None):
+    """
+    Computes the cross-correlograms of all pairs in a list of spike trains
+
+    Each train is sorted once and shared across all of its pairs. The
+    autocorrelograms (pairs (i, i)) exclude the zero-lag self pairs.
+
+    :param spiketrains: list of arrays of spike times (or SpikeData objects), e.g., for
+                        the cells recorded on one electrode (same name/ref)
+    :param window: maximum absolute lag in seconds
+    :param binsize: bin width in seconds (the final bin is shortened if 2*WINDOW is not
+                    a multiple of BINSIZE)
+    :param pairs: list of (i, j) index pairs to compute (default: all i <= j)
+    :return: tuple (ccgs, bins, pairs); ccgs is a npairs x nbins array whose row p is
+             the cross-correlogram of spiketrains[pairs[p][0]] (reference) and
+             spiketrains[pairs[p][1]]
+    """
+
+    trains = [sorted_spiketimes(s) for s in spiketrains]
+    bins, nbins = _ccg_bins(window, binsize)
+
+    if pairs is None:
+        ii, jj = np.triu_indices(len(trains))
+        pairs = list(zip(ii.tolist(), jj.tolist()))
+
+    ccgs = np.zeros((len(pairs), nbins), dtype=np.int64)
+    for p, (i, j) in enumerate(pairs):
+        ccgs[p] = _ccg_counts(trains[i], trains[j], window, binsize, nbins, False, i == j)
+
+    return ccgs, bins, pairs
+
+def _ccg_bins(window, binsize):
+    if window <= 0 or binsize <= 0:
+        raise ValueError("window and binsize must be positive.")
+    # a span that is a multiple of binsize up to round-off gets no extra bin
+    nbins = max(int(np.ceil(2 * window / binsize - 1e-9)), 1)
+    bins = -window + np.arange(nbins + 1) * binsize
+    bins[-1] = window
+    return bins, nbins
+
+def _ccg_counts(t1, t2, window, binsize, nbins, exclude_zero, same_train, chunksize=100000):
+    counts = np.zeros(nbins, dtype=np.int64)
+    # reference spikes are taken in chunks so that the pair list stays bounded
+    for c0 in range(0, len(t1), chunksize):
+        r = t1[c0:c0 + chunksize]
+        lo, hi = spikewindow_bounds(t2, r - window, r + window)
+        ref, idx, _ = spikewindow_members(lo, hi)
+        lags = t2[idx] - r[ref]
+        if same_train:
+            lags = lags[idx != ref + c0]
+        elif exclude_zero:
+            lags = lags[lags != 0]
+        b = np.floor((lags + window) / binsize).astype(np.int64)
+        # the lags are within +/- window, so the clip only absorbs round-off
+        np.clip(b, 0, nbins - 1, out=b)
+        counts += np.bincount(b, minlength=nbins)
+    return counts
@@ -0,0 +1,80 @@
+import numpy as np
+from .spikewindows import sorted_spiketimes, spikewindow_bounds, spikewindow_members
+
+def psth(spiketimes, onsets, window, binsize, stimids=None):
+    """
+    Computes peri-stimulus time histograms and rasters for each stimulus id
+
+    All trial-aligned spike windows are found with two searchsorted calls and the
+    spikes of all trials are binned with a single histogram, so there is no loop
+    over trials.
+
+    :param spiketimes: array of spike times (sorted; it is sorted if it is not) or a SpikeData object
+    :param onsets: array of stimulus onset times, one per trial
+    :param window: tuple (pre, post) window around each onset in seconds (e.g., [-0.1, 0.5]);
+                   spikes with pre <= t - onset < post are included
+    :param binsize: bin width in seconds; if the window is not a multiple of BINSIZE,
+                    the last bin ends at post and is shorter
+    :param stimids: array of the stimulus id of each trial (default: all trials are one stimulus)
+    :return: dictionary with fields
+             stimids: the unique stimulus ids (sorted)
+             bins: bin edges relative to onset (nbins+1), from pre to post
+             centers: bin centers relative to onset (nbins)
+             counts: number of spikes in each bin, summed over trials (nstimids x nbins)
+             rate: mean firing rate in each bin in spikes/s (nstimids x nbins), using
+                   the width of each bin
+             ntrials: number of trials of each stimulus id
+             trialcounts: number of spikes in the window of each trial
+             raster: dictionary with fields
+                 times: spike times relative to onset, for all trials concatenated
+                 trial: the trial (index into ONSETS) of each spike in TIMES
+                 offsets: spikes of trial i are TIMES[offsets[i]:offsets[i+1]]
+    """
+
+    spiketimes = sorted_spiketimes(spiketimes)
+    onsets = np.asarray(onsets, dtype=float).ravel()
+
+    if stimids is None:
+        stimids = np.zeros(len(onsets))
+    stimids = np.asarray(stimids).ravel()
+    if len(stimids) != len(onsets):
+        raise ValueError("stimids and onsets must have the same length.")
+
+    pre, post = float(window[0]), float(window[1])
+    if post <= pre:
+        raise ValueError("window must be (pre, post) with post > pre.")
+    if binsize <= 0:
+        raise ValueError("binsize must be positive.")
+    # a window that is a multiple of binsize up to round-off gets no extra bin
+    nbins = max(int(np.ceil((post - pre) / binsize - 1e-9)), 1)
+    bins = pre + np.arange(nbins + 1) * binsize
+    bins[-1] = post
+    widths = np.diff(bins)
+
+    lo, hi = spikewindow_bounds(spiketimes, onsets + pre, onsets + post)
+    trialcounts = hi - lo
+    trial, spike_index, offsets = spikewindow_members(lo, hi)
+    reltimes = spiketimes[spike_index] - onsets[trial]
+
+    ustimids, group = np.unique(stimids, return_inverse=True)
+    ngroups = len(ustimids)
+
+    binindex = np.floor((reltimes - pre) / binsize).astype(np.int64)
+    # only absorbs round-off at the window edges
+    np.clip(binindex, 0, nbins - 1, out=binindex)
+    counts = np.bincount(group[trial] * nbins + binindex, minlength=ngroups * nbins).reshape(ngroups, nbins)
+
+    ntrials = np.bincount(group, minlength=ngroups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = counts / (ntrials[:, None] * widths)
+
+    return {
+        'stimids': ustimids,
+        'bins': bins,
+        'centers': bins[:-1] + widths / 2,
+        'counts': counts,
+        'rate': rate,
+        'ntrials': ntrials,
+        'trialcounts': trialcounts,
+        'raster': {'times': reltimes, 'trial': trial, 'offsets': offsets},
+    }
@@ -0,0 +1,112 @@
+import numpy as np
+from .spikewindows import sorted_spiketimes, spikewindow_bounds
+
+def spikecountmatrix(spiketrains, bins=None, windows=None, output='auto', chunkbins=None, density_threshold=0.1):
+    """
+    Builds a cells x bins (or cells x windows) matrix of spike counts
+
+    The bin of every spike of every cell is computed in one vectorized pass over
+    the concatenated spike trains, and the counts are formed by run-length encoding
+    (each train is sorted, so the flattened (cell, bin) indices are already in
+    order). No dense matrix is allocated unless a dense result is returned.
+
+    :param spiketrains: list of arrays of spike times (or SpikeData objects), e.g., for
+                        the cells returned by FILTER_BY_QUALITY
+    :param bins: bin specification, either (t0, t1, binsize) for uniform bins or a
+                 1-D array of bin edges; for uniform bins, the final bin is shortened
+                 if (t1-t0) is not a multiple of binsize
+    :param windows: Nx2 array of (start, stop) trial windows; give BINS or WINDOWS
+    :param output: 'dense', 'sparse', or 'auto' (default): 'auto' returns a sparse
+                   result if fewer than DENSITY_THRESHOLD of the entries are nonzero
+    :param chunkbins: if given, process the bins this many at a time, so that the
+                      intermediate arrays only hold the spikes of one chunk
+    :param density_threshold: density below which 'auto' chooses sparse (default 0.1)
+    :return: tuple (counts, edges); COUNTS is either a numpy array (ncells x nbins) or,
+             if sparse, a dictionary with the CSR-style fields data, indices, indptr
+             and shape (the counts of cell i are data[indptr[i]:indptr[i+1]] in the
+             columns indices[indptr[i]:indptr[i+1]]). EDGES are the bin edges, or the
+             windows if WINDOWS was given.
+    """
+
+    if output not in ('auto', 'dense', 'sparse'):
+        raise ValueError("output must be 'auto', 'dense', or 'sparse'.")
+    if (bins is None) == (windows is None):
+        raise ValueError("Exactly one of bins or windows must be given.")
+
+    trains = [sorted_spiketimes(s) for s in spiketrains]
+    ncells = len(trains)
+
+    if windows is not None:
+        windows = np.asarray(windows, dtype=float).reshape(-1, 2)
+        counts = np.zeros((ncells, len(windows)), dtype=np.int64)
+        for i, t in enumerate(trains):
+            lo, hi = spikewindow_bounds(t, windows[:, 0], windows[:, 1])
+            counts[i] = hi - lo
+        if _choose_sparse(output, np.count_nonzero(counts), counts.size, density_threshold):
+            rows, cols = np.nonzero(counts)
+            return _csr(rows, cols, counts[rows, cols], counts.shape), windows
+        return counts, windows
+
+    uniform = isinstance(bins, tuple) and len(bins) == 3
+    if uniform:
+        t0, t1, binsize = (float(b) for b in bins)
+        nbins = int(np.ceil((t1 - t0) / binsize - 1e-9))
+        edges = t0 + np.arange(nbins + 1) * binsize
+        edges[-1] = t1
+    else:
+        edges = np.asarray(bins, dtype=float).ravel()
+        nbins = len(edges) - 1
+    if nbins < 1:
+        raise ValueError("bins must describe at least one bin.")
+
+    if chunkbins is None:
+        chunkbins = nbins
+
+    rows, cols, vals = [], [], []
+    for b0 in range(0, nbins, chunkbins):
+        b1 = min(b0 + chunkbins, nbins)
+        lo = np.array([np.searchsorted(t, edges[b0], side='left') for t in trains], dtype=np.int64)
+        hi = np.array([np.searchsorted(t, edges[b1], side='left') for t in trains], dtype=np.int64)
+        n = hi - lo
+        if n.sum() == 0:
+            continue
+        spikes = np.concatenate([t[a:b] for t, a, b in zip(trains, lo, hi)])
+        cell = np.repeat(np.arange(ncells), n)
+        if uniform:
+            binindex = np.floor((spikes - t0) / binsize).astype(np.int64)
+            np.clip(binindex, b0, b1 - 1, out=binindex)
+        else:
+            binindex = np.searchsorted(edges, spikes, side='right') - 1
+        flat = cell * nbins + binindex
+        # flat is nondecreasing, so equal entries are adjacent
+        starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+        keys = flat[starts]
+        rows.append(keys // nbins)
+        cols.append(keys % nbins)
+        vals.append(np.diff(np.append(starts, len(flat))))
+
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    vals = np.concatenate(vals) if vals else np.zeros(0, dtype=np.int64)
+
+    if _choose_sparse(output, len(vals), ncells * nbins, density_threshold):
+        if chunkbins < nbins:
+            order = np.argsort(rows, kind='stable')
+            rows, cols, vals = rows[order], cols[order], vals[order]
+        return _csr(rows, cols, vals, (ncells, nbins)), edges
+
+    counts = np.zeros((ncells, nbins), dtype=np.int64)
+    counts[rows, cols] = vals
+    return counts, edges
+
+def _choose_sparse(output, nnz, size, density_threshold):
+    if output == 'auto':
+        return size > 0 and nnz / size < density_threshold
+    return output == 'sparse'
+
+def _csr(rows, cols, vals, shape):
+    # rows must be in nondecreasing order
+    indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+    return {'data': np.asarray(vals, dtype=np.int64), 'indices': np.asarray(cols, dtype=np.int64),
+            'indptr': indptr, 'shape': shape}
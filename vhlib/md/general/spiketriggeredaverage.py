@@ -2,13 +2,14 @@ def spiketriggeredaverage(spiketimes, signal, signal_t, window):
     """
     Computes spike-triggered average of a signal.
 
-    :param spiketimes: list or array of spike times
+    :param spiketimes: list or array of spike times, or a SpikeData object
     :param signal: array of signal values
     :param signal_t: array of time points for signal
     :param window: tuple (pre, post) window around spike in seconds (e.g., [-0.1, 0.1])
     :return: tuple (sta, t_sta, num_spikes)
     """
     import numpy as np
+    from .spikewindows import sorted_spiketimes
 
     # Simple implementation using numpy
     # Identify sample rate from signal_t
@@ -22,7 +23,6 @@ def spiketriggeredaverage(spiketimes, signal, signal_t, window):
     n_post = int(abs(window[1]) / dt)
 
     sta = np.zeros(n_pre + n_post + 1)
-    count = 0
 
     signal_arr = np.array(signal)
 
@@ -31,18 +31,19 @@ def spiketriggeredaverage(spiketimes, signal, signal_t, window):
     # idx = (t - t0) / dt
     t0 = signal_t[0]
 
-    for st in spiketimes:
-        if st < signal_t[0] or st > signal_t[-1]:
-            continue
+    # spikes within the signal's time range
+    spiketimes = sorted_spiketimes(spiketimes)
+    lo = np.searchsorted(spiketimes, signal_t[0], side='left')
+    hi = np.searchsorted(spiketimes, signal_t[-1], side='right')
+    st = spiketimes[lo:hi]
 
-        idx = int((st - t0) / dt)
+    idx = ((st - t0) / dt).astype(np.int64)
+    idx = idx[(idx - n_pre >= 0) & (idx + n_post + 1 <= len(signal_arr))]
+    count = len(idx)
 
-        start_idx = idx - n_pre
-        end_idx = idx + n_post + 1
-
-        if start_idx >= 0 and end_idx <= len(signal_arr):
-            sta += signal_arr[start_idx:end_idx]
-            count += 1
+    # one vectorized gather per lag keeps memory at O(number of spikes)
+    for k, lag in enumerate(range(-n_pre, n_post + 1)):
+        sta[k] = signal_arr[idx + lag].sum()
 
     if count > 0:
         sta /= count
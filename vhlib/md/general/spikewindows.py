@@ -0,0 +1,50 @@
+import numpy as np
+
+def sorted_spiketimes(spiketimes):
+    """
+    Returns spike times as a sorted, contiguous float64 array
+
+    :param spiketimes: list or array of spike times, or a SpikeData object
+    :return: sorted float64 array (the input itself if it already qualifies)
+    """
+    if hasattr(spiketimes, 'spiketimes'):
+        return spiketimes.spiketimes
+    spiketimes = np.ascontiguousarray(spiketimes, dtype=float).ravel()
+    if spiketimes.size > 1 and np.any(spiketimes[1:] < spiketimes[:-1]):
+        spiketimes = np.sort(spiketimes)
+    return spiketimes
+
+def spikewindow_bounds(spiketimes, starts, stops):
+    """
+    Finds the spikes that fall in each of many time windows
+
+    This is the spike-window primitive shared by the SpikeData, PSTH, and tuning
+    curve code: two searchsorted calls on the sorted spike times.
+
+    :param spiketimes: sorted array of spike times
+    :param starts: array of window start times
+    :param stops: array of window stop times
+    :return: tuple (lo, hi); the spikes with starts[i] <= t < stops[i] are
+             spiketimes[lo[i]:hi[i]]
+    """
+    lo = np.searchsorted(spiketimes, starts, side='left')
+    hi = np.searchsorted(spiketimes, stops, side='left')
+    return lo, np.maximum(hi, lo)
+
+def spikewindow_members(lo, hi):
+    """
+    Lists the spikes of all windows found by SPIKEWINDOW_BOUNDS at once
+
+    :param lo: window start indices from SPIKEWINDOW_BOUNDS
+    :param hi: window stop indices from SPIKEWINDOW_BOUNDS
+    :return: tuple (window, spike_index, offsets): for every spike of every window
+             (windows concatenated in order), the window number and the index of the
+             spike in the spike time array; the members of window i are entries
+             offsets[i]:offsets[i+1]
+    """
+    counts = hi - lo
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    window = np.repeat(np.arange(len(counts)), counts)
+    spike_index = np.arange(offsets[-1]) - offsets[window] + lo[window]
+    return window, spike_index, offsets
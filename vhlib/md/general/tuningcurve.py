@@ -0,0 +1,102 @@
+import numpy as np
+from .spikewindows import sorted_spiketimes, spikewindow_bounds, spikewindow_members
+
+def tuningcurve(spiketimes, onsets, stimids, window, tf=None):
+    """
+    Computes the response of a cell to each stimulus condition
+
+    Presentations are grouped by stimulus id once (a stable sorted permutation with
+    group offsets), and the spikes in each presentation's response window are counted
+    with searchsorted, so there is no loop over trials or conditions. If TF is given,
+    the F1 response (the response modulation at the temporal frequency TF) is also
+    computed by projecting the phase of every spike in every window at once.
+
+    The 'curve' output has the layout of the response curve associates (such as
+    'SP F0 TFOP1 TF Response curve'): rows are the stimulus ids, the mean, the
+    standard deviation, and the standard error. It can be stored with
+    associate(cell, type, owner, result['curve'], desc).
+
+    :param spiketimes: array of spike times (sorted; it is sorted if it is not) or a SpikeData object
+    :param onsets: array of stimulus onset times, one per presentation
+    :param stimids: array of the stimulus id of each presentation
+    :param window: (start, stop) of the response window relative to onset, in seconds,
+                   or an Nx2 array with a window for each presentation
+    :param tf: temporal frequency in Hz (scalar or one per presentation) for the F1
+               response; default None (no F1)
+    :return: dictionary with fields
+             stimids: the unique stimulus ids (sorted)
+             ntrials: number of presentations of each stimulus id
+             mean, stddev, sem: mean response (spikes/s), standard deviation and
+                 standard error of each stimulus id
+             trials: nstimids x max(ntrials) matrix of the per-presentation responses
+                 (spikes/s), in presentation order, padded with NaN
+             order, offsets: the grouping; presentations ORDER[OFFSETS[i]:OFFSETS[i+1]]
+                 are those of STIMIDS[i]
+             curve: 4 x nstimids matrix [stimids; mean; stddev; sem]
+             if TF is given, f1mean, f1stddev, f1sem, f1trials and f1curve hold the
+                 same quantities for the F1 response amplitude (spikes/s)
+    """
+
+    spiketimes = sorted_spiketimes(spiketimes)
+    onsets = np.asarray(onsets, dtype=float).ravel()
+    stimids = np.asarray(stimids).ravel()
+    if len(stimids) != len(onsets):
+        raise ValueError("stimids and onsets must have the same length.")
+
+    window = np.asarray(window, dtype=float)
+    if window.ndim == 1:
+        window = np.broadcast_to(window, (len(onsets), 2))
+    if window.shape != (len(onsets), 2):
+        raise ValueError("window must be (start, stop) or an Nx2 array with one row per presentation.")
+    starts = onsets + window[:, 0]
+    stops = onsets + window[:, 1]
+    durations = stops - starts
+    if np.any(durations <= 0):
+        raise ValueError("response windows must have stop > start.")
+
+    lo, hi = spikewindow_bounds(spiketimes, starts, stops)
+    rates = (hi - lo) / durations
+
+    order = np.argsort(stimids, kind='stable')
+    sorted_ids = stimids[order]
+    offsets = np.concatenate(([0], np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1, [len(order)]))
+    if len(order) == 0:
+        offsets = np.zeros(1, dtype=np.int64)
+    ustimids = sorted_ids[offsets[:-1]]
+    ntrials = np.diff(offsets)
+
+    out = {'stimids': ustimids, 'ntrials': ntrials, 'order': order, 'offsets': offsets}
+    _summarize(out, rates, order, offsets, ntrials, '')
+
+    if tf is not None:
+        tf = np.broadcast_to(np.asarray(tf, dtype=float), (len(onsets),))
+        trial, spike_index, _ = spikewindow_members(lo, hi)
+        phase = 2 * np.pi * tf[trial] * (spiketimes[spike_index] - starts[trial])
+        c = np.bincount(trial, weights=np.cos(phase), minlength=len(onsets))
+        s = np.bincount(trial, weights=np.sin(phase), minlength=len(onsets))
+        f1 = 2 * np.hypot(c, s) / durations
+        _summarize(out, f1, order, offsets, ntrials, 'f1')
+
+    return out
+
+def _summarize(out, values, order, offsets, ntrials, prefix):
+    ngroups = len(ntrials)
+    v = values[order]
+    group = np.repeat(np.arange(ngroups), ntrials)
+    if ngroups > 0:
+        mean = np.add.reduceat(v, offsets[:-1]) / ntrials
+        sqdev = np.add.reduceat((v - mean[group]) ** 2, offsets[:-1])
+    else:
+        mean = sqdev = np.zeros(0)
+    # MATLAB's std: normalized by N-1, and 0 for a single value
+    stddev = np.sqrt(sqdev / np.maximum(ntrials - 1, 1))
+    sem = stddev / np.sqrt(ntrials)
+
+    trials = np.full((ngroups, ntrials.max() if ngroups else 0), np.nan)
+    trials[group, np.arange(len(v)) - offsets[group]] = v
+
+    out[prefix + 'mean'] = mean
+    out[prefix + 'stddev'] = stddev
+    out[prefix + 'sem'] = sem
+    out[prefix + 'trials'] = trials
+    out[prefix + 'curve'] = np.vstack([out['stimids'].astype(float), mean, stddev, sem])
@@ -0,0 +1,126 @@
+import numpy as np
+from .measureddata import MeasuredData
+from .general.spikewindows import spikewindow_bounds
+
+
+class SpikeData(MeasuredData):
+    """
+    Part of the NeuralAnalysis package
+
+    Creates a new SPIKEDATA object, a MEASUREDDATA object that holds the spike
+    times of a single unit. The spike times are stored as a sorted, contiguous
+    float64 array, and every spike must fall within one of the INTERVALS.
+    """
+
+    def __init__(self, intervals, desc_long='', desc_brief='', data=None):
+        """
+        SD = SPIKEDATA(INTERVALS, DESC_LONG, DESC_BRIEF, DATA)
+
+        :param intervals: Nx2 list or array of intervals
+        :param desc_long: Long description string
+        :param desc_brief: Brief description string
+        :param data: list or array of spike times (sorted if it is not)
+        """
+        super().__init__(intervals, desc_long, desc_brief)
+
+        spiketimes = np.ascontiguousarray(data if data is not None else [], dtype=float).ravel()
+        if spiketimes.size > 1 and np.any(spiketimes[1:] < spiketimes[:-1]):
+            spiketimes = np.sort(spiketimes)
+
+        iv = np.asarray(intervals, dtype=float).reshape(-1, 2)
+        if spiketimes.size > 0:
+            if len(iv) == 0:
+                raise ValueError("spike times given but no intervals.")
+            # a spike is inside an interval if one of the intervals starting at or
+            # before it ends at or after it
+            iv = iv[np.argsort(iv[:, 0], kind='stable')]
+            ends = np.maximum.accumulate(iv[:, 1])
+            k = np.searchsorted(iv[:, 0], spiketimes, side='right') - 1
+            inside = (k >= 0) & (spiketimes <= ends[np.maximum(k, 0)])
+            if not np.all(inside):
+                bad = spiketimes[~inside]
+                raise ValueError(f"{len(bad)} spike times fall outside the intervals (first: {bad[0]}).")
+
+        self.spiketimes = spiketimes
+
+    def __len__(self):
+        return len(self.spiketimes)
+
+    def get_data(self, t0=None, t1=None):
+        """
+        Returns the spike times with T0 <= t < T1 (all spike times by default)
+        """
+        return self.slice(-np.inf if t0 is None else t0, np.inf if t1 is None else t1)
+
+    def slice(self, t0, t1):
+        """
+        Returns the spike times with T0 <= t < T1 as a view (no copy)
+        """
+        lo, hi = np.searchsorted(self.spiketimes, [t0, t1], side='left')
+        return self.spiketimes[lo:max(hi, lo)]
+
+    def window_bounds(self, starts, stops):
+        """
+        Returns (lo, hi) such that spiketimes[lo[i]:hi[i]] are the spikes in window i
+
+        See SPIKEWINDOW_BOUNDS.
+        """
+        return spikewindow_bounds(self.spiketimes, np.asarray(starts, dtype=float), np.asarray(stops, dtype=float))
+
+    def count_in_windows(self, starts, stops):
+        """
+        Returns the number of spikes with STARTS[i] <= t < STOPS[i] for each window i
+        """
+        lo, hi = self.window_bounds(starts, stops)
+        return hi - lo
+
+    def bin(self, binsize, t0=None, t1=None):
+        """
+        Counts spikes in bins of width BINSIZE from T0 to T1
+
+        T0 and T1 default to the start of the first and the end of the last interval.
+        The final bin is shortened if (T1-T0) is not a multiple of BINSIZE.
+
+        :return: tuple (counts, edges)
+        """
+        iv = np.asarray(self.intervals, dtype=float).reshape(-1, 2)
+        if t0 is None:
+            t0 = iv[:, 0].min() if len(iv) else 0.0
+        if t1 is None:
+            t1 = iv[:, 1].max() if len(iv) else 0.0
+        # a span that is a multiple of binsize up to round-off gets no extra bin
+        nbins = max(int(np.ceil((t1 - t0) / binsize - 1e-9)), 1)
+        edges = t0 + np.arange(nbins + 1) * binsize
+        edges[-1] = t1
+        counts = np.diff(np.searchsorted(self.spiketimes, edges, side='left'))
+        return counts, edges
+
+    def isi(self):
+        """
+        Returns the interspike intervals
+        """
+        return np.diff(self.spiketimes)
+
+    def isi_stats(self, refractory=0.001):
+        """
+        Returns summary statistics of the interspike intervals
+
+        :param refractory: refractory period in seconds used to count violations
+        :return: dictionary with fields n, mean, median, std, cv (std/mean), min,
+                 and violations (the fraction of intervals shorter than REFRACTORY)
+        """
+        d = self.isi()
+        if len(d) == 0:
+            return {'n': 0, 'mean': np.nan, 'median': np.nan, 'std': np.nan,
+                    'cv': np.nan, 'min': np.nan, 'violations': np.nan}
+        mean = d.mean()
+        std = d.std(ddof=1) if len(d) > 1 else 0.0
+        return {
+            'n': len(d),
+            'mean': mean,
+            'median': np.median(d),
+            'std': std,
+            'cv': std / mean if mean > 0 else np.nan,
+            'min': d.min(),
+            'violations': np.count_nonzero(d < refractory) / len(d),
+        }